@@ -0,0 +1 @@
+"""Benchmarks das etapas de carga, estatística e gráficos das páginas."""
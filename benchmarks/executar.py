@@ -0,0 +1,370 @@
+"""Mede tempo e memória de cada etapa das páginas sobre dados sintéticos.
+
+Para cada tamanho, gera um conjunto com o esquema da planilha Macaé e executa
+as mesmas etapas que ``main.py``, ``main1.py`` e ``main2.py`` executam a cada
+interação (conversão e filtros, estatísticas, percentis, bootstrap, índices,
+Monte Carlo e figuras), além da carga da planilha (.xlsx lido pelo openpyxl e
+depois pelo cache em disco). Cada etapa roda uma vez fora da medição, para
+que importações tardias (scipy, matplotlib) e caches de primeira chamada não
+entrem no tempo; o tempo é o melhor de ``--repeticoes`` execuções e a memória
+é o pico do ``tracemalloc`` em uma execução separada. As etapas usam um único
+worker (bootstrap, Monte Carlo, planilha sintética com um site), e a baseline
+só é comparada com execuções no mesmo número de núcleos. Com ``--baseline``
+e sem ``--tamanhos``, o tamanho é o da baseline versionada
+(``TAMANHO_BASELINE`` linhas).
+
+Uso::
+
+    python -m benchmarks.executar --baseline benchmarks/baseline.json
+    python -m benchmarks.executar --tamanhos 1e6 1e7 --paginas main main2 --repeticoes 1
+    python -m benchmarks.executar --baseline benchmarks/baseline.json --salvar-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.sinteticos import MAX_LINHAS_XLSX, gerar_dataframe, gravar_planilha
+from dosimetria import COL_DOSE, COL_RA226, COL_RA228
+from dosimetria.estatisticas import DoseSummary, calcular_estatisticas_radionuclideos
+from dosimetria.figuras import CacheFiguras, dispersao
+from dosimetria.indice import IndiceLimiares
+from dosimetria.montecarlo import simular_incerteza
+from dosimetria.reamostragem import intervalos_confianca
+from dosimetria.regressao import regressoes_dataframe
+from dosimetria.resultados import filtrar_teto, preparar_resultados
+from dosimetria.varredura import varrer_limites
+
+NUMERICAS_MAIN = [COL_DOSE, COL_RA226, COL_RA228]
+NUMERICAS_MAIN1 = [COL_DOSE, COL_RA226, "Incerteza", COL_RA228, "Incerteza.1"]
+# Convertidas com pd.to_numeric em main1.py; dose e resultados passam por preparar_resultados
+INCERTEZAS = ["Incerteza", "Incerteza.1"]
+
+# Tempos abaixo deste valor (s) são dominados por ruído e não contam como regressão
+PISO_RUIDO = 0.005
+
+# Número de linhas da baseline versionada (benchmarks/baseline.json)
+TAMANHO_BASELINE = 100_000
+
+ETAPAS = []
+
+
+def etapa(pagina, nome):
+    def registrar(funcao):
+        ETAPAS.append((pagina, nome, funcao))
+        return funcao
+    return registrar
+
+
+def preparar(linhas, semente=0):
+    """Estado de entrada das etapas, montado fora da medição."""
+    bruto = gerar_dataframe(linhas, semente=semente, completo=False)
+
+    filtrado = _main_conversao({"bruto": bruto})
+    main1 = _main1_conversao({"bruto": bruto})
+
+    concentracao = np.maximum(main1[COL_RA226].to_numpy(), main1[COL_RA228].to_numpy())
+    return {
+        "linhas": linhas,
+        "bruto": bruto,
+        "filtrado": filtrado,
+        "main1": main1,
+        "resumo": DoseSummary(filtrado[COL_DOSE].to_numpy()),
+        "indice": IndiceLimiares(concentracao, main1[COL_DOSE].to_numpy()),
+    }
+
+
+def _renderizar(desenhar):
+    # Cache novo a cada chamada: mede sempre a renderização completa
+    return CacheFiguras().obter(("benchmark",), desenhar)
+
+
+# --- Carga da planilha (comum às três páginas) ---
+
+@etapa("carga", "planilha_openpyxl")
+def _carga_fria(ctx):
+    from dosimetria.cache import limpar_cache
+    from dosimetria.sites import carregar_sites
+
+    limpar_cache(ctx["planilha"])
+    return carregar_sites(ctx["planilha"], NUMERICAS_MAIN, numericas=NUMERICAS_MAIN)
+
+
+@etapa("carga", "planilha_cache")
+def _carga_cache(ctx):
+    from dosimetria.sites import carregar_sites
+
+    return carregar_sites(ctx["planilha"], NUMERICAS_MAIN, numericas=NUMERICAS_MAIN)
+
+
+# --- main.py ---
+
+@etapa("main", "conversao_filtro")
+def _main_conversao(ctx):
+    # Resultados censurados ("< CMD", "< 0,03") no limite de detecção, como em main.py
+    df = preparar_resultados(ctx["bruto"][NUMERICAS_MAIN + ["CMD", "CMD.1"]])
+    return filtrar_teto(df, 8.0)
+
+
+@etapa("main", "estatisticas_radionuclideos")
+def _main_radionuclideos(ctx):
+    return calcular_estatisticas_radionuclideos(ctx["filtrado"])
+
+
+@etapa("main", "estatisticas_dose")
+def _main_dose(ctx):
+    # Sem a memorização de obter_resumo_dose: mede o cálculo completo
+    return DoseSummary(ctx["filtrado"][COL_DOSE].to_numpy()).como_dicionario()
+
+
+@etapa("main", "percentis_semaforo")
+def _main_percentis(ctx):
+    resumo = ctx["resumo"]
+    return ([resumo.percentil(p) for p in (90, 95, 99)],
+            resumo.contar_ate(3.0), resumo.contar_entre(3.0, 5.0), resumo.contar_acima(5.0))
+
+
+@etapa("main", "intervalos_bootstrap")
+def _main_bootstrap(ctx):
+    return intervalos_confianca(ctx["resumo"].ordenados, n_reamostras=1000, max_workers=1)
+
+
+@etapa("main", "varredura")
+def _main_varredura(ctx):
+    df = ctx["main1"]
+    return varrer_limites(df[COL_RA226], df[COL_RA228], df[COL_DOSE],
+                          np.arange(3.0, 7.25, 0.5), np.arange(4.0, 12.5, 1.0))
+
+
+@etapa("main", "figura_distribuicao")
+def _main_figura_distribuicao(ctx):
+    def desenhar():
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=(12, 6))
+        ax.axvspan(0, 3.0, alpha=0.3, color="green")
+        ax.axvspan(3.0, 5.0, alpha=0.3, color="yellow")
+        ax.hist(ctx["filtrado"][COL_DOSE], bins=15, alpha=0.7, color="blue", edgecolor="black")
+        ax.axvline(x=ctx["resumo"].percentil(95), color="red", linestyle="--")
+        return fig
+
+    return _renderizar(desenhar)
+
+
+@etapa("main", "figura_dispersao")
+def _main_figura_dispersao(ctx):
+    def desenhar():
+        import matplotlib.pyplot as plt
+
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
+        dispersao(ax1, ctx["filtrado"][COL_RA226], ctx["filtrado"][COL_DOSE], cor="blue", limite=5.0)
+        dispersao(ax2, ctx["filtrado"][COL_RA228], ctx["filtrado"][COL_DOSE], cor="red", limite=5.0)
+        return fig
+
+    return _renderizar(desenhar)
+
+
+# --- main1.py ---
+
+@etapa("main1", "conversao")
+def _main1_conversao(ctx):
+    df = preparar_resultados(ctx["bruto"], manter_cmd=True)
+    for coluna in INCERTEZAS:
+        df[coluna] = pd.to_numeric(df[coluna], errors="coerce")
+    return df.dropna(subset=NUMERICAS_MAIN)
+
+
+@etapa("main1", "indice")
+def _main1_indice(ctx):
+    df = ctx["main1"]
+    concentracao = np.maximum(df[COL_RA226].to_numpy(), df[COL_RA228].to_numpy())
+    return IndiceLimiares(concentracao, df[COL_DOSE].to_numpy())
+
+
+@etapa("main1", "filtro_indice")
+def _main1_filtro(ctx):
+    return ctx["main1"].iloc[ctx["indice"].selecionar(8.0, 5.0)], ctx["indice"].contar(8.0, 5.0)
+
+
+@etapa("main1", "descritivas_correlacao")
+def _main1_descritivas(ctx):
+    df = ctx["main1"]
+    return [df[c].describe() for c in NUMERICAS_MAIN], df[NUMERICAS_MAIN].corr()
+
+
+@etapa("main1", "regressao")
+def _main1_regressao(ctx):
+    # Os três modelos por mínimos quadrados, como o método padrão de main1.py
+    return regressoes_dataframe(ctx["main1"], metodo="mqo")
+
+
+@etapa("main1", "monte_carlo")
+def _main1_monte_carlo(ctx):
+    df = ctx["main1"]
+    return simular_incerteza(df[COL_RA226], df["Incerteza"], df[COL_RA228], df["Incerteza.1"], df[COL_DOSE],
+                             n_realizacoes=100, max_workers=1)
+
+
+@etapa("main1", "figura_histogramas")
+def _main1_figura_histogramas(ctx):
+    def desenhar():
+        import matplotlib.pyplot as plt
+
+        fig, eixos = plt.subplots(1, 3, figsize=(18, 5))
+        for ax, coluna, cor in zip(eixos, NUMERICAS_MAIN[::-1], ("blue", "red", "green")):
+            ax.hist(ctx["main1"][coluna], bins=20, alpha=0.7, color=cor, edgecolor="black")
+        return fig
+
+    return _renderizar(desenhar)
+
+
+# --- main2.py ---
+
+@etapa("main2", "percentis_pandas")
+def _main2_percentis(ctx):
+    dose = ctx["filtrado"][COL_DOSE]
+    return ([np.percentile(dose, p) for p in (90, 95, 99)],
+            len(dose[dose <= 3.0]), len(dose[(dose > 3.0) & (dose <= 5.0)]), len(dose[dose > 5.0]))
+
+
+def medir(funcao, ctx, repeticoes):
+    # Aquecimento fora da medição: importações tardias e caches de primeira chamada
+    funcao(ctx)
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(ctx)
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    try:
+        funcao(ctx)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(tempos), float(np.median(tempos)), pico / 2 ** 20
+
+
+def executar(tamanhos, paginas, etapas=None, repeticoes=3, max_planilha=100_000):
+    resultados = []
+    for linhas in tamanhos:
+        print(f"Preparando {linhas} linhas...", file=sys.stderr)
+        ctx = preparar(linhas)
+
+        with tempfile.TemporaryDirectory() as temporario:
+            selecionadas = [(p, n, f) for p, n, f in ETAPAS
+                            if p in paginas and (not etapas or n in etapas)]
+            if any(p == "carga" for p, _, _ in selecionadas):
+                if linhas <= min(max_planilha, MAX_LINHAS_XLSX - 1):
+                    os.environ["DOSIMETRIA_CACHE_DIR"] = str(Path(temporario) / "cache")
+                    ctx["planilha"] = gravar_planilha(gerar_dataframe(linhas), Path(temporario) / "sintetica.xlsx")
+                else:
+                    selecionadas = [(p, n, f) for p, n, f in selecionadas if p != "carga"]
+
+            for pagina, nome, funcao in selecionadas:
+                melhor, mediana, pico = medir(funcao, ctx, repeticoes)
+                resultados.append({
+                    "pagina": pagina,
+                    "etapa": nome,
+                    "linhas": linhas,
+                    "tempo_s": melhor,
+                    "mediana_s": mediana,
+                    "pico_mb": pico,
+                })
+                print(f"{pagina:<6} {nome:<28} {linhas:>9} {melhor * 1000:10.1f} ms {pico:9.1f} MB",
+                      file=sys.stderr)
+    return resultados
+
+
+def _chave(resultado):
+    return f"{resultado['pagina']}/{resultado['etapa']}/{resultado['linhas']}"
+
+
+def comparar(resultados, baseline, tolerancia):
+    """Lista de regressões de tempo ou memória em relação à baseline."""
+    referencia = {_chave(r): r for r in baseline["resultados"]}
+    regressoes = []
+    for resultado in resultados:
+        base = referencia.get(_chave(resultado))
+        if base is None:
+            print(f"Sem referência na baseline: {_chave(resultado)}", file=sys.stderr)
+            continue
+        if resultado["tempo_s"] > PISO_RUIDO and resultado["tempo_s"] > base["tempo_s"] * (1 + tolerancia):
+            regressoes.append(f"{_chave(resultado)}: tempo {base['tempo_s'] * 1000:.1f} -> "
+                              f"{resultado['tempo_s'] * 1000:.1f} ms")
+        if resultado["pico_mb"] > 1 and resultado["pico_mb"] > base["pico_mb"] * (1 + tolerancia):
+            regressoes.append(f"{_chave(resultado)}: memória {base['pico_mb']:.1f} -> "
+                              f"{resultado['pico_mb']:.1f} MB")
+    return regressoes
+
+
+def _maquina():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "processador": platform.processor() or platform.machine(),
+        "nucleos": os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks das páginas sobre dados sintéticos")
+    parser.add_argument("--tamanhos", nargs="+", type=float,
+                        help="números de linhas (1e3 a 1e7); padrão 1e3 1e4 1e5, ou o da baseline")
+    parser.add_argument("--paginas", nargs="+", default=["carga", "main", "main1", "main2"],
+                        choices=["carga", "main", "main1", "main2"])
+    parser.add_argument("--etapas", nargs="+", help="executa apenas estas etapas")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--max-planilha", type=float, default=1e5,
+                        help="maior tamanho para o qual a carga do .xlsx é medida")
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    parser.add_argument("--baseline", help="JSON de referência para detectar regressões")
+    parser.add_argument("--salvar-baseline", action="store_true", help="grava os resultados como a baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="piora relativa tolerada")
+    args = parser.parse_args(argv)
+
+    tamanhos = args.tamanhos or ([TAMANHO_BASELINE] if args.baseline else [1e3, 1e4, 1e5])
+    resultados = executar([int(t) for t in tamanhos], args.paginas, args.etapas,
+                          args.repeticoes, int(args.max_planilha))
+    relatorio = {
+        "maquina": _maquina(),
+        "repeticoes": args.repeticoes,
+        "resultados": resultados,
+    }
+
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(relatorio, indent=2), encoding="utf-8")
+
+    if args.baseline and args.salvar_baseline:
+        Path(args.baseline).write_text(json.dumps(relatorio, indent=2), encoding="utf-8")
+        print(f"Baseline gravada em {args.baseline}", file=sys.stderr)
+    elif args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        nucleos = baseline["maquina"].get("nucleos")
+        if nucleos != relatorio["maquina"]["nucleos"]:
+            print(f"A baseline foi gravada com {nucleos} núcleo(s) e esta máquina tem "
+                  f"{relatorio['maquina']['nucleos']}; grave uma baseline nesta máquina (--salvar-baseline)",
+                  file=sys.stderr)
+            return 2
+        regressoes = comparar(resultados, baseline, args.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO {regressao}", file=sys.stderr)
+        if regressoes:
+            return 1
+        print("Sem regressões em relação à baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Conjuntos de dados sintéticos com o mesmo esquema da planilha Macaé.
+
+Os parâmetros foram ajustados aos dados reais: log da dose, de Ra-226 e de
+Ra-228 normais e correlacionados (dose x Ra-226 ≈ 0,81; Ra-226 x Ra-228 ≈
+0,65), incerteza de ~27% do resultado, lotes de 10 volumes com o número do
+lote só na primeira linha (células mescladas) e resultados abaixo da CMD
+gravados como texto ("< CMD", "< 0,03"), como nos certificados.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dosimetria import COL_DOSE, COL_RA226, COL_RA228
+
+# Limite de linhas de uma planilha .xlsx (incluindo o cabeçalho)
+MAX_LINHAS_XLSX = 1_048_576
+
+# Médias, desvios e correlações dos logs de (dose, Ra-226, Ra-228)
+MEDIAS_LOG = np.array([0.29, 0.42, -0.29])
+DESVIOS_LOG = np.array([0.53, 0.87, 0.80])
+CORRELACOES = np.array([
+    [1.00, 0.81, 0.65],
+    [0.81, 1.00, 0.65],
+    [0.65, 0.65, 1.00],
+])
+
+COLUNAS = [
+    "Lotes", "No\xa0Volume", "Unidade Geradora", "Local de Geração", "Ano de Geração", "FCDR",
+    "Tipo de Resíduo", "Nível de Resíduo no Volume (cm)", COL_DOSE, COL_RA226, "Incerteza", "CMD",
+    COL_RA228, "Incerteza.1", "CMD.1", "Massa Líquida (kg)", "Certificado de Análise", "Embalagem",
+    "Data da análise", "Dispensa futura", "Legenda", "Unnamed: 21",
+]
+
+_UNIDADES = np.array(["UN-ES", "UN-BC", "UN-RIO", "UO-ES"], dtype=object)
+_LOCAIS = np.array(["P-55", "P-54", "PGP-1", "P-31", "P-52", "P-62"], dtype=object)
+_TIPOS = np.array(["BORRA CAT.I", "BORRA CAT I", "BORRA CAT.II"], dtype=object)
+_EMBALAGENS = np.array(["Tambor", None, "Bombona"], dtype=object)
+
+
+def _censurar(valores, cmd, rng):
+    # Resultados abaixo da CMD viram texto, nas grafias encontradas nos certificados
+    coluna = valores.astype(object)
+    abaixo = np.flatnonzero(valores < cmd)
+    grafias = rng.integers(0, 3, len(abaixo))
+    for i, grafia in zip(abaixo.tolist(), grafias.tolist()):
+        if grafia == 0:
+            coluna[i] = "< CMD"
+        elif grafia == 1:
+            coluna[i] = "<CMD"
+        else:
+            coluna[i] = "< " + f"{cmd[i]:g}".replace(".", ",")
+    return coluna
+
+
+def gerar_dataframe(linhas, semente=0, completo=True, tamanho_lote=10):
+    """DataFrame sintético com ``linhas`` amostras.
+
+    Com ``completo=False`` gera apenas as colunas usadas nas análises (dose,
+    resultados, incertezas e CMD), o que permite chegar a 1e7 linhas com
+    pouca memória.
+    """
+    rng = np.random.default_rng(semente)
+    covariancia = CORRELACOES * np.outer(DESVIOS_LOG, DESVIOS_LOG)
+    logs = rng.multivariate_normal(MEDIAS_LOG, covariancia, size=linhas, method="cholesky")
+    dose, ra226, ra228 = np.round(np.exp(logs), 2).T
+
+    cmd226 = np.round(rng.lognormal(np.log(0.10), 0.3, linhas), 2)
+    cmd228 = np.round(rng.lognormal(np.log(0.14), 0.3, linhas), 2)
+    incerteza226 = np.round(ra226 * rng.normal(0.27, 0.03, linhas).clip(0.03), 2)
+    incerteza228 = np.round(ra228 * rng.normal(0.27, 0.03, linhas).clip(0.03), 2)
+
+    colunas = {
+        COL_DOSE: dose,
+        COL_RA226: _censurar(ra226, cmd226, rng),
+        "Incerteza": incerteza226,
+        "CMD": cmd226,
+        COL_RA228: _censurar(ra228, cmd228, rng),
+        "Incerteza.1": incerteza228,
+        "CMD.1": cmd228,
+    }
+    if not completo:
+        return pd.DataFrame(colunas)
+
+    lote = np.arange(linhas) // tamanho_lote
+    inicio_lote = np.r_[True, lote[1:] != lote[:-1]]
+    lotes = np.full(linhas, None, dtype=object)
+    lotes[inicio_lote] = (lote[inicio_lote] + 1).tolist()
+    anos = rng.integers(2018, 2026, lote.max() + 1 if linhas else 0)[lote]
+
+    colunas.update({
+        "Lotes": lotes,
+        "No\xa0Volume": rng.permutation(linhas) + 1000,
+        "Unidade Geradora": _UNIDADES[rng.integers(0, len(_UNIDADES), linhas)],
+        "Local de Geração": _LOCAIS[rng.integers(0, len(_LOCAIS), linhas)],
+        "Ano de Geração": pd.to_datetime(anos.astype(str), format="%Y"),
+        "FCDR": rng.integers(1, 1000, linhas).astype(np.float64),
+        "Tipo de Resíduo": _TIPOS[rng.integers(0, len(_TIPOS), linhas)],
+        "Nível de Resíduo no Volume (cm)": rng.integers(26, 86, linhas),
+        "Massa Líquida (kg)": np.round(rng.lognormal(np.log(150), 0.3, linhas), 0),
+        "Certificado de Análise": np.array([f"CA-{l + 1:05d}/{a % 100:02d}" for l, a in
+                                            zip(range(lote.max() + 1 if linhas else 0),
+                                                anos[inicio_lote])], dtype=object)[lote],
+        "Embalagem": _EMBALAGENS[rng.integers(0, len(_EMBALAGENS), linhas)],
+        "Data da análise": None,
+        "Dispensa futura": None,
+        "Legenda": None,
+        "Unnamed: 21": None,
+    })
+    return pd.DataFrame(colunas, columns=COLUNAS)
+
+
+def gravar_planilha(df, caminho, planilha="Macaé"):
+    """Grava ``df`` como .xlsx em modo ``write_only`` (memória constante)."""
+    import openpyxl
+
+    if len(df) + 1 > MAX_LINHAS_XLSX:
+        raise ValueError(f"Uma planilha .xlsx comporta no máximo {MAX_LINHAS_XLSX - 1} linhas de dados")
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(planilha)
+    ws.append(list(df.columns))
+    for linha in df.itertuples(index=False, name=None):
+        ws.append([None if isinstance(v, float) and np.isnan(v) else v for v in linha])
+    wb.save(caminho)
+    return caminho
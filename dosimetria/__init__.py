@@ -0,0 +1,10 @@
+"""Núcleo de dados e estatística compartilhado pelas páginas Streamlit."""
+
+# Planilha padrão com os resultados radiométricos
+ARQUIVO_PADRAO = "Resultados de análises radiométricas - GLP.xlsx"
+PLANILHA_PADRAO = "Macaé"
+
+# Colunas utilizadas nas análises
+COL_DOSE = "Taxa de Dose Máxima (µSv/h)"
+COL_RA226 = "Resultado_ra226"
+COL_RA228 = "Resultado_ra228"
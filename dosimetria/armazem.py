@@ -0,0 +1,126 @@
+"""Armazém de conjuntos de dados compartilhado pelas sessões do processo.
+
+Cada conjunto é carregado uma única vez e guardado como colunas NumPy
+somente leitura (``writeable=False``). As sessões recebem DataFrames
+montados sobre essas mesmas colunas, sem cópia; qualquer tentativa de
+escrita in-place falha em vez de vazar para as outras sessões, enquanto
+filtros e colunas novas criam objetos próprios da sessão, como sempre.
+
+As versões são explícitas: cada conjunto guarda a assinatura da origem (por
+exemplo o hash da planilha) e, quando ela muda, a nova versão é montada por
+inteiro e trocada por uma única atribuição sob trava. Sessões no meio de uma
+execução continuam com a versão que já tinham em mãos.
+
+Entre processos, o compartilhamento fica a cargo do cache colunar em disco
+(``dosimetria.cache``), cujos arquivos ``.npy`` são mapeados em memória.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dosimetria import ARQUIVO_PADRAO
+from dosimetria.cache import hash_arquivo
+
+
+def _valores(serie):
+    # Tipos de extensão (categorias, inteiros anuláveis) ficam no array do pandas
+    if isinstance(serie.dtype, pd.api.extensions.ExtensionDtype):
+        return serie.array
+    return serie.to_numpy()
+
+
+def _somente_leitura(valores):
+    if isinstance(valores, np.ndarray):
+        # Cópia própria (uma vez, na publicação): ninguém mais guarda uma referência gravável
+        valores = np.array(valores, copy=True)
+        valores.flags.writeable = False
+    return valores
+
+
+class QuadroCongelado:
+    """Colunas, índice e ``attrs`` de um DataFrame, sem possibilidade de escrita."""
+
+    def __init__(self, df):
+        self.colunas = {coluna: _somente_leitura(_valores(df[coluna])) for coluna in df.columns}
+        if isinstance(df.index, pd.RangeIndex):
+            self.indice = df.index
+        else:
+            self.indice = pd.Index(_somente_leitura(df.index.to_numpy()), name=df.index.name)
+        self.attrs = dict(df.attrs)
+
+    def dataframe(self, colunas=None):
+        """DataFrame montado sobre as colunas compartilhadas (sem cópia)."""
+        nomes = list(self.colunas) if colunas is None else list(colunas)
+        df = pd.DataFrame({nome: self.colunas[nome] for nome in nomes}, index=self.indice, copy=False)
+        df.attrs.update(self.attrs)
+        return df
+
+    @property
+    def nbytes(self):
+        return sum(v.nbytes for v in self.colunas.values())
+
+
+class VersaoDados:
+    def __init__(self, versao, assinatura, quadros):
+        self.versao = versao
+        self.assinatura = assinatura
+        self.quadros = {nome: QuadroCongelado(df) for nome, df in quadros.items()}
+
+    def dataframe(self, nome, colunas=None):
+        return self.quadros[nome].dataframe(colunas)
+
+
+class ArmazemDados:
+    def __init__(self):
+        self._atuais = {}
+        self._trava = threading.Lock()
+        self._travas_carga = {}
+
+    def atual(self, nome):
+        """Versão publicada de ``nome`` (ou ``None``)."""
+        return self._atuais.get(nome)
+
+    def obter(self, nome, assinatura, carregar):
+        """Versão de ``nome`` com a assinatura pedida, carregando-a se preciso.
+
+        ``carregar()`` devolve um dicionário ``{quadro: DataFrame}``. Várias
+        sessões pedindo o mesmo conjunto ao mesmo tempo disparam uma só carga.
+        """
+        atual = self._atuais.get(nome)
+        if atual is not None and atual.assinatura == assinatura:
+            return atual
+
+        with self._trava:
+            trava_carga = self._travas_carga.setdefault(nome, threading.Lock())
+        with trava_carga:
+            atual = self._atuais.get(nome)
+            if atual is not None and atual.assinatura == assinatura:
+                return atual
+            return self.publicar(nome, carregar(), assinatura)
+
+    def publicar(self, nome, quadros, assinatura=None):
+        """Congela ``quadros`` e os publica como a próxima versão de ``nome``."""
+        nova = VersaoDados(None, assinatura, quadros)
+        with self._trava:
+            anterior = self._atuais.get(nome)
+            nova.versao = 1 if anterior is None else anterior.versao + 1
+            self._atuais[nome] = nova
+        return nova
+
+    def descartar(self, nome=None):
+        with self._trava:
+            if nome is None:
+                self._atuais.clear()
+            else:
+                self._atuais.pop(nome, None)
+
+
+# Instância única por processo, compartilhada entre sessões
+armazem = ArmazemDados()
+
+
+def carregar_compartilhado(nome, carregar, arquivo=ARQUIVO_PADRAO):
+    """Versão atual de ``nome``, recarregada quando o conteúdo de ``arquivo`` muda."""
+    return armazem.obter(nome, hash_arquivo(arquivo), carregar)
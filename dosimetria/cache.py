@@ -0,0 +1,338 @@
+"""Cache colunar em disco das planilhas de resultados.
+
+Cada planilha é convertida uma única vez em um diretório com um arquivo
+``.npy`` por coluna, identificado pelo hash do conteúdo do arquivo Excel e
+pelo nome da planilha. As cargas seguintes apenas mapeiam esses arquivos em
+memória, sem passar pelo openpyxl, e sobrevivem a reinícios do servidor.
+
+Colunas mistas (números, textos e datas na mesma coluna, comuns nas planilhas)
+também são gravadas em arrays tipados, sem pickle: um código de tipo por linha
+e um array por tipo com os valores daquele tipo.
+
+Cada edição da planilha gera entradas novas; ao gravar uma entrada, o
+diretório é podado e ficam apenas as entradas das ``MAX_VERSOES`` chaves de
+conteúdo usadas mais recentemente.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Incrementar sempre que o formato gravado em disco mudar
+VERSAO_FORMATO = 2
+
+# Chaves de conteúdo (versões de planilha) mantidas em disco, ajustável por variável de ambiente
+MAX_VERSOES = int(os.environ.get("DOSIMETRIA_CACHE_VERSOES", "8"))
+
+# Hashes de arquivo memorizados no processo
+MAX_HASHES = 64
+
+# Diretórios temporários mais antigos que isto (s) são restos de gravações interrompidas
+IDADE_TEMPORARIOS = 3600
+
+_hashes = OrderedDict()
+_trava = threading.Lock()
+
+# Código de tipo de cada valor das colunas mistas
+_NULO, _REAL, _INTEIRO, _TEXTO, _DATA, _LOGICO, _HORA, _DURACAO = range(8)
+
+
+def diretorio_cache(caminho):
+    # Variável de ambiente tem prioridade; senão, ao lado da planilha
+    base = os.environ.get("DOSIMETRIA_CACHE_DIR")
+    if base:
+        return Path(base)
+    return Path(caminho).resolve().parent / ".cache_dosimetria"
+
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    # Hash SHA-256 do conteúdo, memorizado por (caminho, mtime, tamanho)
+    caminho = Path(caminho)
+    info = caminho.stat()
+    assinatura = (str(caminho.resolve()), info.st_mtime_ns, info.st_size)
+    with _trava:
+        if assinatura in _hashes:
+            _hashes.move_to_end(assinatura)
+            return _hashes[assinatura]
+
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    digest = h.hexdigest()
+
+    with _trava:
+        _hashes[assinatura] = digest
+        while len(_hashes) > MAX_HASHES:
+            _hashes.popitem(last=False)
+    return digest
+
+
+def _nome_entrada(chave, planilha, *extras):
+    partes = [f"v{VERSAO_FORMATO}", chave, planilha, *extras]
+    return hashlib.sha256("\0".join(partes).encode("utf-8")).hexdigest()[:32]
+
+
+def _salvar_coluna(destino, indice, serie):
+    valores = serie.to_numpy()
+
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        np.save(destino / f"{indice}.npy", valores.astype("datetime64[ns]"))
+        return "data"
+
+    if valores.dtype != object:
+        np.save(destino / f"{indice}.npy", valores)
+        return "numerico"
+
+    nulos = serie.isna().to_numpy()
+    if all(isinstance(v, str) for v in valores[~nulos]):
+        # Texto puro vira array Unicode de largura fixa, que pode ser mapeado
+        texto = np.where(nulos, "", valores).astype(str)
+        np.save(destino / f"{indice}.npy", texto)
+        np.save(destino / f"{indice}.nulos.npy", nulos)
+        return "texto"
+
+    _salvar_misto(destino, indice, valores)
+    return "misto"
+
+
+def _tipo_valor(v):
+    # Tipos produzidos pelo openpyxl/pandas; os demais são gravados como texto
+    if v is None or v is pd.NaT:
+        return _NULO
+    if isinstance(v, (bool, np.bool_)):
+        return _LOGICO
+    if isinstance(v, (int, np.integer)):
+        return _INTEIRO if -2 ** 63 <= v < 2 ** 63 else _TEXTO
+    if isinstance(v, (float, np.floating)):
+        return _REAL
+    if isinstance(v, datetime.date):
+        # Inclui datetime e Timestamp
+        return _DATA
+    if isinstance(v, datetime.time):
+        return _HORA
+    if isinstance(v, datetime.timedelta):
+        return _DURACAO
+    return _TEXTO
+
+
+def _salvar_misto(destino, indice, valores):
+    codigos = np.fromiter((_tipo_valor(v) for v in valores), dtype=np.int8, count=len(valores))
+
+    def selecionados(codigo):
+        return [v for v, c in zip(valores, codigos) if c == codigo]
+
+    datas = [pd.Timestamp(v).tz_localize(None) if getattr(v, "tzinfo", None) else v
+             for v in selecionados(_DATA)]
+    arrays = {
+        "codigos": codigos,
+        "reais": np.array(selecionados(_REAL), dtype=np.float64),
+        "inteiros": np.array(selecionados(_INTEIRO) + selecionados(_LOGICO), dtype=np.int64),
+        "duracoes": np.array([pd.Timedelta(v).value for v in selecionados(_DURACAO)], dtype=np.int64),
+        "textos": np.array([str(v) for v in selecionados(_TEXTO)] +
+                           [v.isoformat() for v in selecionados(_HORA)], dtype=str),
+        "datas": np.array(datas, dtype="datetime64[us]"),
+    }
+    for nome, array in arrays.items():
+        np.save(destino / f"{indice}.{nome}.npy", array)
+
+
+def _carregar_misto(origem, indice):
+    def ler(nome):
+        return np.load(origem / f"{indice}.{nome}.npy")
+
+    codigos = ler("codigos")
+    valores = np.full(len(codigos), None, dtype=object)
+    valores[codigos == _REAL] = ler("reais").tolist()
+
+    inteiros = ler("inteiros").tolist()
+    n_inteiros = np.count_nonzero(codigos == _INTEIRO)
+    valores[codigos == _INTEIRO] = inteiros[:n_inteiros]
+    valores[codigos == _LOGICO] = [bool(v) for v in inteiros[n_inteiros:]]
+
+    textos = ler("textos").tolist()
+    n_textos = np.count_nonzero(codigos == _TEXTO)
+    valores[codigos == _TEXTO] = textos[:n_textos]
+    valores[codigos == _HORA] = [datetime.time.fromisoformat(v) for v in textos[n_textos:]]
+
+    # datetime64[us] vira datetime.datetime, como o openpyxl entrega
+    valores[codigos == _DATA] = ler("datas").astype(object).tolist()
+    valores[codigos == _DURACAO] = [pd.Timedelta(v).to_pytimedelta() for v in ler("duracoes").tolist()]
+    return valores
+
+
+def _carregar_coluna(origem, indice, tipo):
+    if tipo == "misto":
+        return _carregar_misto(origem, indice)
+
+    valores = np.load(origem / f"{indice}.npy", mmap_mode="r")
+    if tipo == "texto":
+        nulos = np.load(origem / f"{indice}.nulos.npy")
+        texto = valores.astype(object)
+        texto[nulos] = np.nan
+        return texto
+    return valores
+
+
+def salvar_cache(df, destino, chave=None):
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+
+    # Grava em diretório temporário e renomeia para publicar de forma atômica
+    temporario = Path(tempfile.mkdtemp(dir=destino.parent, prefix=".tmp-"))
+    try:
+        colunas = []
+        for i, nome in enumerate(df.columns):
+            tipo = _salvar_coluna(temporario, i, df[nome])
+            colunas.append({"nome": str(nome), "tipo": tipo})
+
+        meta = {"versao": VERSAO_FORMATO, "chave": chave, "linhas": len(df), "colunas": colunas}
+        with open(temporario / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        try:
+            os.replace(temporario, destino)
+        except OSError:
+            # Outro processo publicou a mesma entrada primeiro
+            shutil.rmtree(temporario, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+
+    podar_cache(destino.parent)
+
+
+def carregar_cache(origem):
+    origem = Path(origem)
+    try:
+        with open(origem / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("versao") != VERSAO_FORMATO:
+        return None
+
+    try:
+        dados = {}
+        for i, coluna in enumerate(meta["colunas"]):
+            dados[coluna["nome"]] = _carregar_coluna(origem, i, coluna["tipo"])
+    except OSError:
+        # Entrada podada por outro processo durante a leitura
+        return None
+    try:
+        # Uso recente: a poda mantém as chaves com entradas usadas por último
+        os.utime(origem / "meta.json")
+    except OSError:
+        pass
+    return pd.DataFrame(dados, columns=[c["nome"] for c in meta["colunas"]])
+
+
+def podar_cache(diretorio, manter=None):
+    """Remove as entradas fora das ``manter`` chaves de conteúdo usadas mais recentemente.
+
+    Entradas de outras versões do formato e temporários abandonados também
+    saem. Arquivos soltos no diretório (como o log de desempenho) ficam.
+    """
+    manter = MAX_VERSOES if manter is None else manter
+    agora = time.time()
+    uso = {}
+    entradas = {}
+    remover = []
+    try:
+        itens = list(Path(diretorio).iterdir())
+    except OSError:
+        return
+    for item in itens:
+        if not item.is_dir():
+            continue
+        if item.name.startswith(".tmp-"):
+            try:
+                if agora - item.stat().st_mtime > IDADE_TEMPORARIOS:
+                    remover.append(item)
+            except OSError:
+                pass
+            continue
+        try:
+            with open(item / "meta.json", encoding="utf-8") as f:
+                meta = json.load(f)
+            usado = (item / "meta.json").stat().st_mtime
+        except (OSError, ValueError):
+            continue
+        if meta.get("versao") != VERSAO_FORMATO:
+            remover.append(item)
+            continue
+        chave = meta.get("chave") or item.name
+        uso[chave] = max(uso.get(chave, 0.0), usado)
+        entradas.setdefault(chave, []).append(item)
+
+    recentes = sorted(uso, key=uso.get, reverse=True)
+    for chave in recentes[manter:]:
+        remover.extend(entradas[chave])
+    for item in remover:
+        shutil.rmtree(item, ignore_errors=True)
+
+
+def _ler_excel(caminho, planilha):
+    df = pd.read_excel(caminho, sheet_name=planilha)
+    df.columns = [str(col).strip() for col in df.columns]
+    return df
+
+
+def carregar_planilha(caminho, planilha, leitor=None, chave=None, somente_cache=False):
+    """Retorna a planilha como DataFrame, usando o cache em disco quando possível.
+
+    ``leitor(caminho, planilha)`` é chamado apenas na ausência de cache; por
+    padrão usa ``pd.read_excel`` com os nomes das colunas sem espaços. Com
+    ``somente_cache=True`` devolve ``None`` em vez de ler a planilha.
+    """
+    if chave is None:
+        chave = hash_arquivo(caminho)
+    destino = diretorio_cache(caminho) / _nome_entrada(chave, planilha)
+
+    df = carregar_cache(destino)
+    if df is not None or somente_cache:
+        return df
+
+    df = (leitor or _ler_excel)(caminho, planilha)
+    salvar_cache(df, destino, chave)
+    return df
+
+
+def carregar_colunas(caminho, planilha, colunas, numericas=(), chave=None, somente_cache=False):
+    """Como ``carregar_planilha``, mas lendo apenas as colunas pedidas.
+
+    Na ausência de cache usa o leitor em fluxo de ``dosimetria.leitura``; a
+    projeção faz parte da chave, então projeções diferentes não se misturam.
+    """
+    from dosimetria.leitura import ler_colunas
+
+    colunas = list(colunas)
+    numericas = [c for c in colunas if c in set(numericas)]
+    if chave is None:
+        chave = hash_arquivo(caminho)
+    destino = diretorio_cache(caminho) / _nome_entrada(
+        chave, planilha, "|".join(colunas), "|".join(numericas)
+    )
+
+    df = carregar_cache(destino)
+    if df is not None or somente_cache:
+        return df
+
+    df = ler_colunas(caminho, planilha, colunas, numericas=numericas)
+    salvar_cache(df, destino, chave)
+    return df
+
+
+def limpar_cache(caminho):
+    shutil.rmtree(diretorio_cache(caminho), ignore_errors=True)
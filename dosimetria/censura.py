@@ -0,0 +1,248 @@
+"""Resultados censurados ("< CMD", "< 0,03") e estatísticas que os consideram.
+
+Os certificados registram resultados abaixo da concentração mínima
+detectável como texto, com vírgula decimal. ``separar_censurados`` divide
+uma coluna dessas em valor, indicador de censura e limite de detecção: a
+coluna é fatorada uma vez e só os textos distintos (poucos) passam pela
+expressão regular. "< CMD" usa o valor da coluna CMD da própria linha.
+
+Para as estatísticas, os resultados censurados entram com o limite de
+detecção como cota superior, por dois estimadores usuais para dados
+ambientais censurados à esquerda:
+
+- Kaplan-Meier (``kaplan_meier``): distribuição empírica com os censurados
+  tratados como "abaixo do limite"; a massa abaixo do menor valor detectado
+  fica nesse valor, o que torna média e percentis cotas superiores;
+- regressão sobre estatísticas de ordem (``imputar_ros``): posições de
+  plotagem de Helsel-Cohn para múltiplos limites, ajuste lognormal aos
+  detectados e imputação dos censurados.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from dosimetria import COL_DOSE, COL_RA226, COL_RA228
+
+# Resultado, coluna com a CMD e prefixo das colunas derivadas de cada radionuclídeo
+PARES_CENSURA = {
+    COL_RA226: ("CMD", "ra226"),
+    COL_RA228: ("CMD.1", "ra228"),
+}
+
+_PADRAO = re.compile(r"^\s*(<)?\s*(CMD|[0-9]+(?:[.,][0-9]*)?)?\s*$", re.IGNORECASE)
+
+
+def _interpretar_texto(texto):
+    # (valor, censurado, limite vem da coluna CMD)
+    if not isinstance(texto, str):
+        return np.nan, False, False
+    encontrado = _PADRAO.match(texto)
+    if encontrado is None:
+        return np.nan, False, False
+    menor, numero = encontrado.groups()
+    if numero is None:
+        return np.nan, bool(menor), bool(menor)
+    if numero.upper() == "CMD":
+        # "CMD" sem o sinal também indica resultado abaixo da CMD
+        return np.nan, True, True
+    return float(numero.replace(",", ".")), bool(menor), False
+
+
+def separar_censurados(valores, cmd=None):
+    """Divide uma coluna de resultados em ``(valor, censurado, limite)``.
+
+    ``valor`` é o resultado medido ou, se censurado, o limite de detecção;
+    ``limite`` é o limite de detecção da linha (o número após "<" ou a CMD).
+    Textos que não são resultados viram NaN, sem censura.
+    """
+    serie = pd.Series(valores) if not isinstance(valores, pd.Series) else valores
+    numeros = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=np.float64)
+    n = len(numeros)
+
+    codigos, unicos = pd.factorize(serie.where(np.isnan(numeros)))
+    interpretados = [_interpretar_texto(texto) for texto in unicos]
+    tabela_valor = np.array([i[0] for i in interpretados] + [np.nan], dtype=np.float64)
+    tabela_censura = np.array([i[1] for i in interpretados] + [False], dtype=bool)
+    tabela_cmd = np.array([i[2] for i in interpretados] + [False], dtype=bool)
+    # código -1 (não texto) aponta para a última posição das tabelas
+    valor_texto = tabela_valor[codigos]
+    censurado = tabela_censura[codigos]
+    usa_cmd = tabela_cmd[codigos]
+
+    valor = np.where(np.isnan(numeros), valor_texto, numeros)
+    if cmd is not None:
+        # A própria CMD pode vir censurada ("< 0,31"): vale o número
+        limite_cmd = separar_censurados(cmd)[0]
+    else:
+        limite_cmd = np.full(n, np.nan)
+    limite = np.where(censurado & ~usa_cmd, valor, limite_cmd)
+    valor = np.where(usa_cmd, limite_cmd, valor)
+    return valor, censurado, limite
+
+
+def aplicar_censura(df, pares=PARES_CENSURA):
+    """Converte as colunas de resultado, preservando as amostras censuradas.
+
+    O resultado passa a ser numérico (limite de detecção nos censurados) e
+    ganha as colunas ``Censurado_<nuclídeo>`` e ``Limite_<nuclídeo>``.
+    """
+    convertidas = {}
+    for coluna, (coluna_cmd, sufixo) in pares.items():
+        if coluna not in df.columns:
+            continue
+        valor, censurado, limite = separar_censurados(df[coluna], df[coluna_cmd] if coluna_cmd in df.columns else None)
+        convertidas[coluna] = valor
+        convertidas[f"Censurado_{sufixo}"] = censurado
+        convertidas[f"Limite_{sufixo}"] = limite
+    resultado = df.assign(**convertidas)
+    resultado.attrs.update(df.attrs)
+    return resultado
+
+
+def _validos(valores, censurados):
+    x = np.asarray(valores, dtype=np.float64)
+    c = np.zeros(len(x), dtype=bool) if censurados is None else np.asarray(censurados, dtype=bool)
+    ok = ~np.isnan(x)
+    return x[ok], c[ok]
+
+
+class DistribuicaoKM:
+    """Distribuição de Kaplan-Meier para dados censurados à esquerda."""
+
+    def __init__(self, valores, censurados=None):
+        x, c = _validos(valores, censurados)
+        self.count = len(x)
+        self.censurados = int(c.sum())
+
+        suporte, eventos = np.unique(x[~c], return_counts=True)
+        self.suporte = suporte
+        if len(suporte) == 0:
+            self.massas = np.empty(0)
+            self._acumulada = np.empty(0)
+            return
+
+        # Em risco em t: observações <= t (censurados com limite igual a t incluídos)
+        em_risco = np.searchsorted(np.sort(x), suporte, side="right")
+        fator = 1.0 - eventos / em_risco
+        # F(t_j) = produto dos fatores dos valores detectados acima de t_j
+        acumulada = np.r_[np.cumprod(fator[::-1])[::-1][1:], 1.0]
+        massas = acumulada * eventos / em_risco
+        # Massa abaixo do menor detectado fica nele (cota superior)
+        massas[0] += 1.0 - massas.sum()
+        self.massas = massas
+        self._acumulada = np.cumsum(massas)
+
+    @property
+    def media(self):
+        return float(np.dot(self.suporte, self.massas)) if len(self.suporte) else np.nan
+
+    @property
+    def desvio(self):
+        if len(self.suporte) == 0:
+            return np.nan
+        return float(np.sqrt(np.dot(self.massas, (self.suporte - self.media) ** 2)))
+
+    def quantil(self, p):
+        """Menor valor com probabilidade acumulada >= ``p`` (0 a 1)."""
+        if len(self.suporte) == 0:
+            return np.nan
+        posicao = np.searchsorted(self._acumulada, np.asarray(p) - 1e-12, side="left")
+        return self.suporte[np.minimum(posicao, len(self.suporte) - 1)]
+
+    def percentil(self, q):
+        return self.quantil(np.asarray(q) / 100)
+
+
+def kaplan_meier(valores, censurados=None):
+    return DistribuicaoKM(valores, censurados)
+
+
+def _postos_por_grupo(grupos, valores):
+    # Posto (1, 2, ...) de cada valor dentro do seu grupo e tamanho do grupo
+    ordem = np.lexsort((valores, grupos))
+    grupos_ordenados = grupos[ordem]
+    inicios = np.r_[0, np.flatnonzero(np.diff(grupos_ordenados)) + 1]
+    tamanhos = np.diff(np.r_[inicios, len(ordem)])
+    postos = np.empty(len(ordem), dtype=np.int64)
+    postos[ordem] = np.arange(len(ordem)) - np.repeat(inicios, tamanhos) + 1
+    total = np.empty(len(ordem), dtype=np.int64)
+    total[ordem] = np.repeat(tamanhos, tamanhos)
+    return postos, total
+
+
+def imputar_ros(valores, censurados=None, minimo_detectados=3):
+    """Valores com os censurados imputados por ROS lognormal (Helsel-Cohn).
+
+    Sem censurados, ou com menos de ``minimo_detectados`` valores detectados
+    positivos, devolve os valores como estão (censurados no limite).
+    """
+    x, c = _validos(valores, censurados)
+    detectados = ~c
+    if c.sum() == 0 or np.count_nonzero(x[detectados] > 0) < minimo_detectados:
+        return x.copy()
+
+    limites = np.unique(x[c])
+    if x[detectados].min() < limites[0]:
+        limites = np.r_[0.0, limites]
+    superiores = np.r_[limites[1:], np.inf]
+
+    ordenados_det = np.sort(x[detectados])
+    # A: detectados em [L_j, L_j+1); B: observações abaixo de L_j (censurados com limite <= L_j)
+    acima = np.searchsorted(ordenados_det, superiores, side="left") - np.searchsorted(ordenados_det, limites, side="left")
+    abaixo = (np.searchsorted(ordenados_det, limites, side="left") +
+              np.searchsorted(np.sort(x[c]), limites, side="right"))
+
+    excedencia = np.zeros(len(limites) + 1)
+    for j in range(len(limites) - 1, -1, -1):
+        parcela = acima[j] / (acima[j] + abaixo[j]) if acima[j] + abaixo[j] > 0 else 0.0
+        excedencia[j] = excedencia[j + 1] + parcela * (1 - excedencia[j + 1])
+
+    posicoes = np.empty(len(x))
+    nivel_det = np.searchsorted(limites, x[detectados], side="right") - 1
+    postos, total = _postos_por_grupo(nivel_det, x[detectados])
+    posicoes[detectados] = ((1 - excedencia[nivel_det]) +
+                            (excedencia[nivel_det] - excedencia[nivel_det + 1]) * postos / (total + 1))
+    nivel_cen = np.searchsorted(limites, x[c], side="left")
+    postos, total = _postos_por_grupo(nivel_cen, x[c])
+    posicoes[c] = (1 - excedencia[nivel_cen]) * postos / (total + 1)
+
+    from scipy.stats import norm
+
+    positivos = detectados & (x > 0)
+    inclinacao, intercepto = np.polyfit(norm.ppf(posicoes[positivos]), np.log(x[positivos]), 1)
+    imputados = x.copy()
+    imputados[c] = np.exp(intercepto + inclinacao * norm.ppf(posicoes[c]))
+    return imputados
+
+
+def resumo_censurado(valores, censurados=None, percentis=(50, 95)):
+    """Média, desvio e percentis por Kaplan-Meier e por ROS."""
+    km = kaplan_meier(valores, censurados)
+    ros = imputar_ros(valores, censurados)
+    resumo = {
+        "n": km.count,
+        "censurados": km.censurados,
+        "media_km": km.media,
+        "desvio_km": km.desvio,
+        "media_ros": float(ros.mean()) if len(ros) else np.nan,
+        "desvio_ros": float(ros.std(ddof=1)) if len(ros) > 1 else np.nan,
+    }
+    for p in percentis:
+        resumo[f"p{p}_km"] = float(km.percentil(p)) if km.count else np.nan
+        resumo[f"p{p}_ros"] = float(np.percentile(ros, p)) if len(ros) else np.nan
+    return resumo
+
+
+def resumos_censurados(df, percentis=(50, 95)):
+    """Tabela com o resumo censurado de Ra-226, Ra-228 e da taxa de dose."""
+    linhas = {}
+    for coluna, (_, sufixo) in PARES_CENSURA.items():
+        if coluna in df.columns:
+            censurados = df.get(f"Censurado_{sufixo}")
+            linhas[coluna] = resumo_censurado(df[coluna], None if censurados is None else censurados.to_numpy(),
+                                              percentis)
+    if COL_DOSE in df.columns:
+        linhas[COL_DOSE] = resumo_censurado(df[COL_DOSE], None, percentis)
+    return pd.DataFrame.from_dict(linhas, orient="index")
@@ -0,0 +1,103 @@
+"""Envoltória superior da taxa de dose por regressão quantílica.
+
+Ajusta os quantis altos (P95, P99) da dose como função linear de Ra-226,
+de Ra-228 e das duas concentrações juntas, nos mesmos modelos de
+``dosimetria.regressao``, e inverte a envoltória para obter a maior
+concentração compatível com um limite de dose.
+
+A regressão quantílica é resolvida pelo problema dual de Koenker e Bassett
+(``max y'a`` sujeito a ``X'a = (1 - τ) X'1`` e ``0 <= a <= 1``), que tem uma
+variável por amostra e só uma restrição por coeficiente. O HiGHS (pontos
+interiores) resolve dezenas de milhares de linhas em menos de um segundo; os
+coeficientes são os multiplicadores das restrições de igualdade.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dosimetria import COL_DOSE, COL_RA226, COL_RA228
+from dosimetria.regressao import MODELOS
+
+QUANTIS_PADRAO = (0.95, 0.99)
+
+
+def regressao_quantilica(X, y, quantil):
+    """Coeficientes da regressão do quantil ``quantil`` de ``y`` sobre as colunas de ``X``."""
+    from scipy.optimize import linprog
+
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) <= X.shape[1]:
+        return np.full(X.shape[1], np.nan)
+
+    resultado = linprog(-y, A_eq=X.T, b_eq=(1 - quantil) * X.sum(axis=0), bounds=(0, 1), method="highs-ipm")
+    if resultado.status != 0:
+        return np.full(X.shape[1], np.nan)
+    return -resultado.eqlin.marginals
+
+
+def ajustar_envoltoria(ra226, ra228, dose, quantis=QUANTIS_PADRAO):
+    """Tabela com uma linha por (quantil, modelo) e os coeficientes da envoltória."""
+    ra226 = np.asarray(ra226, dtype=np.float64)
+    ra228 = np.asarray(ra228, dtype=np.float64)
+    dose = np.asarray(dose, dtype=np.float64)
+    validos = ~(np.isnan(ra226) | np.isnan(ra228) | np.isnan(dose))
+    ra226, ra228, dose = ra226[validos], ra228[validos], dose[validos]
+
+    uns = np.ones_like(dose)
+    desenhos = {
+        "Ra-226": np.column_stack([uns, ra226]),
+        "Ra-228": np.column_stack([uns, ra228]),
+        "Ra-226 + Ra-228": np.column_stack([uns, ra226, ra228]),
+    }
+
+    linhas = []
+    for quantil in quantis:
+        for modelo in MODELOS:
+            coeficientes = regressao_quantilica(desenhos[modelo], dose, quantil)
+            linha = {"quantil": quantil, "modelo": modelo, "n": len(dose),
+                     "intercepto": coeficientes[0], "coef_ra226": np.nan, "coef_ra228": np.nan}
+            if modelo == "Ra-226":
+                linha["coef_ra226"] = coeficientes[1]
+            elif modelo == "Ra-228":
+                linha["coef_ra228"] = coeficientes[1]
+            else:
+                linha["coef_ra226"], linha["coef_ra228"] = coeficientes[1:]
+            linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+
+def envoltoria_dataframe(df, quantis=QUANTIS_PADRAO):
+    return ajustar_envoltoria(df[COL_RA226], df[COL_RA228], df[COL_DOSE], quantis)
+
+
+def dose_envoltoria(linha, concentracao):
+    """Dose da envoltória no pior caso com ``max(Ra-226, Ra-228) = concentracao``.
+
+    Cada radionuclídeo com coeficiente positivo fica no teto; os demais, em zero.
+    """
+    inclinacao = np.nansum([max(linha["coef_ra226"], 0.0), max(linha["coef_ra228"], 0.0)])
+    return linha["intercepto"] + inclinacao * np.asarray(concentracao, dtype=np.float64)
+
+
+def concentracao_maxima(linha, limite):
+    """Maior concentração cuja dose na envoltória (pior caso) não passa de ``limite``.
+
+    Retorna ``inf`` se a envoltória não cresce com a concentração e 0 se o
+    intercepto já excede o limite.
+    """
+    if np.isnan(linha["intercepto"]):
+        return np.nan
+    if linha["intercepto"] > limite:
+        return 0.0
+    inclinacao = np.nansum([max(linha["coef_ra226"], 0.0), max(linha["coef_ra228"], 0.0)])
+    if inclinacao <= 0:
+        return np.inf
+    return (limite - linha["intercepto"]) / inclinacao
+
+
+def tetos_concentracao(envoltoria, limite):
+    """Acrescenta à tabela da envoltória a concentração máxima para ``limite``."""
+    return envoltoria.assign(
+        concentracao_maxima=[concentracao_maxima(linha, limite) for _, linha in envoltoria.iterrows()]
+    )
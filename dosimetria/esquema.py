@@ -0,0 +1,152 @@
+"""Tipos compactos para as colunas das planilhas de resultados.
+
+O esquema define, coluna a coluna, a representação em memória depois da
+carga:
+
+- medições auxiliares (incertezas, CMD, massa, FCDR) em ``float32``, que
+  guarda com folga os 2 a 3 algarismos significativos dos certificados;
+- rótulos repetidos (site, unidade, local, tipo de resíduo, embalagem,
+  certificado) como ``category``;
+- ano de geração como inteiro de 16 bits (anulável);
+- datas como ``datetime64``, inclusive as gravadas como número serial do Excel.
+
+A dose e os resultados de Ra-226 e Ra-228 continuam em ``float64``: são
+comparados com os limites dos filtros (8 Bq/g, 5 µSv/h e os sliders), e em
+``float32`` valores como 4,9 deixariam de ser ``<= 4.9``. Colunas sem
+cabeçalho (``Unnamed: i``, cuja posição muda com a planilha) são reconhecidas
+pelo conteúdo: viram ``category`` se tiverem só rótulos de texto repetidos.
+As demais colunas fora do esquema não são alteradas.
+"""
+
+import pandas as pd
+
+# Origem das datas seriais do Excel (sistema 1900)
+_ORIGEM_EXCEL = pd.Timestamp("1899-12-30")
+
+ESQUEMA = {
+    "Incerteza": "float32",
+    "Incerteza.1": "float32",
+    "CMD": "float32",
+    "CMD.1": "float32",
+    "Massa Líquida (kg)": "float32",
+    "FCDR": "float32",
+    "Nível de Resíduo no Volume (cm)": "inteiro",
+    "Unidade Geradora": "category",
+    "Local de Geração": "category",
+    "Tipo de Resíduo": "category",
+    "Embalagem": "category",
+    "Certificado de Análise": "category",
+    "Legenda": "category",
+    "site": "category",
+    "Ano de Geração": "ano",
+    "Data da análise": "data",
+    "Dispensa futura": "data",
+}
+
+
+def _para_data(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        return serie.astype("datetime64[ns]")
+    numeros = pd.to_numeric(serie, errors="coerce")
+    serial = _ORIGEM_EXCEL + pd.to_timedelta(numeros, unit="D")
+    demais = pd.to_datetime(serie.where(numeros.isna()), errors="coerce", dayfirst=True, format="mixed")
+    return serial.fillna(demais).astype("datetime64[ns]")
+
+
+def _para_ano(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        anos = serie.dt.year
+    else:
+        anos = pd.to_numeric(serie, errors="coerce")
+    return anos.round().astype("Int16")
+
+
+def _para_categoria(serie):
+    # Rótulos mistos (p.ex. o número 0 entre nomes de unidades) viram texto
+    return serie.map(lambda v: str(v) if pd.notna(v) and not isinstance(v, str) else v).astype("category")
+
+
+def _para_inteiro(serie):
+    numeros = pd.to_numeric(serie, errors="coerce")
+    if numeros.isna().any():
+        return numeros.astype("float32")
+    return pd.to_numeric(numeros, downcast="integer")
+
+
+CONVERSORES = {
+    "float32": lambda serie: pd.to_numeric(serie, errors="coerce").astype("float32"),
+    "inteiro": _para_inteiro,
+    "category": _para_categoria,
+    "ano": _para_ano,
+    "data": _para_data,
+}
+
+
+def _rotulos_sem_nome(df, esquema):
+    # Colunas sem cabeçalho fora do esquema com só textos, poucos e repetidos (p.ex. a legenda das cores)
+    for coluna in df.columns:
+        if not str(coluna).startswith("Unnamed: ") or coluna in esquema or df[coluna].dtype != object:
+            continue
+        valores = df[coluna].dropna()
+        if valores.map(lambda v: isinstance(v, str)).all() and 2 * valores.nunique() <= len(df):
+            yield coluna
+
+
+def compactar(df, esquema=ESQUEMA):
+    """Cópia de ``df`` com as colunas do esquema convertidas (``attrs`` preservados)."""
+    esquema = {**esquema, **{coluna: "category" for coluna in _rotulos_sem_nome(df, esquema)}}
+    convertidas = {coluna: CONVERSORES[tipo](df[coluna]) for coluna, tipo in esquema.items() if coluna in df.columns}
+    compacto = df.assign(**convertidas)
+    compacto.attrs.update(df.attrs)
+    return compacto
+
+
+def _memoria(serie):
+    if serie.dtype == object:
+        # Mesma conta de memory_usage(deep=True), que falha em arrays somente leitura (dosimetria.armazem)
+        valores = serie.to_numpy()
+        return valores.nbytes + sum(v.__sizeof__() for v in valores)
+    return serie.memory_usage(index=False, deep=True)
+
+
+def memoria_por_coluna(df):
+    """Tipo e memória (contando o conteúdo dos objetos Python) de cada coluna."""
+    return pd.DataFrame({
+        "tipo": df.dtypes.astype(str),
+        "KB": [_memoria(df[coluna]) / 1024 for coluna in df.columns],
+    }, index=df.columns)
+
+
+def comparar_memoria(original, compacto):
+    """Memória por coluna antes e depois da compactação, com o total na última linha."""
+    antes = memoria_por_coluna(original)
+    depois = memoria_por_coluna(compacto).reindex(antes.index)
+    tabela = pd.DataFrame({
+        "tipo original": antes["tipo"],
+        "KB original": antes["KB"],
+        "tipo compacto": depois["tipo"],
+        "KB compacto": depois["KB"],
+    })
+    tabela.loc["(total)"] = ["", antes["KB"].sum(), "", depois["KB"].sum()]
+    tabela["redução (%)"] = 100 * (1 - tabela["KB compacto"].astype(float) / tabela["KB original"].astype(float))
+    return tabela
+
+
+def main(argv=None):
+    import argparse
+
+    from dosimetria import ARQUIVO_PADRAO
+    from dosimetria.sites import carregar_sites
+
+    parser = argparse.ArgumentParser(description="Memória por coluna das planilhas, antes e depois da compactação")
+    parser.add_argument("--origem", default=ARQUIVO_PADRAO, help="Planilha .xlsx de resultados")
+    args = parser.parse_args(argv)
+
+    original = carregar_sites(args.origem)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(comparar_memoria(original, compactar(original)).round(1))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,274 @@
+"""Estatísticas das concentrações de radionuclídeos e da taxa de dose."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from dosimetria import COL_DOSE, COL_RA226, COL_RA228
+
+# Bordas das faixas de concentração (Bq/g): ≤ 1, 1-3, 3-5, 5-8 e > 8
+FAIXAS_CONCENTRACAO = (1.0, 3.0, 5.0, 8.0)
+
+# Rótulos usados pelas páginas para as faixas até 8 Bq/g
+ROTULOS_FAIXAS = ("ate_1bq", "1_3bq", "3_5bq", "5_8bq")
+
+RADIONUCLIDEOS = {"Ra226": COL_RA226, "Ra228": COL_RA228}
+
+
+def valores_validos(serie):
+    # Array float64 contíguo sem NaN, sem cópias intermediárias de DataFrame
+    valores = np.ascontiguousarray(serie.to_numpy(dtype=np.float64, na_value=np.nan))
+    return valores[~np.isnan(valores)]
+
+
+def classificar_valores(valores, bordas=FAIXAS_CONCENTRACAO):
+    """Contagem, média e máximo de cada faixa em uma única passada.
+
+    A faixa ``i`` contém ``bordas[i-1] < v <= bordas[i]``; a primeira começa
+    em -inf e a última (índice ``len(bordas)``) contém os valores acima da
+    maior borda.
+    """
+    bordas = np.asarray(bordas, dtype=np.float64)
+    n_faixas = len(bordas) + 1
+
+    faixa = np.searchsorted(bordas, valores, side="left")
+    contagens = np.bincount(faixa, minlength=n_faixas)
+    somas = np.bincount(faixa, weights=valores, minlength=n_faixas)
+    maximos = np.full(n_faixas, -np.inf)
+    np.maximum.at(maximos, faixa, valores)
+
+    vazias = contagens == 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medias = np.where(vazias, np.nan, somas / contagens)
+    maximos[vazias] = np.nan
+
+    total = int(contagens.sum())
+    return {
+        "bordas": bordas,
+        "total": total,
+        "contagens": contagens,
+        "medias": medias,
+        "maximos": maximos,
+        "media": somas.sum() / total if total else np.nan,
+        "maxima": np.nanmax(maximos) if total else np.nan,
+    }
+
+
+def classificar_faixas(df, colunas, bordas=FAIXAS_CONCENTRACAO):
+    """Aplica ``classificar_valores`` a cada coluna de ``colunas``.
+
+    ``colunas`` pode ser uma lista de nomes ou um dicionário ``{rótulo: coluna}``.
+    """
+    if not isinstance(colunas, dict):
+        colunas = {coluna: coluna for coluna in colunas}
+    return {
+        rotulo: classificar_valores(valores_validos(df[coluna]), bordas)
+        for rotulo, coluna in colunas.items()
+    }
+
+
+# Função para calcular estatísticas por faixa de concentração de cada radionuclídeo
+def calcular_estatisticas_radionuclideos(df):
+    stats_dict = {}
+
+    for nome, faixas in classificar_faixas(df, RADIONUCLIDEOS).items():
+        stats_dict[nome] = {
+            "total": faixas["total"],
+            **dict(zip(ROTULOS_FAIXAS, faixas["contagens"].tolist())),
+            "media": faixas["media"],
+            "maxima": faixas["maxima"],
+        }
+
+    return stats_dict
+
+
+class DoseSummary:
+    """Resumo da taxa de dose a partir de um único array ordenado.
+
+    A ordenação e os momentos são calculados uma vez na construção; depois,
+    quantis e contagens por limite custam O(1) e O(log n), respectivamente.
+    """
+
+    def __init__(self, valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        self.ordenados = np.sort(valores[~np.isnan(valores)])
+        self.ordenados.flags.writeable = False
+        self.count = len(self.ordenados)
+
+        n = self.count
+        if n == 0:
+            self.mean = self.std = self.skewness = self.kurtosis = np.nan
+            self._moda = np.nan
+            return
+
+        self.mean = self.ordenados.sum() / n
+        desvios = self.ordenados - self.mean
+        quadrados = desvios * desvios
+        m2 = quadrados.sum()
+        m3 = (quadrados * desvios).sum()
+        m4 = (quadrados * quadrados).sum()
+
+        self.std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+
+        # Mesmas correções de viés usadas por pandas.Series.skew/kurtosis
+        if n < 3:
+            self.skewness = np.nan
+        elif m2 == 0:
+            self.skewness = 0.0
+        else:
+            self.skewness = (n * (n - 1) ** 0.5 / (n - 2)) * (m3 / m2 ** 1.5)
+
+        if n < 4:
+            self.kurtosis = np.nan
+        elif m2 == 0:
+            self.kurtosis = 0.0
+        else:
+            ajuste = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+            self.kurtosis = (n * (n + 1) * (n - 1) * m4) / ((n - 2) * (n - 3) * m2 ** 2) - ajuste
+
+        # Moda: maior sequência de valores iguais; em empate, o menor valor
+        inicios = np.flatnonzero(np.r_[True, self.ordenados[1:] != self.ordenados[:-1]])
+        tamanhos = np.diff(np.r_[inicios, n])
+        self._moda = self.ordenados[inicios[np.argmax(tamanhos)]]
+
+    @property
+    def min(self):
+        return self.ordenados[0] if self.count else np.nan
+
+    @property
+    def max(self):
+        return self.ordenados[-1] if self.count else np.nan
+
+    @property
+    def range(self):
+        return self.max - self.min
+
+    @property
+    def cv(self):
+        return (self.std / self.mean) * 100 if self.mean != 0 else 0
+
+    @property
+    def moda(self):
+        return self._moda
+
+    @property
+    def iqr(self):
+        return self.quantil(0.75) - self.quantil(0.25)
+
+    def quantil(self, q):
+        # Interpolação linear entre estatísticas de ordem (padrão de np.percentile)
+        if self.count == 0:
+            return np.nan
+        posicao = (self.count - 1) * q
+        abaixo = int(np.floor(posicao))
+        acima = min(abaixo + 1, self.count - 1)
+        fracao = posicao - abaixo
+        a, b = self.ordenados[abaixo], self.ordenados[acima]
+        if fracao >= 0.5:
+            return b - (b - a) * (1 - fracao)
+        return a + (b - a) * fracao
+
+    def percentil(self, p):
+        return self.quantil(p / 100)
+
+    def contar_ate(self, limite):
+        # Amostras com dose <= limite
+        return int(np.searchsorted(self.ordenados, limite, side="right"))
+
+    def contar_acima(self, limite):
+        # Amostras com dose > limite
+        return self.count - self.contar_ate(limite)
+
+    def contar_entre(self, inferior, superior):
+        # Amostras com inferior < dose <= superior
+        return self.contar_ate(superior) - self.contar_ate(inferior)
+
+    def como_dicionario(self, percentis=(90, 95, 99)):
+        estatisticas = {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.min,
+            "25%": self.quantil(0.25),
+            "50%": self.quantil(0.50),  # mediana
+            "75%": self.quantil(0.75),
+            "max": self.max,
+            "range": self.range,
+            "cv": self.cv,  # coeficiente de variação
+            "skewness": self.skewness,
+            "kurtosis": self.kurtosis,
+            "mode": self.moda,
+        }
+        for p in percentis:
+            estatisticas[f"P{p}"] = self.percentil(p)
+        return estatisticas
+
+
+_resumos = OrderedDict()
+_trava_resumos = threading.Lock()
+MAX_RESUMOS = 32
+
+
+def impressao_digital(valores):
+    # Identifica o conteúdo de um array; usado como chave de memorização
+    valores = np.ascontiguousarray(valores, dtype=np.float64)
+    return hashlib.blake2b(valores.view(np.uint8), digest_size=16).hexdigest()
+
+
+def obter_resumo_dose(valores, chave=None):
+    """``DoseSummary`` memorizado pela impressão digital dos dados.
+
+    ``chave`` permite usar uma identificação já conhecida (por exemplo, versão
+    do conjunto de dados mais estado dos filtros) e evitar o hash do array.
+    """
+    if hasattr(valores, "to_numpy"):
+        valores = valores.to_numpy(dtype=np.float64, na_value=np.nan)
+    if chave is None:
+        chave = impressao_digital(valores)
+
+    with _trava_resumos:
+        if chave in _resumos:
+            _resumos.move_to_end(chave)
+            return _resumos[chave]
+
+    resumo = DoseSummary(valores)
+    with _trava_resumos:
+        _resumos[chave] = resumo
+        while len(_resumos) > MAX_RESUMOS:
+            _resumos.popitem(last=False)
+    return resumo
+
+
+# Função para calcular estatística descritiva da Taxa de Dose Máxima
+def calcular_estatisticas_dose(df):
+    resumo = obter_resumo_dose(df[COL_DOSE])
+
+    if resumo.count == 0:
+        return None
+
+    return resumo.como_dicionario()
+
+
+# Recomendações possíveis para o limite operacional de dose
+MANTENHA = "MANTENHA"
+AVALIE = "AVALIE"
+REAVALIE = "REAVALIE"
+
+
+def decidir_recomendacao(percentual_dentro, p95, limite=5.0):
+    """Critério de decisão sobre o limite de dose (aceita escalares ou arrays).
+
+    - MANTENHA: P95 <= limite e >= 95% das amostras dentro do limite
+    - AVALIE: >= 90% das amostras dentro do limite
+    - REAVALIE: < 90% das amostras dentro do limite
+    """
+    percentual_dentro = np.asarray(percentual_dentro)
+    p95 = np.asarray(p95)
+    decisao = np.select(
+        [(percentual_dentro >= 95) & (p95 <= limite), percentual_dentro >= 90],
+        [MANTENHA, AVALIE],
+        default=REAVALIE,
+    )
+    return decisao.item() if decisao.ndim == 0 else decisao
@@ -0,0 +1,224 @@
+"""Exportação dos dados analisados em CSV, Parquet e Excel.
+
+Os arquivos são gerados sob demanda, quando o usuário pede o download, e
+ficam em disco, em um cache por processo identificado pela chave dos filtros e
+pelo formato, com política LRU e orçamento de bytes (como ``dosimetria.figuras``).
+Nenhuma cópia do arquivo fica na memória do cache: ``exportar`` devolve o
+arquivo aberto para leitura.
+
+Os três formatos são gravados em blocos de linhas, sem montar o arquivo
+inteiro como texto ou como modelo de planilha na memória:
+
+- CSV: cada bloco é convertido e gravado em seguida;
+- Parquet: um grupo de linhas por bloco (``pyarrow.parquet.ParquetWriter``),
+  oferecido apenas quando o ``pyarrow`` está instalado;
+- Excel: ``openpyxl`` em modo ``write_only``, que grava as linhas direto no
+  arquivo; o relatório traz os dados, a tabela de estatísticas e as
+  contagens por faixa de concentração, uma planilha cada.
+"""
+
+import importlib.util
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+from dosimetria import COL_DOSE, COL_RA226, COL_RA228
+from dosimetria.estatisticas import FAIXAS_CONCENTRACAO, DoseSummary, classificar_faixas, valores_validos
+
+# Linhas por bloco gravado
+LINHAS_BLOCO = 50_000
+
+# Orçamento padrão do cache (MB), ajustável por variável de ambiente
+ORCAMENTO_PADRAO = int(os.environ.get("DOSIMETRIA_CACHE_EXPORTACAO_MB", "128")) * 1024 * 1024
+
+# Formato: (rótulo, extensão, tipo MIME)
+FORMATOS = {
+    "csv": ("CSV", ".csv", "text/csv"),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+    "xlsx": ("Excel (relatório)", ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+# Sem o pyarrow (dependência opcional do Streamlit), o Parquet não aparece nas opções
+if importlib.util.find_spec("pyarrow") is None:
+    del FORMATOS["parquet"]
+
+
+def _blocos(df, linhas_bloco):
+    for inicio in range(0, len(df), linhas_bloco):
+        yield df.iloc[inicio:inicio + linhas_bloco]
+
+
+def escrever_csv(df, destino, linhas_bloco=LINHAS_BLOCO):
+    """Grava ``df`` como CSV UTF-8 no arquivo binário ``destino``."""
+    destino.write(df.iloc[:0].to_csv(index=False).encode("utf-8"))
+    for bloco in _blocos(df, linhas_bloco):
+        destino.write(bloco.to_csv(index=False, header=False).encode("utf-8"))
+
+
+def _sem_tipos_mistos(df):
+    # Colunas de texto com números no meio (p.ex. "280 (12 volumes)" e 280) viram texto
+    mistas = {
+        coluna: df[coluna].map(lambda v: str(v) if pd.notna(v) and not isinstance(v, str) else v)
+        for coluna in df.columns
+        if df[coluna].dtype == object and pd.api.types.infer_dtype(df[coluna], skipna=True).startswith("mixed")
+    }
+    return df.assign(**mistas) if mistas else df
+
+
+def escrever_parquet(df, destino, linhas_bloco=LINHAS_BLOCO):
+    """Grava ``df`` como Parquet (um grupo de linhas por bloco); requer ``pyarrow``."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = _sem_tipos_mistos(df)
+    esquema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(destino, esquema, compression="zstd") as escritor:
+        for bloco in _blocos(df, linhas_bloco):
+            escritor.write_table(pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False))
+
+
+def _linhas(df, linhas_bloco):
+    # Valores Python para o openpyxl: NaN/NaT/NA viram células vazias
+    for bloco in _blocos(df, linhas_bloco):
+        valores = bloco.astype(object)
+        valores = valores.where(bloco.notna(), None)
+        yield from valores.itertuples(index=False, name=None)
+
+
+def escrever_xlsx(planilhas, destino, linhas_bloco=LINHAS_BLOCO):
+    """Grava ``{nome: DataFrame}`` como uma pasta de trabalho, uma planilha por item."""
+    from openpyxl import Workbook
+
+    pasta = Workbook(write_only=True)
+    for nome, df in planilhas.items():
+        planilha = pasta.create_sheet(title=nome[:31])
+        planilha.append([str(coluna) for coluna in df.columns])
+        for linha in _linhas(df, linhas_bloco):
+            planilha.append(linha)
+    pasta.save(destino)
+
+
+def tabela_estatisticas(df, colunas=(COL_DOSE, COL_RA226, COL_RA228)):
+    """Estatística descritiva (mesmas medidas da página principal) de cada coluna."""
+    return pd.DataFrame({
+        coluna: DoseSummary(valores_validos(df[coluna])).como_dicionario()
+        for coluna in colunas if coluna in df.columns
+    }).rename_axis("estatística").reset_index()
+
+
+def tabela_faixas(df, bordas=FAIXAS_CONCENTRACAO):
+    """Número de amostras de Ra-226 e Ra-228 por faixa de concentração."""
+    faixas = classificar_faixas(df, {"Ra-226": COL_RA226, "Ra-228": COL_RA228}, bordas)
+    rotulos = ([f"≤ {bordas[0]:g} Bq/g"] + [f"{a:g}-{b:g} Bq/g" for a, b in zip(bordas[:-1], bordas[1:])] +
+               [f"> {bordas[-1]:g} Bq/g"])
+    tabela = pd.DataFrame({nome: f["contagens"] for nome, f in faixas.items()}, index=rotulos)
+    tabela.loc["Total"] = tabela.sum()
+    return tabela.rename_axis("faixa").reset_index()
+
+
+def planilhas_relatorio(df):
+    return {
+        "Dados": df,
+        "Estatísticas": tabela_estatisticas(df),
+        "Faixas": tabela_faixas(df),
+    }
+
+
+def gravar(df, formato, destino, linhas_bloco=LINHAS_BLOCO):
+    if formato == "csv":
+        escrever_csv(df, destino, linhas_bloco)
+    elif formato == "parquet":
+        escrever_parquet(df, destino, linhas_bloco)
+    elif formato == "xlsx":
+        escrever_xlsx(planilhas_relatorio(df), destino, linhas_bloco)
+    else:
+        raise ValueError(f"Formato desconhecido: {formato}")
+
+
+def nome_arquivo(base, formato):
+    return base + FORMATOS[formato][1]
+
+
+def tipo_mime(formato):
+    return FORMATOS[formato][2]
+
+
+class CacheExportacoes:
+    def __init__(self, orcamento_bytes=ORCAMENTO_PADRAO):
+        self.orcamento_bytes = orcamento_bytes
+        self._arquivos = OrderedDict()  # (chave, formato) -> (caminho, bytes)
+        self._trava = threading.Lock()
+        self._diretorio = None
+        self.bytes_usados = 0
+
+    def _pasta(self):
+        if self._diretorio is None:
+            self._diretorio = tempfile.mkdtemp(prefix="dosimetria-exportacoes-")
+            weakref.finalize(self, shutil.rmtree, self._diretorio, True)
+        return self._diretorio
+
+    def contem(self, chave, formato):
+        with self._trava:
+            return (chave, formato) in self._arquivos
+
+    def obter(self, chave, formato, df):
+        """Arquivo ``formato`` de ``chave``, aberto para leitura; ``df`` só é gravado na falta."""
+        chave = (chave, formato)
+        with self._trava:
+            if chave in self._arquivos:
+                self._arquivos.move_to_end(chave)
+                # Aberto sob a trava: uma remoção posterior não afeta quem já o abriu
+                return open(self._arquivos[chave][0], "rb")
+            pasta = self._pasta()
+
+        # Gravado em blocos direto no disco, fora da trava
+        descritor, caminho = tempfile.mkstemp(dir=pasta, suffix=FORMATOS[formato][1])
+        try:
+            with os.fdopen(descritor, "wb") as destino:
+                gravar(df, formato, destino)
+            tamanho = os.path.getsize(caminho)
+            arquivo = open(caminho, "rb")
+        except BaseException:
+            _remover(caminho)
+            raise
+
+        with self._trava:
+            if chave not in self._arquivos and tamanho <= self.orcamento_bytes:
+                self._arquivos[chave] = (caminho, tamanho)
+                self.bytes_usados += tamanho
+                while self.bytes_usados > self.orcamento_bytes:
+                    _, (removido, tamanho_removido) = self._arquivos.popitem(last=False)
+                    self.bytes_usados -= tamanho_removido
+                    _remover(removido)
+            else:
+                # Já gravado por outra sessão, ou maior que o orçamento: só para este download
+                _remover(caminho)
+        return arquivo
+
+    def limpar(self):
+        with self._trava:
+            for caminho, _ in self._arquivos.values():
+                _remover(caminho)
+            self._arquivos.clear()
+            self.bytes_usados = 0
+
+
+def _remover(caminho):
+    # Quem já abriu o arquivo continua lendo (POSIX); em outros sistemas a remoção pode falhar
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+
+# Instância única por processo, compartilhada entre sessões
+cache_exportacoes = CacheExportacoes()
+
+
+def exportar(chave, formato, df):
+    """Arquivo exportado, aberto para leitura (binário); quem chama o fecha."""
+    return cache_exportacoes.obter(chave, formato, df)
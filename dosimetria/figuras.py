@@ -0,0 +1,117 @@
+"""Cache de figuras já renderizadas.
+
+Guarda os bytes PNG/SVG de cada figura, identificados por uma chave com a
+impressão digital dos dados, o estado dos filtros, o tipo do gráfico e o
+tamanho da figura. O cache é compartilhado por todas as sessões do processo,
+tem política LRU e respeita um orçamento total de bytes.
+"""
+
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Orçamento padrão do cache (MB), ajustável por variável de ambiente
+ORCAMENTO_PADRAO = int(os.environ.get("DOSIMETRIA_CACHE_FIGURAS_MB", "64")) * 1024 * 1024
+
+# Acima deste número de pontos a dispersão passa a ser desenhada como densidade
+LIMIAR_DENSIDADE = 5000
+
+# Mapa de cores da densidade para cada cor usada nas dispersões
+MAPAS_DENSIDADE = {"blue": "Blues", "red": "Reds", "green": "Greens"}
+
+
+class CacheFiguras:
+    def __init__(self, orcamento_bytes=ORCAMENTO_PADRAO):
+        self.orcamento_bytes = orcamento_bytes
+        self._figuras = OrderedDict()
+        self._trava = threading.Lock()
+        self.bytes_usados = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave, desenhar, formato="png", dpi=200):
+        """Bytes da figura de ``chave``; ``desenhar()`` só é chamado na falta.
+
+        ``desenhar`` deve devolver uma ``matplotlib.figure.Figure``, que é
+        fechada logo após a renderização.
+        """
+        chave = (chave, formato, dpi)
+        with self._trava:
+            if chave in self._figuras:
+                self._figuras.move_to_end(chave)
+                self.acertos += 1
+                return self._figuras[chave]
+            self.falhas += 1
+
+        import matplotlib.pyplot as plt
+
+        fig = desenhar()
+        try:
+            buffer = io.BytesIO()
+            # Mesmas opções usadas por st.pyplot
+            fig.savefig(buffer, format=formato, dpi=dpi, bbox_inches="tight")
+        finally:
+            plt.close(fig)
+        dados = buffer.getvalue()
+
+        with self._trava:
+            if chave not in self._figuras and len(dados) <= self.orcamento_bytes:
+                self._figuras[chave] = dados
+                self.bytes_usados += len(dados)
+                while self.bytes_usados > self.orcamento_bytes:
+                    _, removida = self._figuras.popitem(last=False)
+                    self.bytes_usados -= len(removida)
+        return dados
+
+    def limpar(self):
+        with self._trava:
+            self._figuras.clear()
+            self.bytes_usados = 0
+
+
+# Instância única por processo, compartilhada entre sessões
+cache_figuras = CacheFiguras()
+
+
+def renderizar(chave, desenhar, formato="png", dpi=200):
+    return cache_figuras.obter(chave, desenhar, formato=formato, dpi=dpi)
+
+
+def dispersao(ax, x, y, cor, limite=None, limiar_pontos=LIMIAR_DENSIDADE, bins=80):
+    """Dispersão concentração vs dose que se adapta ao número de amostras.
+
+    Até ``limiar_pontos`` desenha um marcador por amostra. Acima disso,
+    agrupa os pontos em um histograma 2-D com NumPy e desenha apenas as
+    células ocupadas, de modo que o tempo de renderização e o tamanho do PNG
+    não crescem com o número de amostras. Com ``limite``, desenha a linha do
+    limite de dose e, no modo agregado, destaca individualmente as amostras
+    acima dele.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    validos = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[validos], y[validos]
+
+    if len(x) <= limiar_pontos:
+        ax.scatter(x, y, alpha=0.6, c=cor, s=50)
+    else:
+        from matplotlib.colors import LogNorm
+
+        contagens, bordas_x, bordas_y = np.histogram2d(x, y, bins=bins)
+        celulas = np.ma.masked_equal(contagens.T, 0)
+        malha = ax.pcolormesh(bordas_x, bordas_y, celulas, cmap=MAPAS_DENSIDADE.get(cor, "viridis"),
+                              norm=LogNorm(vmin=1, vmax=max(contagens.max(), 1)))
+        ax.figure.colorbar(malha, ax=ax, label="Amostras por célula")
+
+        if limite is not None:
+            # Acima do limite cada amostra importa; se forem muitas, a densidade já as mostra
+            acima = y > limite
+            if 0 < acima.sum() <= limiar_pontos:
+                ax.scatter(x[acima], y[acima], c="black", marker="x", s=40,
+                           label=f"Acima do limite ({int(acima.sum())})")
+
+    if limite is not None:
+        ax.axhline(y=limite, color="red", linestyle="--", linewidth=2, label=f"Limite {limite:g} µSv/h")
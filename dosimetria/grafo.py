@@ -0,0 +1,152 @@
+"""Grafo de cálculos sob demanda para as páginas de análise.
+
+Cada nó declara de quais outros nós (ou entradas) depende e só é avaliado
+quando alguém pede o seu valor: uma seção oculta que não lê um nó não paga
+por ele, nem pelos nós dos quais ele depende. Dentro de uma execução, cada
+nó é calculado no máximo uma vez, mesmo que várias seções o peçam.
+
+Os valores também ficam memorizados entre execuções e sessões, pela
+impressão do nó: o nome e as impressões das dependências, até as entradas,
+identificadas pela chave fornecida pela página (por exemplo, impressão dos
+dados mais estado dos filtros). Os valores memorizados são compartilhados e
+não devem ser alterados.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from dosimetria import COL_DOSE
+from dosimetria.estatisticas import DoseSummary, calcular_estatisticas_radionuclideos, decidir_recomendacao
+from dosimetria.reamostragem import intervalos_confianca
+
+_valores = OrderedDict()
+_trava_valores = threading.Lock()
+MAX_VALORES = 256
+
+
+class GrafoCalculos:
+    def __init__(self, nome):
+        # Nome do grafo: separa na memória nós homônimos de grafos diferentes
+        self.nome = nome
+        self._entradas = {}
+        self._nos = {}
+        self._impressoes = {}
+        self._resultados = {}
+        # Nós efetivamente calculados (não encontrados na memória) por este grafo
+        self.calculados = []
+
+    def entrada(self, nome, valor, chave):
+        """Valor de entrada do grafo; ``chave`` identifica o seu conteúdo."""
+        self._entradas[nome] = (valor, chave)
+
+    def no(self, nome, *dependencias):
+        """Decorador que registra ``funcao(*valores das dependências)`` como o nó ``nome``."""
+        def registrar(funcao):
+            self._nos[nome] = (funcao, dependencias)
+            return funcao
+        return registrar
+
+    def impressao(self, nome):
+        if nome in self._entradas:
+            return (self.nome, "entrada", nome, self._entradas[nome][1])
+        if nome not in self._impressoes:
+            if nome not in self._nos:
+                raise KeyError(f"Nó desconhecido: {nome}")
+            _, dependencias = self._nos[nome]
+            self._impressoes[nome] = (self.nome, nome, tuple(self.impressao(d) for d in dependencias))
+        return self._impressoes[nome]
+
+    def __getitem__(self, nome):
+        if nome in self._entradas:
+            return self._entradas[nome][0]
+        if nome in self._resultados:
+            return self._resultados[nome]
+
+        impressao = self.impressao(nome)
+        with _trava_valores:
+            if impressao in _valores:
+                _valores.move_to_end(impressao)
+                self._resultados[nome] = _valores[impressao]
+                return self._resultados[nome]
+
+        funcao, dependencias = self._nos[nome]
+        valor = funcao(*(self[d] for d in dependencias))
+        self.calculados.append(nome)
+        self._resultados[nome] = valor
+        with _trava_valores:
+            _valores[impressao] = valor
+            while len(_valores) > MAX_VALORES:
+                _valores.popitem(last=False)
+        return valor
+
+    def avaliados(self):
+        """Nós já disponíveis nesta execução (calculados ou vindos da memória)."""
+        return list(self._resultados)
+
+
+def limpar_memoria():
+    with _trava_valores:
+        _valores.clear()
+
+
+def grafo_analise(df, chave, limite=5.0, percentis=(90, 95, 99), n_reamostras=10000, max_workers=None):
+    """Grafo da página de análise: dados filtrados → dose ordenada → resumo → recomendação.
+
+    ``chave`` identifica ``df`` (dados carregados e estado dos filtros).
+    ``max_workers`` só muda onde o bootstrap roda, não o resultado.
+    """
+    grafo = GrafoCalculos("analise")
+    grafo.entrada("dados", df, chave)
+    grafo.entrada("limite", limite, limite)
+    grafo.entrada("percentis", tuple(percentis), tuple(percentis))
+    grafo.entrada("n_reamostras", n_reamostras, n_reamostras)
+
+    @grafo.no("dose", "dados")
+    def dose(dados):
+        return dados[COL_DOSE].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    @grafo.no("resumo_dose", "dose")
+    def resumo_dose(dose):
+        return DoseSummary(dose)
+
+    @grafo.no("contagens", "dados", "resumo_dose", "limite")
+    def contagens(dados, resumo, limite):
+        # Percentuais sobre todas as linhas analisadas, como na visão geral
+        total = len(dados)
+        ate = resumo.contar_ate(limite)
+        acima = resumo.contar_acima(limite)
+        return {
+            "total": total,
+            "ate_limite": ate,
+            "percentual_ate_limite": ate / total * 100 if total > 0 else 0,
+            "acima_limite": acima,
+            "percentual_acima_limite": acima / total * 100 if total > 0 else 0,
+            "maxima": resumo.max if total > 0 else 0,
+        }
+
+    @grafo.no("estatisticas_dose", "resumo_dose")
+    def estatisticas_dose(resumo):
+        return resumo.como_dicionario() if resumo.count else None
+
+    @grafo.no("percentis_dose", "resumo_dose", "percentis")
+    def percentis_dose(resumo, percentis):
+        return {p: resumo.percentil(p) for p in percentis}
+
+    @grafo.no("intervalos", "dose", "limite", "percentis", "n_reamostras")
+    def intervalos(dose, limite, percentis, n_reamostras):
+        # Incerteza dos percentis: intervalos de confiança de 95% por bootstrap
+        return intervalos_confianca(dose, percentis, limite=limite, nivel=0.95, n_reamostras=n_reamostras,
+                                    max_workers=max_workers)
+
+    @grafo.no("recomendacao", "intervalos", "limite")
+    def recomendacao(ic, limite):
+        # Limites de confiança em vez das estimativas pontuais
+        return decidir_recomendacao(ic["dentro"][0], ic["P95"][1], limite)
+
+    @grafo.no("radionuclideos", "dados")
+    def radionuclideos(dados):
+        return calcular_estatisticas_radionuclideos(dados)
+
+    return grafo
@@ -0,0 +1,101 @@
+"""Orçamento de tempo de importação das páginas e do núcleo.
+
+Cada alvo é importado em um interpretador novo com ``python -X importtime``,
+de modo que o tempo medido é o de uma partida a frio. Para as páginas
+(``main.py`` etc.) são importados apenas os ``import`` de nível de módulo,
+sem executar o script. O relatório lista os pacotes mais caros e falha quando
+o orçamento é excedido ou quando um pacote pesado, que deveria ser carregado
+sob demanda, entra já na importação.
+
+Uso::
+
+    python -m dosimetria.importacao main.py main1.py main2.py dosimetria.relatorio --orcamento-ms 1000
+"""
+
+import argparse
+import ast
+import subprocess
+import sys
+from pathlib import Path
+
+# Pacotes que só devem ser importados quando uma seção que os usa é exibida
+PESADOS = ("matplotlib", "scipy", "seaborn", "openpyxl")
+
+ALVOS_PADRAO = (
+    "main.py",
+    "main1.py",
+    "main2.py",
+    "dosimetria.estatisticas",
+    "dosimetria.sites",
+    "dosimetria.relatorio",
+)
+
+
+def codigo_importacao(alvo):
+    # Módulo: "import alvo"; página: apenas os imports de nível de módulo
+    if not alvo.endswith(".py"):
+        return f"import {alvo}"
+    arvore = ast.parse(Path(alvo).read_text(encoding="utf-8"))
+    imports = [n for n in arvore.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    return ast.unparse(ast.Module(body=imports, type_ignores=[])) or "pass"
+
+
+def medir(alvo, diretorio="."):
+    """Tempo total (ms) e tempo acumulado (ms) de cada pacote carregado.
+
+    O tempo de um pacote é o acumulado da linha do próprio pacote, que inclui
+    os submódulos importados por ele; o total soma as importações feitas
+    diretamente pelo alvo.
+    """
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo_importacao(alvo)],
+        cwd=diretorio, capture_output=True, text=True, check=True,
+    )
+
+    total = 0.0
+    por_pacote = {}
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        _, acumulado, nome = linha[len("import time:"):].split("|")
+        if not acumulado.strip().isdigit():
+            continue  # cabeçalho
+        acumulado = int(acumulado) / 1000
+        modulo = nome.strip()
+        # Importações diretas do alvo têm um único espaço de recuo
+        if len(nome) - len(nome.lstrip()) == 1:
+            total += acumulado
+        pacote = modulo.split(".")[0]
+        por_pacote[pacote] = max(por_pacote.get(pacote, 0.0), acumulado)
+    return total, por_pacote
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo de importação a frio das páginas e do núcleo")
+    parser.add_argument("alvos", nargs="*", default=list(ALVOS_PADRAO),
+                        help="páginas (.py) ou módulos (dosimetria.x)")
+    parser.add_argument("--orcamento-ms", type=float, default=1000.0,
+                        help="tempo máximo de importação por alvo")
+    parser.add_argument("--maiores", type=int, default=5, help="pacotes mais caros listados por alvo")
+    args = parser.parse_args(argv)
+
+    falhas = []
+    for alvo in args.alvos:
+        total, por_pacote = medir(alvo)
+        pesados = sorted(p for p in por_pacote if p in PESADOS)
+        situacao = "ok" if total <= args.orcamento_ms and not pesados else "FALHA"
+        print(f"{alvo}: {total:.0f} ms (orçamento {args.orcamento_ms:.0f} ms) [{situacao}]")
+        for pacote, tempo in sorted(por_pacote.items(), key=lambda item: -item[1])[:args.maiores]:
+            print(f"    {pacote:<24} {tempo:8.0f} ms")
+        if total > args.orcamento_ms:
+            falhas.append(f"{alvo}: {total:.0f} ms acima do orçamento")
+        if pesados:
+            falhas.append(f"{alvo}: importa {', '.join(pesados)} na partida")
+
+    for falha in falhas:
+        print(falha, file=sys.stderr)
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
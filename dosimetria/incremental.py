@@ -0,0 +1,378 @@
+"""Ingestão incremental de novos certificados com estatísticas combináveis.
+
+Os resumos aqui mantidos podem ser atualizados com um lote de linhas novas
+ou combinados entre si em tempo proporcional ao tamanho do lote, sem
+revisitar o histórico:
+
+- ``MomentosCorrentes``: contagem, média e momentos centrais até a 4ª ordem
+  (Welford/Chan/Pébay), com as mesmas correções de viés do pandas;
+- ``EsbocoQuantis``: histograma logarítmico com erro relativo limitado
+  (no estilo DDSketch), usado para P90/P95/P99;
+- ``ResumoIncremental``: junta os dois para a taxa de dose, mantém contagens
+  por faixa de concentração e ignora amostras já ingeridas;
+- ``ResumoSobreposto``: linhas novas sobre um resumo base que não é alterado
+  (o resumo do histórico, compartilhado entre sessões), sem copiá-lo.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from dosimetria import COL_DOSE
+from dosimetria.estatisticas import FAIXAS_CONCENTRACAO, RADIONUCLIDEOS, ROTULOS_FAIXAS, valores_validos
+
+# Identificação estável de uma amostra: lote, certificado e número do volume.
+# "Lotes" vem de células mescladas e só aparece na primeira linha de cada lote.
+COLUNAS_CHAVE = ("Lotes", "Certificado de Análise", "No\xa0Volume")
+
+
+def preencher_lotes(df, coluna_grupo="site"):
+    """Repete em cada linha o último lote preenchido acima dela.
+
+    Deve ser aplicado às linhas brutas de cada planilha, antes de qualquer
+    filtro; com a coluna ``coluna_grupo`` (o site), o lote de uma planilha não
+    passa para a seguinte.
+    """
+    if "Lotes" not in df.columns:
+        return df
+    lotes = df["Lotes"]
+    if coluna_grupo in df.columns:
+        preenchidos = lotes.groupby(df[coluna_grupo], sort=False, observed=True).ffill()
+    else:
+        preenchidos = lotes.ffill()
+    return df.assign(Lotes=preenchidos)
+
+
+def _texto_chave(valor):
+    # Mesmo texto para o mesmo valor, venha ele da carga comum (inteiros, texto) ou de um
+    # envio lido pelo pandas (float64 com NaN nas células vazias): 81, 81.0 e " 81 " -> "81"
+    if valor is None or valor is pd.NaT or (not isinstance(valor, str) and pd.isna(valor)):
+        return ""
+    if isinstance(valor, str):
+        return valor.strip()
+    if isinstance(valor, (float, np.floating)) and float(valor).is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _textos_chave(serie):
+    # Cada valor distinto é normalizado uma vez; ausentes (código -1) viram ""
+    codigos, unicos = pd.factorize(serie)
+    textos = np.array([_texto_chave(v) for v in unicos] + [""], dtype=object)
+    return textos[codigos]
+
+
+def chaves_amostras(df):
+    """Chave ``(lote, certificado, volume)`` de cada linha, como tuplas de texto (lotes já preenchidos).
+
+    Os valores são normalizados (inteiros em float sem ``.0``, texto sem espaços nas
+    pontas, ausentes como ``""``), para que a mesma amostra tenha a mesma chave
+    qualquer que seja o tipo com que a coluna foi lida.
+    """
+    partes = []
+    for coluna in COLUNAS_CHAVE:
+        if coluna in df.columns:
+            partes.append(_textos_chave(df[coluna]))
+        else:
+            partes.append(np.full(len(df), "", dtype=object))
+    return list(zip(*partes))
+
+
+def amostras_identificadas(df):
+    """Linhas com certificado ou número do volume; só o lote não identifica uma amostra."""
+    identificadas = np.zeros(len(df), dtype=bool)
+    for coluna in COLUNAS_CHAVE[1:]:
+        if coluna in df.columns:
+            identificadas |= _textos_chave(df[coluna]) != ""
+    return identificadas
+
+
+class MomentosCorrentes:
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+
+    @classmethod
+    def de_valores(cls, valores):
+        momentos = cls()
+        n = len(valores)
+        if n:
+            momentos.n = n
+            momentos.media = float(valores.mean())
+            desvios = valores - momentos.media
+            quadrados = desvios * desvios
+            momentos.m2 = float(quadrados.sum())
+            momentos.m3 = float((quadrados * desvios).sum())
+            momentos.m4 = float((quadrados * quadrados).sum())
+        return momentos
+
+    def combinar(self, outro):
+        # Fórmulas de combinação de momentos centrais (Chan et al.; Pébay)
+        if outro.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.media, self.m2, self.m3, self.m4 = outro.n, outro.media, outro.m2, outro.m3, outro.m4
+            return self
+
+        na, nb = self.n, outro.n
+        n = na + nb
+        delta = outro.media - self.media
+        delta_n = delta / n
+
+        m4 = (self.m4 + outro.m4
+              + delta * delta_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+              + 6 * delta_n ** 2 * (na * na * outro.m2 + nb * nb * self.m2)
+              + 4 * delta_n * (na * outro.m3 - nb * self.m3))
+        m3 = (self.m3 + outro.m3
+              + delta * delta_n ** 2 * na * nb * (na - nb)
+              + 3 * delta_n * (na * outro.m2 - nb * self.m2))
+        m2 = self.m2 + outro.m2 + delta * delta_n * na * nb
+
+        self.n = n
+        self.media += delta_n * nb
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        return self
+
+    def atualizar(self, valores):
+        return self.combinar(MomentosCorrentes.de_valores(np.asarray(valores, dtype=np.float64)))
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else math.nan
+
+    @property
+    def skewness(self):
+        n = self.n
+        if n < 3:
+            return math.nan
+        if self.m2 == 0:
+            return 0.0
+        return (n * (n - 1) ** 0.5 / (n - 2)) * (self.m3 / self.m2 ** 1.5)
+
+    @property
+    def kurtosis(self):
+        n = self.n
+        if n < 4:
+            return math.nan
+        if self.m2 == 0:
+            return 0.0
+        ajuste = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        return (n * (n + 1) * (n - 1) * self.m4) / ((n - 2) * (n - 3) * self.m2 ** 2) - ajuste
+
+
+class EsbocoQuantis:
+    """Esboço de quantis combinável com erro relativo máximo ``precisao``.
+
+    Cada valor positivo cai no balde ``ceil(log_gama(v))``; o quantil
+    devolvido fica a no máximo ``precisao`` (relativo) do valor exato.
+    Valores menores ou iguais a ``minimo`` são contados à parte, como zero.
+    """
+
+    def __init__(self, precisao=0.01, minimo=1e-9):
+        self.precisao = precisao
+        self.minimo = minimo
+        self.gama = (1 + precisao) / (1 - precisao)
+        self._log_gama = math.log(self.gama)
+        self.baldes = {}
+        self.zeros = 0
+        self.n = 0
+
+    def atualizar(self, valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[~np.isnan(valores)]
+        positivos = valores[valores > self.minimo]
+        self.zeros += len(valores) - len(positivos)
+        self.n += len(valores)
+
+        indices, contagens = np.unique(np.ceil(np.log(positivos) / self._log_gama).astype(np.int64),
+                                       return_counts=True)
+        for indice, contagem in zip(indices.tolist(), contagens.tolist()):
+            self.baldes[indice] = self.baldes.get(indice, 0) + contagem
+        return self
+
+    def combinar(self, outro):
+        if outro.gama != self.gama:
+            raise ValueError("Esboços com precisões diferentes não podem ser combinados")
+        for indice, contagem in outro.baldes.items():
+            self.baldes[indice] = self.baldes.get(indice, 0) + contagem
+        self.zeros += outro.zeros
+        self.n += outro.n
+        return self
+
+    def quantil(self, q):
+        if self.n == 0:
+            return math.nan
+        posto = q * (self.n - 1)
+        acumulado = self.zeros
+        if posto < acumulado:
+            return 0.0
+        for indice in sorted(self.baldes):
+            acumulado += self.baldes[indice]
+            if posto < acumulado:
+                return 2 * self.gama ** indice / (self.gama + 1)
+        return 2 * self.gama ** max(self.baldes) / (self.gama + 1)
+
+
+class ResumoIncremental:
+    """Resumo da dose e das faixas de concentração atualizado por lotes.
+
+    ``limites`` são os limites de dose (µSv/h) com contagem exata de amostras
+    ``<=`` cada um; ``bordas`` são as bordas das faixas de concentração.
+    """
+
+    def __init__(self, limites=(3.0, 5.0), bordas=FAIXAS_CONCENTRACAO, precisao=0.01):
+        self.limites = tuple(limites)
+        self.bordas = np.asarray(bordas, dtype=np.float64)
+        self.chaves = set()
+        self.dose = MomentosCorrentes()
+        self.esboco = EsbocoQuantis(precisao)
+        self.dose_min = math.inf
+        self.dose_max = -math.inf
+        self.ate_limite = np.zeros(len(self.limites), dtype=np.int64)
+
+        n_faixas = len(self.bordas) + 1
+        self.faixas = {
+            nome: {
+                "contagens": np.zeros(n_faixas, dtype=np.int64),
+                "soma": 0.0,
+                "maxima": -math.inf,
+            }
+            for nome in RADIONUCLIDEOS
+        }
+
+    def anexar(self, df, conhecidas=frozenset()):
+        """Ingere apenas as linhas de ``df`` ainda não vistas; retorna quantas.
+
+        Os lotes de ``df`` devem estar preenchidos (``preencher_lotes``) nas
+        linhas brutas, antes de filtros. Chaves em ``conhecidas`` também
+        contam como já vistas.
+        """
+        chaves = chaves_amostras(df)
+        # Linhas sem identificação (arquivo sem certificado e volume) não têm como ser
+        # reconhecidas de novo e entram sempre
+        identificadas = amostras_identificadas(df)
+        novas = np.fromiter((not i or (c not in self.chaves and c not in conhecidas)
+                             for c, i in zip(chaves, identificadas)),
+                            dtype=bool, count=len(chaves))
+        if not novas.any():
+            return 0
+
+        # Duplicatas dentro do próprio lote contam uma vez só
+        vistas_no_lote = set()
+        for i in np.flatnonzero(novas & identificadas):
+            if chaves[i] in vistas_no_lote:
+                novas[i] = False
+            vistas_no_lote.add(chaves[i])
+        self.chaves.update(vistas_no_lote)
+
+        delta = df[novas]
+        self._atualizar(delta)
+        return len(delta)
+
+    def _atualizar(self, df):
+        dose = valores_validos(df[COL_DOSE])
+        self.dose.atualizar(dose)
+        self.esboco.atualizar(dose)
+        if len(dose):
+            self.dose_min = min(self.dose_min, float(dose.min()))
+            self.dose_max = max(self.dose_max, float(dose.max()))
+        self.ate_limite += np.array([np.count_nonzero(dose <= limite) for limite in self.limites],
+                                    dtype=np.int64)
+
+        for nome, coluna in RADIONUCLIDEOS.items():
+            valores = valores_validos(df[coluna])
+            faixa = np.searchsorted(self.bordas, valores, side="left")
+            acumulado = self.faixas[nome]
+            acumulado["contagens"] += np.bincount(faixa, minlength=len(self.bordas) + 1)
+            acumulado["soma"] += float(valores.sum())
+            if len(valores):
+                acumulado["maxima"] = max(acumulado["maxima"], float(valores.max()))
+
+    def combinar(self, outro):
+        """Une dois resumos construídos a partir de amostras distintas."""
+        self.chaves |= outro.chaves
+        return self._combinar_estatisticas(outro)
+
+    def estatisticas(self):
+        """Cópia das estatísticas, sem as chaves: custo independente do tamanho do histórico."""
+        return ResumoIncremental(self.limites, self.bordas, self.esboco.precisao)._combinar_estatisticas(self)
+
+    def _combinar_estatisticas(self, outro):
+        if outro.limites != self.limites or not np.array_equal(outro.bordas, self.bordas):
+            raise ValueError("Resumos com limites ou faixas diferentes não podem ser combinados")
+        self.dose.combinar(outro.dose)
+        self.esboco.combinar(outro.esboco)
+        self.dose_min = min(self.dose_min, outro.dose_min)
+        self.dose_max = max(self.dose_max, outro.dose_max)
+        self.ate_limite += outro.ate_limite
+        for nome, acumulado in self.faixas.items():
+            acumulado["contagens"] += outro.faixas[nome]["contagens"]
+            acumulado["soma"] += outro.faixas[nome]["soma"]
+            acumulado["maxima"] = max(acumulado["maxima"], outro.faixas[nome]["maxima"])
+        return self
+
+    @property
+    def count(self):
+        return self.dose.n
+
+    def percentil(self, p):
+        # Aproximado: erro relativo máximo igual à precisão do esboço
+        return self.esboco.quantil(p / 100)
+
+    def contar_ate(self, limite):
+        return int(self.ate_limite[self.limites.index(limite)])
+
+    def percentual_ate(self, limite):
+        return self.contar_ate(limite) / self.count * 100 if self.count else 0.0
+
+    def estatisticas_radionuclideos(self):
+        # Mesmo formato de calcular_estatisticas_radionuclideos()
+        stats_dict = {}
+        for nome, acumulado in self.faixas.items():
+            total = int(acumulado["contagens"].sum())
+            stats_dict[nome] = {
+                "total": total,
+                **dict(zip(ROTULOS_FAIXAS, acumulado["contagens"].tolist())),
+                "media": acumulado["soma"] / total if total else math.nan,
+                "maxima": acumulado["maxima"] if total else math.nan,
+            }
+        return stats_dict
+
+
+class ResumoSobreposto:
+    """Resumo ``base`` mais as linhas anexadas depois, sem alterar nem copiar ``base``.
+
+    As chaves novas ficam em um resumo próprio; contagens, momentos e esboço
+    são a combinação dos dois, refeita a cada lote anexado.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.novos = ResumoIncremental(base.limites, base.bordas, base.esboco.precisao)
+        self.total = base.estatisticas()
+
+    def anexar(self, df):
+        anexadas = self.novos.anexar(df, conhecidas=self.base.chaves)
+        if anexadas:
+            self.total = self.base.estatisticas()._combinar_estatisticas(self.novos)
+        return anexadas
+
+    @property
+    def count(self):
+        return self.total.count
+
+    def percentil(self, p):
+        return self.total.percentil(p)
+
+    def contar_ate(self, limite):
+        return self.total.contar_ate(limite)
+
+    def percentual_ate(self, limite):
+        return self.total.percentual_ate(limite)
+
+    def estatisticas_radionuclideos(self):
+        return self.total.estatisticas_radionuclideos()
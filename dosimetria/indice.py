@@ -0,0 +1,92 @@
+"""Índice de limiares (concentração, dose) para filtros interativos.
+
+As amostras são ordenadas pela maior concentração entre Ra-226 e Ra-228, e
+uma grade de contagens acumuladas responde "quantas amostras têm
+concentração <= C e dose <= D" sem varrer o conjunto de dados.
+
+A grade cobre só a faixa consultável (os tetos dos sliders), com no máximo
+``MAX_BORDAS`` bordas por eixo: um valor discrepante não aumenta a grade, e
+limiares fora dela caem na busca binária.
+"""
+
+import numpy as np
+
+# Bordas por eixo da grade (com o passo de 0,1, até 100 Bq/g ou µSv/h; no máximo 8 MB)
+MAX_BORDAS = 1000
+
+
+def contagem_acumulada_2d(x, y, bordas_x, bordas_y):
+    """``grade[i, j]`` = número de pontos com ``x <= bordas_x[i]`` e ``y <= bordas_y[j]``.
+
+    As bordas devem estar em ordem crescente. Pontos acima da última borda de
+    um eixo não entram em nenhuma célula desse eixo.
+    """
+    nx, ny = len(bordas_x), len(bordas_y)
+    ix = np.searchsorted(bordas_x, x, side="left")
+    iy = np.searchsorted(bordas_y, y, side="left")
+    celulas = np.bincount(ix * (ny + 1) + iy, minlength=(nx + 1) * (ny + 1))
+    celulas = celulas.reshape(nx + 1, ny + 1)[:nx, :ny]
+    return celulas.cumsum(axis=0).cumsum(axis=1)
+
+
+def _bordas(maximo, passo, teto=None):
+    # Bordas múltiplas do passo, arredondadas para coincidir com os valores dos sliders,
+    # até o maior valor (ou o teto, se menor), limitadas a MAX_BORDAS
+    if teto is not None:
+        maximo = min(maximo, teto)
+    quantidade = max(int(np.ceil(maximo / passo)), 1) if np.isfinite(maximo) else 1
+    return np.round(np.arange(1, min(quantidade, MAX_BORDAS) + 1) * passo, 10)
+
+
+class IndiceLimiares:
+    """Índice sobre (max(Ra-226, Ra-228), dose) para consultas por limiar.
+
+    Limiares múltiplos de ``passo_conc``/``passo_dose`` até ``teto_conc``/
+    ``teto_dose`` são respondidos pela grade em O(log n); os demais caem na
+    busca binária sobre as amostras ordenadas por concentração, seguida de
+    uma comparação apenas no prefixo selecionado.
+    """
+
+    def __init__(self, concentracao, dose, passo_conc=0.1, passo_dose=0.1, teto_conc=None, teto_dose=None):
+        concentracao = np.asarray(concentracao, dtype=np.float64)
+        dose = np.asarray(dose, dtype=np.float64)
+
+        self.ordem = np.argsort(concentracao, kind="stable")
+        self.conc_ordenada = concentracao[self.ordem]
+        self.dose_por_conc = dose[self.ordem]
+        self.total = len(concentracao)
+
+        self.max_conc = concentracao.max(initial=0.0)
+        self.max_dose = dose.max(initial=0.0)
+        self.bordas_conc = _bordas(self.max_conc, passo_conc, teto_conc)
+        self.bordas_dose = _bordas(self.max_dose, passo_dose, teto_dose)
+        self.grade = contagem_acumulada_2d(concentracao, dose, self.bordas_conc, self.bordas_dose)
+
+    @staticmethod
+    def _posicao_grade(bordas, limiar, maximo):
+        # Índice da borda igual ao limiar; acima da última borda, a última só vale se
+        # ela cobre todos os valores (senão a grade foi cortada e a consulta vai para a busca)
+        if limiar > bordas[-1]:
+            return len(bordas) - 1 if bordas[-1] >= maximo else None
+        i = int(np.searchsorted(bordas, limiar))
+        return i if bordas[i] == limiar else None
+
+    def _prefixo(self, max_conc):
+        # Amostras com concentração <= max_conc ocupam o prefixo [0, k)
+        return int(np.searchsorted(self.conc_ordenada, max_conc, side="right"))
+
+    def contar(self, max_conc, max_dose):
+        i = self._posicao_grade(self.bordas_conc, max_conc, self.max_conc)
+        j = self._posicao_grade(self.bordas_dose, max_dose, self.max_dose)
+        if i is not None and j is not None:
+            return int(self.grade[i, j])
+
+        k = self._prefixo(max_conc)
+        return int(np.count_nonzero(self.dose_por_conc[:k] <= max_dose))
+
+    def selecionar(self, max_conc, max_dose):
+        """Posições (em ordem original) das amostras dentro dos dois limiares."""
+        k = self._prefixo(max_conc)
+        linhas = self.ordem[:k][self.dose_por_conc[:k] <= max_dose]
+        linhas.sort()
+        return linhas
@@ -0,0 +1,107 @@
+"""Leitura em fluxo de colunas selecionadas de uma planilha.
+
+Usa o modo ``read_only`` do openpyxl, que percorre o XML da planilha linha a
+linha sem montar objetos de célula nem carregar estilos. Apenas as colunas
+pedidas são copiadas para buffers NumPy pré-alocados, de modo que memória e
+tempo crescem com o número de colunas projetadas, e não com a largura total.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def nomes_unicos(cabecalho):
+    # Mesma convenção do pandas: "Unnamed: i" para vazios e ".1", ".2" para repetidos
+    nomes = []
+    vistos = {}
+    for i, valor in enumerate(cabecalho):
+        nome = f"Unnamed: {i}" if valor is None else str(valor).strip()
+        base = nome
+        while nome in vistos:
+            vistos[base] += 1
+            nome = f"{base}.{vistos[base]}"
+        vistos[nome] = 0
+        nomes.append(nome)
+    return nomes
+
+
+def _para_float(valor):
+    # Equivalente a pd.to_numeric(errors='coerce') célula a célula
+    if valor is None or isinstance(valor, bool):
+        return math.nan
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    if isinstance(valor, str):
+        try:
+            return float(valor)
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+def _ampliar(buffers, capacidade):
+    novos = []
+    for buffer in buffers:
+        novo = np.full(capacidade, np.nan) if buffer.dtype != object else np.empty(capacidade, dtype=object)
+        novo[:len(buffer)] = buffer
+        novos.append(novo)
+    return novos
+
+
+def ler_colunas(caminho, planilha, colunas, numericas=(), linha_cabecalho=1):
+    """Lê apenas ``colunas`` da planilha e devolve um DataFrame.
+
+    Colunas listadas em ``numericas`` são convertidas para float64 durante a
+    leitura (valores não numéricos viram NaN); as demais mantêm os valores
+    originais das células.
+    """
+    # openpyxl só é importado quando há planilha a ler (o cache em disco dispensa)
+    import openpyxl
+
+    numericas = set(numericas)
+    wb = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        ws = wb[planilha]
+        linhas = ws.iter_rows(min_row=linha_cabecalho, values_only=True)
+        cabecalho = nomes_unicos(next(linhas, ()))
+
+        faltando = [c for c in colunas if c not in cabecalho]
+        if faltando:
+            raise KeyError(f"Colunas ausentes na planilha '{planilha}': {faltando}")
+
+        posicoes = [cabecalho.index(c) for c in colunas]
+        ultima_coluna = max(posicoes) + 1 if posicoes else 0
+        converte = [c in numericas for c in colunas]
+
+        # max_row vem da dimensão declarada no XML; pode faltar ou exceder
+        capacidade = max((ws.max_row or 0) - linha_cabecalho, 1)
+        buffers = [
+            np.full(capacidade, np.nan) if numerico else np.empty(capacidade, dtype=object)
+            for numerico in converte
+        ]
+
+        total = 0
+        ultima_preenchida = 0
+        for linha in ws.iter_rows(min_row=linha_cabecalho + 1, max_col=ultima_coluna, values_only=True):
+            if total == capacidade:
+                capacidade *= 2
+                buffers = _ampliar(buffers, capacidade)
+
+            preenchida = False
+            for buffer, posicao, numerico in zip(buffers, posicoes, converte):
+                valor = linha[posicao] if posicao < len(linha) else None
+                if valor is not None:
+                    preenchida = True
+                buffer[total] = _para_float(valor) if numerico else valor
+
+            total += 1
+            if preenchida:
+                ultima_preenchida = total
+    finally:
+        wb.close()
+
+    # Linhas vazias no final da planilha são descartadas, como no read_excel
+    dados = {nome: buffer[:ultima_preenchida] for nome, buffer in zip(colunas, buffers)}
+    return pd.DataFrame(dados, columns=list(colunas))
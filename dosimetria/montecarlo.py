@@ -0,0 +1,112 @@
+"""Propagação por Monte Carlo da incerteza declarada das concentrações.
+
+Cada realização sorteia, para todas as amostras, Ra-226 e Ra-228 de uma
+normal centrada no resultado e com desvio-padrão ``incerteza / k`` (truncada
+em zero). A taxa de dose é tratada como exata. As realizações são geradas em
+blocos de memória limitada, cada bloco com sua própria semente derivada, e
+os blocos são distribuídos por um pool de threads (como no bootstrap de
+``dosimetria.reamostragem``, o numpy libera o GIL e não há ``fork`` do
+servidor); cada bloco devolve só contagens agregadas, nunca as
+concentrações sorteadas.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from dosimetria.estatisticas import FAIXAS_CONCENTRACAO
+
+# Memória máxima (bytes) das matrizes sorteadas em um bloco de realizações
+MEMORIA_BLOCO = 32 * 1024 * 1024
+
+
+def _contar_faixas(valores, bordas):
+    # Contagem por faixa de cada realização (linha) em um único bincount
+    n_faixas = len(bordas) + 1
+    faixa = np.searchsorted(bordas, valores, side="left")
+    faixa += np.arange(len(valores))[:, None] * n_faixas
+    return np.bincount(faixa.ravel(), minlength=len(valores) * n_faixas).reshape(len(valores), n_faixas)
+
+
+def _bloco(args):
+    # Executado nas threads do pool: um bloco de realizações por tarefa
+    ra226, sigma226, ra228, sigma228, dentro_limite, teto, bordas, tamanho, semente = args
+    rng = np.random.default_rng(semente)
+    n = len(ra226)
+
+    sorteio226 = rng.standard_normal((tamanho, n))
+    sorteio226 *= sigma226
+    sorteio226 += ra226
+    np.maximum(sorteio226, 0.0, out=sorteio226)
+
+    sorteio228 = rng.standard_normal((tamanho, n))
+    sorteio228 *= sigma228
+    sorteio228 += ra228
+    np.maximum(sorteio228, 0.0, out=sorteio228)
+
+    acima226 = sorteio226 > teto
+    acima228 = sorteio228 > teto
+    no_teto = ~(acima226 | acima228)
+
+    return {
+        "acima226": acima226.sum(axis=0),
+        "acima228": acima228.sum(axis=0),
+        "acima": (~no_teto).sum(axis=0),
+        "faixas226": _contar_faixas(sorteio226, bordas),
+        "faixas228": _contar_faixas(sorteio228, bordas),
+        "amostras": no_teto.sum(axis=1),
+        "dentro": (no_teto & dentro_limite).sum(axis=1),
+    }
+
+
+def simular_incerteza(ra226, incerteza226, ra228, incerteza228, dose, teto=8.0, limite=5.0,
+                      n_realizacoes=1000, fator_abrangencia=1.0, bordas=FAIXAS_CONCENTRACAO,
+                      semente=0, max_workers=None, memoria_bloco=MEMORIA_BLOCO):
+    """Sorteia ``n_realizacoes`` conjuntos de concentrações e agrega os resultados.
+
+    Incertezas ausentes são tratadas como zero (resultado exato). Retorna:
+
+    - ``prob_acima``, ``prob_acima_226``, ``prob_acima_228``: probabilidade de
+      cada amostra ultrapassar ``teto`` (em qualquer radionuclídeo ou em cada um);
+    - ``faixas``: ``{"Ra226": matriz [realização, faixa], "Ra228": ...}``;
+    - ``amostras``: amostras dentro do teto em cada realização;
+    - ``percentual``: percentual dessas amostras com dose ``<= limite``.
+    """
+    ra226 = np.asarray(ra226, dtype=np.float64)
+    ra228 = np.asarray(ra228, dtype=np.float64)
+    dose = np.asarray(dose, dtype=np.float64)
+    sigma226 = np.nan_to_num(np.abs(np.asarray(incerteza226, dtype=np.float64))) / fator_abrangencia
+    sigma228 = np.nan_to_num(np.abs(np.asarray(incerteza228, dtype=np.float64))) / fator_abrangencia
+    bordas = np.asarray(bordas, dtype=np.float64)
+    n = len(ra226)
+
+    por_bloco = max(1, min(n_realizacoes, memoria_bloco // (2 * 8 * max(n, 1))))
+    tamanhos = [min(por_bloco, n_realizacoes - inicio) for inicio in range(0, n_realizacoes, por_bloco)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    tarefas = [(ra226, sigma226, ra228, sigma228, dose <= limite, teto, bordas, t, s)
+               for t, s in zip(tamanhos, sementes)]
+
+    workers = max_workers or min(len(tarefas), os.cpu_count() or 1)
+    if workers == 1 or len(tarefas) == 1:
+        blocos = [_bloco(t) for t in tarefas]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            blocos = list(pool.map(_bloco, tarefas))
+
+    amostras = np.concatenate([b["amostras"] for b in blocos])
+    dentro = np.concatenate([b["dentro"] for b in blocos])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percentual = np.where(amostras > 0, dentro / amostras * 100, np.nan)
+
+    return {
+        "prob_acima": sum(b["acima"] for b in blocos) / n_realizacoes,
+        "prob_acima_226": sum(b["acima226"] for b in blocos) / n_realizacoes,
+        "prob_acima_228": sum(b["acima228"] for b in blocos) / n_realizacoes,
+        "faixas": {
+            "Ra226": np.concatenate([b["faixas226"] for b in blocos]),
+            "Ra228": np.concatenate([b["faixas228"] for b in blocos]),
+        },
+        "amostras": amostras,
+        "percentual": percentual,
+    }
@@ -0,0 +1,313 @@
+"""Medição de tempo e memória por seção das páginas.
+
+Cada execução (rerun) de uma página cria um ``Perfilador``. As seções são
+marcadas com o gerenciador de contexto ``secao``, com o decorador ``medir``
+ou, para trechos longos do script, com ``etapa``, que encerra a etapa
+anterior e abre a próxima sem exigir reindentação. Ao final, ``finalizar``
+grava uma linha JSON por execução, e ``resumir_log`` calcula p50/p95 da
+latência das execuções e de cada seção.
+
+A memória (pico de alocações via ``tracemalloc``) só é medida quando pedida,
+pois o rastreamento deixa as alocações mais lentas. O ``tracemalloc`` vale
+para o processo inteiro, compartilhado pelas sessões: ``_rastreamento`` é o
+seu único dono, e um perfilador por vez mede memória (os demais registram o
+pico como indisponível). O rastreamento é desligado em ``finalizar``, ao sair
+do bloco ``with`` ou, se a execução foi interrompida (``st.rerun``,
+``st.stop``, exceção), quando o perfilador é descartado ou quando a próxima
+execução da mesma thread começa.
+
+O log é rotacionado ao passar de ``MAX_BYTES_LOG`` (uma cópia ``.1``), e
+``resumir_log`` lê só as linhas novas desde a leitura anterior, guardando em
+memória as últimas ``MAX_EXECUCOES_RESUMO`` execuções.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from dosimetria import ARQUIVO_PADRAO
+from dosimetria.cache import diretorio_cache
+
+_trava_log = threading.Lock()
+
+# Tamanho máximo do log antes da rotação (MB), ajustável por variável de ambiente
+MAX_BYTES_LOG = int(os.environ.get("DOSIMETRIA_PERFIL_LOG_MB", "5")) * 1024 * 1024
+
+# Execuções mais recentes consideradas por resumir_log
+MAX_EXECUCOES_RESUMO = 5000
+
+
+def caminho_log():
+    # Variável de ambiente tem prioridade; senão, junto do cache em disco
+    return Path(os.environ.get("DOSIMETRIA_PERFIL_LOG") or diretorio_cache(ARQUIVO_PADRAO) / "perfil.jsonl")
+
+
+class _DonoRastreamento:
+    """Dono único do ``tracemalloc`` do processo.
+
+    Guarda quem mede a memória (no máximo um perfilador) e quantas
+    referências mantêm o rastreamento ligado. Só desliga o rastreamento que
+    ele mesmo ligou (não o de ``python -X tracemalloc``, por exemplo).
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._referencias = 0
+        self._ligado_aqui = False
+        self._dono = None
+        self._thread_dono = None
+
+    def adquirir(self, perfilador):
+        """Torna ``perfilador`` o dono; ``None`` se outro perfilador já mede a memória."""
+        with self._trava:
+            dono = self._dono() if self._dono is not None else None
+            if dono is not None and self._thread_dono == threading.get_ident():
+                # Execução anterior desta thread interrompida antes de finalizar
+                dono._rastreando = False
+                self._soltar()
+            elif dono is not None:
+                return None
+            elif self._dono is not None:
+                # Dono descartado sem liberar
+                self._soltar()
+
+            self._referencias += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._ligado_aqui = True
+            self._dono = weakref.ref(perfilador)
+            self._thread_dono = threading.get_ident()
+            return self._dono
+
+    def liberar(self, perfilador):
+        with self._trava:
+            if self._dono is not None and self._dono() in (perfilador, None):
+                self._soltar()
+
+    def _soltar(self):
+        self._dono = None
+        self._thread_dono = None
+        self._referencias = max(0, self._referencias - 1)
+        if self._referencias == 0 and self._ligado_aqui:
+            tracemalloc.stop()
+            self._ligado_aqui = False
+
+
+# Instância única por processo
+_rastreamento = _DonoRastreamento()
+
+
+def _liberar_rastreamento(referencia):
+    # weakref.finalize: o perfilador já não existe, libera o que ainda estiver em seu nome
+    with _rastreamento._trava:
+        if _rastreamento._dono is referencia:
+            _rastreamento._soltar()
+
+
+class Perfilador:
+    def __init__(self, pagina, memoria=False):
+        self.pagina = pagina
+        self.memoria = memoria
+        self.registros = []
+        self._pilha = []
+        self._etapa = None
+        self._inicio = time.perf_counter()
+        self._inicio_cpu = time.process_time()
+        self._finalizado = None
+        # Pico de memória só com o rastreamento em nome deste perfilador
+        referencia = _rastreamento.adquirir(self) if memoria else None
+        self._rastreando = referencia is not None
+        if referencia is not None:
+            weakref.finalize(self, _liberar_rastreamento, referencia)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, rastro):
+        if self._finalizado is None:
+            # Interrompido (exceção, st.rerun, st.stop): libera o rastreamento sem registrar
+            self.finalizar(registrar=tipo is None)
+        return False
+
+    def _liberar(self):
+        if self._rastreando:
+            self._rastreando = False
+            _rastreamento.liberar(self)
+
+    @contextmanager
+    def secao(self, nome):
+        """Mede o bloco ``with``; seções aninhadas aparecem como ``pai/filho``."""
+        caminho = "/".join([*(s["nome"] for s in self._pilha), nome])
+        estado = {"nome": nome, "pico_filhos": 0}
+        if self._rastreando:
+            atual, pico_anterior = tracemalloc.get_traced_memory()
+            if self._pilha:
+                # reset_peak apaga o pico em curso da seção pai; guarda-o antes
+                self._pilha[-1]["pico_filhos"] = max(self._pilha[-1]["pico_filhos"], pico_anterior)
+            tracemalloc.reset_peak()
+            estado["memoria_inicial"] = atual
+
+        self._pilha.append(estado)
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            registro = {
+                "secao": caminho,
+                "tempo_s": time.perf_counter() - inicio,
+                "cpu_s": time.process_time() - inicio_cpu,
+            }
+            self._pilha.pop()
+            if self._rastreando and "memoria_inicial" in estado:
+                pico = max(tracemalloc.get_traced_memory()[1], estado["pico_filhos"])
+                registro["pico_mb"] = (pico - estado["memoria_inicial"]) / 2 ** 20
+                if self._pilha:
+                    self._pilha[-1]["pico_filhos"] = max(self._pilha[-1]["pico_filhos"], pico)
+            elif self.memoria:
+                # Memória medida por outra sessão neste momento
+                registro["pico_mb"] = float("nan")
+            self.registros.append(registro)
+
+    def medir(self, nome=None):
+        """Decorador: cada chamada da função vira uma seção."""
+        def decorar(funcao):
+            @functools.wraps(funcao)
+            def envolvida(*args, **kwargs):
+                with self.secao(nome or funcao.__name__):
+                    return funcao(*args, **kwargs)
+            return envolvida
+        return decorar
+
+    def etapa(self, nome):
+        """Encerra a etapa em curso (se houver) e abre ``nome``."""
+        self._encerrar_etapa()
+        self._etapa = self.secao(nome)
+        self._etapa.__enter__()
+
+    def _encerrar_etapa(self):
+        if self._etapa is not None:
+            etapa, self._etapa = self._etapa, None
+            etapa.__exit__(None, None, None)
+
+    def finalizar(self, registrar=True):
+        """Fecha a execução e, com ``registrar``, acrescenta uma linha ao log JSONL."""
+        if self._finalizado is not None:
+            return self._finalizado
+        try:
+            self._encerrar_etapa()
+        finally:
+            memoria_medida = self._rastreando
+            self._liberar()
+        execucao = {
+            "pagina": self.pagina,
+            "momento": datetime.now().isoformat(timespec="seconds"),
+            "tempo_s": time.perf_counter() - self._inicio,
+            "cpu_s": time.process_time() - self._inicio_cpu,
+            "memoria": memoria_medida,
+            "secoes": self.registros,
+        }
+        self._finalizado = execucao
+
+        if registrar:
+            registrar_execucao(execucao)
+        return execucao
+
+
+def registrar_execucao(execucao, caminho=None):
+    """Acrescenta ``execucao`` ao log, rotacionando-o ao passar de ``MAX_BYTES_LOG``."""
+    destino = Path(caminho or caminho_log())
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    linha = json.dumps(execucao, ensure_ascii=False)
+    with _trava_log:
+        if destino.exists() and destino.stat().st_size >= MAX_BYTES_LOG:
+            os.replace(destino, destino.with_name(destino.name + ".1"))
+        with open(destino, "a", encoding="utf-8") as f:
+            f.write(linha + "\n")
+
+
+def _interpretar(linhas, pagina):
+    for linha in linhas:
+        try:
+            execucao = json.loads(linha)
+        except json.JSONDecodeError:
+            continue  # linha truncada por uma escrita interrompida
+        if pagina is None or execucao.get("pagina") == pagina:
+            yield execucao
+
+
+def ler_log(caminho=None, pagina=None):
+    caminho = Path(caminho or caminho_log())
+    if not caminho.exists():
+        return []
+    with open(caminho, encoding="utf-8") as f:
+        return list(_interpretar(f, pagina))
+
+
+class _LeitorLog:
+    """Últimas execuções de um log, lidas de forma incremental (só as linhas novas)."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.execucoes = deque(maxlen=MAX_EXECUCOES_RESUMO)
+        self._posicao = 0
+        self._identidade = None
+
+    def atualizar(self):
+        try:
+            info = os.stat(self.caminho)
+        except FileNotFoundError:
+            return self.execucoes
+        if info.st_ino != self._identidade or info.st_size < self._posicao:
+            # Log rotacionado: as execuções já lidas continuam valendo; lê o arquivo novo do início
+            self._posicao = 0
+            self._identidade = info.st_ino
+        if info.st_size > self._posicao:
+            with open(self.caminho, "rb") as f:
+                f.seek(self._posicao)
+                bloco = f.read(info.st_size - self._posicao)
+            # Só linhas completas; uma escrita em curso fica para a próxima leitura
+            fim = bloco.rfind(b"\n") + 1
+            self._posicao += fim
+            linhas = bloco[:fim].decode("utf-8", errors="replace").splitlines()
+            self.execucoes.extend(_interpretar(linhas, None))
+        return self.execucoes
+
+
+_leitores = {}
+
+
+def execucoes_recentes(caminho=None, pagina=None):
+    """Últimas ``MAX_EXECUCOES_RESUMO`` execuções do log (de ``pagina``, se dada)."""
+    caminho = Path(caminho or caminho_log())
+    with _trava_log:
+        leitor = _leitores.setdefault(str(caminho), _LeitorLog(caminho))
+        execucoes = list(leitor.atualizar())
+    return [e for e in execucoes if pagina is None or e.get("pagina") == pagina]
+
+
+def resumir_log(caminho=None, pagina=None):
+    """p50/p95 (ms) da execução completa e de cada seção, nas execuções recentes do log."""
+    import pandas as pd
+
+    execucoes = execucoes_recentes(caminho, pagina)
+    linhas = [{"secao": "(execução completa)", "tempo_s": e["tempo_s"]} for e in execucoes]
+    linhas += [{"secao": s["secao"], "tempo_s": s["tempo_s"]} for e in execucoes for s in e["secoes"]]
+    if not linhas:
+        return pd.DataFrame(columns=["execuções", "p50 (ms)", "p95 (ms)"])
+
+    tempos = pd.DataFrame(linhas).groupby("secao", sort=False)["tempo_s"]
+    return pd.DataFrame({
+        "execuções": tempos.count(),
+        "p50 (ms)": tempos.apply(lambda t: np.percentile(t, 50) * 1000),
+        "p95 (ms)": tempos.apply(lambda t: np.percentile(t, 95) * 1000),
+    })
@@ -0,0 +1,153 @@
+"""Intervalos de confiança para percentis da dose e para o percentual dentro do limite.
+
+O bootstrap trabalha sobre os índices do array já ordenado: como a ordem dos
+índices é a mesma dos valores, cada percentil de uma reamostra sai de um
+``np.partition`` das linhas de uma matriz de índices, sem ordenar reamostra
+por reamostra. As reamostras são geradas em blocos de memória limitada, cada
+bloco com sua própria semente derivada, de modo que o resultado é o mesmo com
+qualquer número de threads.
+
+Os blocos rodam em um pool de threads: o sorteio, o ``np.partition`` e as
+comparações liberam o GIL, e threads, ao contrário de um pool de processos
+criado com ``fork``, são seguras dentro do servidor multithread do Streamlit.
+"""
+
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Memória máxima (bytes) da matriz de índices de um bloco de reamostras
+MEMORIA_BLOCO = 32 * 1024 * 1024
+
+PERCENTIS_PADRAO = (90, 95, 99)
+
+
+def _posicoes(n, percentis):
+    # Estatísticas de ordem envolvidas na interpolação linear de cada percentil
+    posicoes = (n - 1) * np.asarray(percentis, dtype=np.float64) / 100
+    abaixo = np.floor(posicoes).astype(np.int64)
+    acima = np.minimum(abaixo + 1, n - 1)
+    return abaixo, acima, posicoes - abaixo
+
+
+def _bloco(args):
+    # Executado nas threads do pool: um bloco de reamostras por tarefa
+    ordenados, percentis, posicao_limite, tamanho, semente = args
+    n = len(ordenados)
+    rng = np.random.default_rng(semente)
+    indices = rng.integers(0, n, size=(tamanho, n), dtype=np.int32 if n < 2 ** 31 else np.int64)
+
+    abaixo, acima, fracao = _posicoes(n, percentis)
+    indices.partition(np.unique(np.r_[abaixo, acima]), axis=1)
+    a = ordenados[indices[:, abaixo]]
+    b = ordenados[indices[:, acima]]
+    quantis = a + (b - a) * fracao
+
+    # Índices < posicao_limite correspondem a valores <= limite
+    dentro = np.count_nonzero(indices < posicao_limite, axis=1) / n * 100
+    return quantis, dentro
+
+
+def bootstrap(valores, percentis=PERCENTIS_PADRAO, limite=5.0, n_reamostras=10000,
+              semente=0, max_workers=None, memoria_bloco=MEMORIA_BLOCO):
+    """Distribuições bootstrap dos ``percentis`` e do percentual ``<= limite``.
+
+    Retorna ``(quantis, dentro)``: matriz ``[reamostra, percentil]`` e vetor
+    com o percentual dentro do limite de cada reamostra.
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    ordenados = np.sort(valores[~np.isnan(valores)])
+    n = len(ordenados)
+    if n == 0:
+        return np.full((0, len(percentis)), np.nan), np.empty(0)
+
+    posicao_limite = int(np.searchsorted(ordenados, limite, side="right"))
+    por_bloco = max(1, min(n_reamostras, memoria_bloco // (8 * n)))
+    tamanhos = [min(por_bloco, n_reamostras - inicio) for inicio in range(0, n_reamostras, por_bloco)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    tarefas = [(ordenados, tuple(percentis), posicao_limite, t, s) for t, s in zip(tamanhos, sementes)]
+
+    workers = max_workers or min(len(tarefas), os.cpu_count() or 1)
+    if workers == 1 or len(tarefas) == 1:
+        blocos = [_bloco(t) for t in tarefas]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            blocos = list(pool.map(_bloco, tarefas))
+
+    return np.concatenate([q for q, _ in blocos]), np.concatenate([d for _, d in blocos])
+
+
+def harrell_davis(valores, percentis=PERCENTIS_PADRAO):
+    """Estimativas de Harrell-Davis e erros-padrão de Maritz-Jarrett.
+
+    Cada percentil é uma média ponderada de todas as estatísticas de ordem,
+    com pesos da distribuição Beta((n+1)q, (n+1)(1-q)).
+    """
+    from scipy.stats import beta
+
+    valores = np.asarray(valores, dtype=np.float64)
+    ordenados = np.sort(valores[~np.isnan(valores)])
+    n = len(ordenados)
+    if n == 0:
+        nulos = np.full(len(percentis), np.nan)
+        return nulos, nulos.copy()
+
+    bordas = np.arange(n + 1) / n
+    estimativas, erros = [], []
+    for p in percentis:
+        q = p / 100
+        pesos = np.diff(beta.cdf(bordas, (n + 1) * q, (n + 1) * (1 - q)))
+        c1 = pesos @ ordenados
+        c2 = pesos @ (ordenados * ordenados)
+        estimativas.append(c1)
+        erros.append(math.sqrt(max(c2 - c1 * c1, 0.0)))
+    return np.array(estimativas), np.array(erros)
+
+
+def _wilson(dentro, n, nivel):
+    # Intervalo de Wilson para uma proporção, em percentual
+    from scipy.stats import norm
+
+    if n == 0:
+        return np.nan, np.nan
+    z = norm.ppf(0.5 + nivel / 2)
+    p = dentro / n
+    centro = (p + z * z / (2 * n)) / (1 + z * z / n)
+    meia = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return (centro - meia) * 100, (centro + meia) * 100
+
+
+def intervalos_confianca(valores, percentis=PERCENTIS_PADRAO, limite=5.0, nivel=0.95,
+                         metodo="bootstrap", n_reamostras=10000, semente=0, max_workers=None):
+    """Intervalos de confiança dos percentis da dose e do percentual dentro do limite.
+
+    ``metodo`` é ``"bootstrap"`` (percentil) ou ``"harrell-davis"`` (estimador
+    de Harrell-Davis com aproximação normal; o percentual usa Wilson).
+    Retorna ``{"P95": (inferior, superior), ..., "dentro": (inferior, superior)}``.
+    """
+    cauda = (1 - nivel) / 2 * 100
+
+    if metodo == "bootstrap":
+        quantis, dentro = bootstrap(valores, percentis, limite, n_reamostras, semente, max_workers)
+        if len(dentro) == 0:
+            return {**{f"P{p}": (np.nan, np.nan) for p in percentis}, "dentro": (np.nan, np.nan)}
+        limites_q = np.percentile(quantis, [cauda, 100 - cauda], axis=0)
+        limites_d = np.percentile(dentro, [cauda, 100 - cauda])
+        intervalos = {f"P{p}": (limites_q[0, i], limites_q[1, i]) for i, p in enumerate(percentis)}
+        intervalos["dentro"] = (limites_d[0], limites_d[1])
+        return intervalos
+
+    if metodo == "harrell-davis":
+        from scipy.stats import norm
+
+        estimativas, erros = harrell_davis(valores, percentis)
+        z = norm.ppf(0.5 + nivel / 2)
+        intervalos = {f"P{p}": (e - z * s, e + z * s) for p, e, s in zip(percentis, estimativas, erros)}
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[~np.isnan(valores)]
+        intervalos["dentro"] = _wilson(np.count_nonzero(valores <= limite), len(valores), nivel)
+        return intervalos
+
+    raise ValueError(f"Método desconhecido: {metodo}")
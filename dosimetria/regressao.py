@@ -0,0 +1,263 @@
+"""Regressão da taxa de dose sobre as concentrações de Ra-226 e Ra-228.
+
+Três modelos são ajustados juntos: dose ~ Ra-226, dose ~ Ra-228 e
+dose ~ Ra-226 + Ra-228. Todos saem da mesma matriz de Gram ``X'WX`` do
+modelo conjunto (os modelos simples usam sub-blocos dela), e vários grupos
+(por site, ano ou tipo de resíduo) são acumulados com ``np.bincount`` e
+resolvidos em uma única chamada de ``np.linalg.solve`` sobre a pilha
+``[grupo, modelo]``.
+
+Métodos:
+
+- ``"mqo"``: mínimos quadrados ordinários (igual a ``scipy.stats.linregress``
+  nos modelos simples);
+- ``"incerteza"``: mínimos quadrados ponderados pela variância efetiva
+  ``s² + Σ b_j² u_j²``, com ``u_j`` a incerteza declarada da concentração e
+  ``s²`` a variância residual, reavaliados iterativamente;
+- ``"huber"``: M-estimador de Huber por mínimos quadrados reponderados;
+- ``"theil-sen"``: mediana das inclinações entre pares (só modelos simples).
+"""
+
+import numpy as np
+import pandas as pd
+
+from dosimetria import COL_DOSE, COL_RA226, COL_RA228
+
+MODELOS = ("Ra-226", "Ra-228", "Ra-226 + Ra-228")
+
+# Colunas do modelo conjunto (intercepto, Ra-226, Ra-228) usadas por cada modelo
+_MASCARAS = np.array([
+    [True, True, False],
+    [True, False, True],
+    [True, True, True],
+])
+
+METODOS = ("mqo", "incerteza", "huber", "theil-sen")
+
+# Constante de ajuste do Huber (95% de eficiência sob normalidade)
+HUBER_C = 1.345
+
+# Máximo de pares usados pelo Theil-Sen; acima disso os pares são sorteados
+MAX_PARES_THEIL_SEN = 2_000_000
+
+
+def _gram(codigos, n_grupos, X, y, pesos):
+    """Estatísticas suficientes ponderadas de cada (modelo, grupo).
+
+    ``pesos`` tem forma ``[modelo, linha]``. Retorna ``G`` ``[modelo, grupo,
+    3, 3]``, ``Xty`` ``[modelo, grupo, 3]`` e os somatórios de ``w``, ``wy``
+    e ``wy²`` ``[modelo, grupo]``.
+    """
+    n_modelos = len(pesos)
+    G = np.empty((n_modelos, n_grupos, 3, 3))
+    Xty = np.empty((n_modelos, n_grupos, 3))
+    somas = np.empty((3, n_modelos, n_grupos))
+    for m, w in enumerate(pesos):
+        for j in range(3):
+            for k in range(j, 3):
+                G[m, :, j, k] = G[m, :, k, j] = np.bincount(codigos, weights=w * X[:, j] * X[:, k],
+                                                            minlength=n_grupos)
+            Xty[m, :, j] = np.bincount(codigos, weights=w * X[:, j] * y, minlength=n_grupos)
+        somas[0, m] = np.bincount(codigos, weights=w, minlength=n_grupos)
+        somas[1, m] = np.bincount(codigos, weights=w * y, minlength=n_grupos)
+        somas[2, m] = np.bincount(codigos, weights=w * y * y, minlength=n_grupos)
+    return G, Xty, somas
+
+
+def _resolver(G, Xty):
+    """Coeficientes e inversas de ``G`` para todos os (modelo, grupo) de uma vez.
+
+    Variáveis fora do modelo recebem 1 na diagonal e 0 no resto, o que zera o
+    coeficiente correspondente sem mudar o tamanho do sistema.
+    """
+    fora = ~_MASCARAS[:len(G)]
+    G = G.copy()
+    Xty = Xty.copy()
+    for m in range(len(G)):
+        for j in np.flatnonzero(fora[m]):
+            G[m, :, j, :] = 0.0
+            G[m, :, :, j] = 0.0
+            G[m, :, j, j] = 1.0
+            Xty[m, :, j] = 0.0
+
+    # Grupos singulares (poucas amostras ou concentração constante) ficam com NaN
+    singulares = np.abs(np.linalg.det(G)) < 1e-12 * np.maximum(np.einsum("mgii->mg", G) ** 3, 1e-300)
+    G[singulares] = np.eye(3)
+    inversas = np.linalg.inv(G)
+    coeficientes = np.einsum("mgjk,mgk->mgj", inversas, Xty)
+    coeficientes[singulares] = np.nan
+    inversas[singulares] = np.nan
+    for m in range(len(G)):
+        inversas[m, :, fora[m], :] = 0.0
+        inversas[m, :, :, fora[m]] = 0.0
+    return coeficientes, inversas
+
+
+def _residuos(codigos, X, y, coeficientes):
+    # Resíduos de cada linha em cada modelo, com os coeficientes do seu grupo
+    return y[None, :] - np.einsum("ij,mij->mi", X, coeficientes[:, codigos, :])
+
+
+def _mad(residuos, codigos, n_grupos):
+    # Escala robusta (MAD normalizado) dos resíduos de cada (modelo, grupo)
+    escala = np.full((len(residuos), n_grupos), np.nan)
+    ordem = np.argsort(codigos, kind="stable")
+    inicios = np.searchsorted(codigos[ordem], np.arange(n_grupos + 1))
+    for g in range(n_grupos):
+        linhas = ordem[inicios[g]:inicios[g + 1]]
+        if len(linhas):
+            r = residuos[:, linhas]
+            escala[:, g] = np.median(np.abs(r - np.median(r, axis=1, keepdims=True)), axis=1) / 0.6745
+    return escala
+
+
+def _theil_sen(x, y, rng):
+    n = len(x)
+    if n < 2:
+        return np.nan, np.nan
+    if n * (n - 1) // 2 <= MAX_PARES_THEIL_SEN:
+        i, j = np.triu_indices(n, k=1)
+    else:
+        i = rng.integers(0, n, MAX_PARES_THEIL_SEN)
+        j = rng.integers(0, n, MAX_PARES_THEIL_SEN)
+    dx = x[j] - x[i]
+    validos = dx != 0
+    if not validos.any():
+        return np.nan, np.nan
+    inclinacao = np.median((y[j] - y[i])[validos] / dx[validos])
+    return np.median(y - inclinacao * x), inclinacao
+
+
+def ajustar_regressoes(ra226, ra228, dose, incerteza226=None, incerteza228=None, grupos=None,
+                       metodo="mqo", max_iteracoes=50, tolerancia=1e-10):
+    """Ajusta os três modelos em cada grupo e devolve uma tabela longa.
+
+    ``grupos`` é um array de rótulos por linha (``None`` = um único grupo).
+    Linhas com dose ou concentração ausente são descartadas. A tabela tem uma
+    linha por (grupo, modelo) com ``n``, coeficientes, erros-padrão, R² e
+    valores-p das inclinações (teste t bicaudal).
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método desconhecido: {metodo}")
+
+    ra226 = np.asarray(ra226, dtype=np.float64)
+    ra228 = np.asarray(ra228, dtype=np.float64)
+    y = np.asarray(dose, dtype=np.float64)
+    u226 = np.zeros_like(ra226) if incerteza226 is None else np.asarray(incerteza226, dtype=np.float64)
+    u228 = np.zeros_like(ra228) if incerteza228 is None else np.asarray(incerteza228, dtype=np.float64)
+    rotulos_linhas = np.zeros(len(y), dtype=np.int64) if grupos is None else np.asarray(grupos)
+
+    validos = ~(np.isnan(ra226) | np.isnan(ra228) | np.isnan(y))
+    ra226, ra228, y = ra226[validos], ra228[validos], y[validos]
+    u226, u228 = np.nan_to_num(u226[validos]), np.nan_to_num(u228[validos])
+    rotulos, codigos = np.unique(rotulos_linhas[validos], return_inverse=True)
+    n_grupos = len(rotulos)
+
+    X = np.column_stack([np.ones_like(y), ra226, ra228])
+    pesos = np.ones((3, len(y)))
+    G, Xty, somas = _gram(codigos, n_grupos, X, y, pesos)
+    coeficientes, inversas = _resolver(G, Xty)
+
+    if metodo in ("incerteza", "huber"):
+        for _ in range(max_iteracoes):
+            residuos = _residuos(codigos, X, y, coeficientes)
+            if metodo == "incerteza":
+                # Variância residual do ajuste atual + incerteza propagada das concentrações
+                w_atual = pesos
+                sw = np.bincount(codigos, minlength=n_grupos)
+                s2 = np.stack([np.bincount(codigos, weights=w * r * r, minlength=n_grupos) /
+                               np.bincount(codigos, weights=w, minlength=n_grupos)
+                               for w, r in zip(w_atual, residuos)])
+                s2 = np.where(sw[None, :] > 0, s2, np.nan)
+                b = coeficientes[:, codigos, :]
+                variancia = s2[:, codigos] + b[:, :, 1] ** 2 * u226 ** 2 + b[:, :, 2] ** 2 * u228 ** 2
+                novos_pesos = 1.0 / np.maximum(variancia, 1e-12)
+                # Pesos relativos: a escala é reestimada pelos resíduos
+                novos_pesos /= np.nanmean(novos_pesos, axis=1, keepdims=True)
+            else:
+                escala = _mad(residuos, codigos, n_grupos)[:, codigos]
+                limite = HUBER_C * np.maximum(escala, 1e-12)
+                novos_pesos = np.minimum(1.0, limite / np.maximum(np.abs(residuos), 1e-300))
+            novos_pesos = np.nan_to_num(novos_pesos)
+
+            pesos = novos_pesos
+            G, Xty, somas = _gram(codigos, n_grupos, X, y, pesos)
+            novos, inversas = _resolver(G, Xty)
+            convergiu = np.nanmax(np.abs(novos - coeficientes), initial=0.0) < tolerancia
+            coeficientes = novos
+            if convergiu:
+                break
+
+    n = np.bincount(codigos, minlength=n_grupos)
+    p = _MASCARAS.sum(axis=1)[:, None]
+
+    if metodo == "theil-sen":
+        rng = np.random.default_rng(0)
+        coeficientes = np.full((3, n_grupos, 3), np.nan)
+        for g in range(n_grupos):
+            linhas = codigos == g
+            for m, coluna in ((0, ra226), (1, ra228)):
+                intercepto, inclinacao = _theil_sen(coluna[linhas], y[linhas], rng)
+                coeficientes[m, g, 0] = intercepto
+                coeficientes[m, g, m + 1] = inclinacao
+                coeficientes[m, g, 2 - m] = 0.0
+        residuos = _residuos(codigos, X, y, coeficientes)
+        ssr = np.stack([np.bincount(codigos, weights=r * r, minlength=n_grupos) for r in residuos])
+        sst = somas[2] - somas[1] ** 2 / np.where(somas[0] > 0, somas[0], np.nan)
+        erros = np.full_like(coeficientes, np.nan)
+        valores_p = np.full_like(coeficientes, np.nan)
+    else:
+        # SQ residual e total ponderadas, sem voltar às linhas: y'Wy - b'X'Wy
+        ssr = somas[2] - np.einsum("mgj,mgj->mg", coeficientes, Xty)
+        sst = somas[2] - somas[1] ** 2 / np.where(somas[0] > 0, somas[0], np.nan)
+        graus = n[None, :] - p
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variancia = np.where(graus > 0, np.maximum(ssr, 0.0) / graus, np.nan)
+            erros = np.sqrt(np.einsum("mgjj->mgj", inversas) * variancia[:, :, None])
+            t = coeficientes / erros
+
+        from scipy.stats import t as distribuicao_t
+
+        valores_p = 2 * distribuicao_t.sf(np.abs(t), np.maximum(graus, 1)[:, :, None])
+        valores_p = np.where(graus[:, :, None] > 0, valores_p, np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r2 = 1 - ssr / sst
+
+    linhas = []
+    for g, rotulo in enumerate(rotulos):
+        for m, modelo in enumerate(MODELOS):
+            usa = _MASCARAS[m]
+            linhas.append({
+                "grupo": rotulo,
+                "modelo": modelo,
+                "n": int(n[g]),
+                "intercepto": coeficientes[m, g, 0],
+                "coef_ra226": coeficientes[m, g, 1] if usa[1] else np.nan,
+                "coef_ra228": coeficientes[m, g, 2] if usa[2] else np.nan,
+                "erro_intercepto": erros[m, g, 0],
+                "erro_ra226": erros[m, g, 1] if usa[1] else np.nan,
+                "erro_ra228": erros[m, g, 2] if usa[2] else np.nan,
+                "p_ra226": valores_p[m, g, 1] if usa[1] else np.nan,
+                "p_ra228": valores_p[m, g, 2] if usa[2] else np.nan,
+                "r2": r2[m, g],
+            })
+    tabela = pd.DataFrame(linhas)
+    tabela.attrs["metodo"] = metodo
+    return tabela
+
+
+def regressoes_dataframe(df, metodo="mqo", grupo=None):
+    """Atalho para um DataFrame com as colunas das planilhas.
+
+    ``grupo`` é o nome de uma coluna (por exemplo ``site``) ou ``None``.
+    """
+    incerteza226 = df["Incerteza"] if "Incerteza" in df.columns else None
+    incerteza228 = df["Incerteza.1"] if "Incerteza.1" in df.columns else None
+    if metodo == "incerteza" and (incerteza226 is None or incerteza228 is None):
+        raise KeyError("As colunas 'Incerteza' e 'Incerteza.1' são necessárias para o método 'incerteza'")
+    return ajustar_regressoes(
+        df[COL_RA226], df[COL_RA228], df[COL_DOSE], incerteza226, incerteza228,
+        grupos=None if grupo is None else df[grupo].astype(str).to_numpy(),
+        metodo=metodo,
+    )
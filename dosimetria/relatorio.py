@@ -0,0 +1,346 @@
+"""Relatório de validação do limite de dose sem Streamlit.
+
+Executa a mesma análise da página principal (métricas, semáforo, percentis
+com intervalos de confiança, faixas por radionuclídeo e recomendação) para
+qualquer combinação de sites, tetos de concentração e limites de dose, e
+grava o resultado em JSON, HTML e/ou PDF. Os cenários são distribuídos por
+um pool de processos; cada processo recebe os dados uma única vez.
+
+Uso::
+
+    python -m dosimetria.relatorio --sites Macaé TIMS Macaé,TIMS --tetos 8 10 todos \\
+        --limites 5 --formatos json html pdf --saida relatorios/
+"""
+
+import argparse
+import base64
+import html
+import io
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dosimetria import ARQUIVO_PADRAO, COL_DOSE, COL_RA226, COL_RA228
+from dosimetria.estatisticas import decidir_recomendacao, impressao_digital
+from dosimetria.grafo import grafo_analise
+from dosimetria.resultados import carregar_resultados, filtrar_teto
+from dosimetria.sites import COL_SITE
+
+COLUNAS = [COL_DOSE, COL_RA226, COL_RA228]
+
+# Dados compartilhados pelos cenários de um processo (definidos em _iniciar)
+_dados = None
+
+
+def carregar_dados(origem=ARQUIVO_PADRAO):
+    # Mesma leitura das páginas: resultados "< CMD" / "< 0,03" entram com o limite de detecção
+    df = carregar_resultados(origem, COLUNAS)
+    df.attrs["impressao"] = impressao_digital(df[COLUNAS].to_numpy())
+    return df
+
+
+def selecionar(df, sites=None, teto=8.0):
+    """Linhas analisadas em um cenário, com o mesmo filtro de ``load_data()``.
+
+    ``teto=None`` equivale a "Mostrar análise com todos os dados".
+    """
+    if sites is not None:
+        df = df[df[COL_SITE].isin(sites)]
+    return filtrar_teto(df, teto)
+
+
+def _numero(valor):
+    # Escalar JSON: NaN/inf viram None
+    valor = float(valor)
+    return valor if math.isfinite(valor) else None
+
+
+def analisar_cenario(df, sites=None, teto=8.0, limite=5.0, n_reamostras=10000, nome=None):
+    """Resultados de um cenário como um dicionário serializável em JSON.
+
+    Os números vêm do mesmo grafo de cálculos da página principal
+    (``dosimetria.grafo.grafo_analise``).
+    """
+    inicio = time.perf_counter()
+    dados = selecionar(df, sites, teto)
+    impressao = df.attrs.get("impressao") or impressao_digital(df[COLUNAS].to_numpy())
+    chave = (impressao, tuple(sites) if sites is not None else None, teto)
+    # Um processo por cenário no pool: o bootstrap roda no próprio processo
+    grafo = grafo_analise(dados, chave, limite, n_reamostras=n_reamostras, max_workers=1)
+    resumo = grafo["resumo_dose"]
+    contagens = grafo["contagens"]
+    total = contagens["total"]
+
+    intervalos = None
+    if n_reamostras and resumo.count:
+        intervalos = {chave: [_numero(inferior), _numero(superior)]
+                      for chave, (inferior, superior) in grafo["intervalos"].items()}
+        recomendacao = grafo["recomendacao"]
+    else:
+        recomendacao = decidir_recomendacao(contagens["percentual_ate_limite"], resumo.percentil(95), limite)
+
+    radionuclideos = {
+        nome_nuclideo: {chave: _numero(valor) if isinstance(valor, float) else int(valor)
+                        for chave, valor in valores.items()}
+        for nome_nuclideo, valores in grafo["radionuclideos"].items()
+    }
+    estatisticas = grafo["estatisticas_dose"]
+    histograma, bordas = np.histogram(resumo.ordenados, bins=15) if resumo.count else (np.array([]), np.array([]))
+
+    return {
+        "nome": nome or descrever(sites, teto, limite),
+        "sites": list(sites) if sites is not None else None,
+        "teto": teto,
+        "limite": limite,
+        "total_amostras": total,
+        "dentro_limite": contagens["ate_limite"],
+        "acima_limite": contagens["acima_limite"],
+        "percentual_dentro": contagens["percentual_ate_limite"],
+        "percentual_acima": contagens["percentual_acima_limite"],
+        "dose_maxima": _numero(resumo.max) if resumo.count else None,
+        "semaforo": {
+            "ate_3": resumo.contar_ate(3.0),
+            "3_limite": resumo.contar_entre(3.0, limite),
+            "acima_limite": contagens["acima_limite"],
+        },
+        "percentis": {f"P{p}": _numero(valor) for p, valor in grafo["percentis_dose"].items()},
+        "intervalos": intervalos,
+        "estatisticas_dose": {chave: _numero(valor) for chave, valor in estatisticas.items()}
+        if estatisticas is not None else None,
+        "radionuclideos": radionuclideos,
+        "recomendacao": str(recomendacao),
+        "histograma": {"contagens": histograma.tolist(), "bordas": bordas.tolist()},
+        "duracao_s": time.perf_counter() - inicio,
+    }
+
+
+def descrever(sites, teto, limite):
+    sites = "todos os sites" if sites is None else " + ".join(sites)
+    teto = "todos os dados" if teto is None else f"≤ {teto:g} Bq/g"
+    return f"{sites} | {teto} | limite {limite:g} µSv/h"
+
+
+def _iniciar(df):
+    global _dados
+    _dados = df
+
+
+def _tarefa(args):
+    # Executada nos processos do pool: um cenário por tarefa
+    cenario, n_reamostras = args
+    return analisar_cenario(_dados, n_reamostras=n_reamostras, **cenario)
+
+
+def executar_cenarios(df, cenarios, n_reamostras=10000, max_workers=None):
+    """Analisa ``cenarios`` (dicionários com sites/teto/limite/nome) em paralelo.
+
+    Retorna ``(resultados, duracao_s)``, na mesma ordem de ``cenarios``.
+    """
+    inicio = time.perf_counter()
+    tarefas = [(cenario, n_reamostras) for cenario in cenarios]
+    workers = max_workers or min(len(tarefas), os.cpu_count() or 1)
+    if workers <= 1 or len(tarefas) <= 1:
+        resultados = [analisar_cenario(df, n_reamostras=n_reamostras, **cenario) for cenario in cenarios]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar, initargs=(df,)) as pool:
+            resultados = list(pool.map(_tarefa, tarefas))
+    return resultados, time.perf_counter() - inicio
+
+
+def montar_cenarios(sites, tetos, limites):
+    """Produto cartesiano dos grupos de sites, tetos e limites.
+
+    Cada grupo de sites é um nome, nomes separados por vírgula ou ``todos``;
+    cada teto é um número ou ``todos`` (sem filtro de concentração).
+    """
+    grupos = [None if g == "todos" else [s.strip() for s in g.split(",")] for g in sites]
+    tetos = [None if t == "todos" else float(t) for t in tetos]
+    return [
+        {"sites": grupo, "teto": teto, "limite": float(limite)}
+        for grupo, teto, limite in itertools.product(grupos, tetos, limites)
+    ]
+
+
+def _figura_distribuicao(resultado):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 4.5))
+    limite = resultado["limite"]
+    histograma = resultado["histograma"]
+    maior = max(10, resultado["dose_maxima"] or 0)
+    ax.axvspan(0, 3.0, alpha=0.3, color="green", label="≤ 3.0 µSv/h")
+    ax.axvspan(3.0, limite, alpha=0.3, color="yellow", label=f"3.0 - {limite:g} µSv/h")
+    ax.axvspan(limite, maior, alpha=0.3, color="red", label=f"> {limite:g} µSv/h")
+    if histograma["contagens"]:
+        ax.stairs(histograma["contagens"], histograma["bordas"], fill=True, alpha=0.7,
+                  color="blue", edgecolor="black")
+    for chave, cor in (("P90", "orange"), ("P95", "red")):
+        if resultado["percentis"][chave] is not None:
+            ax.axvline(resultado["percentis"][chave], color=cor, linestyle="--", linewidth=2,
+                       label=f"{chave} = {resultado['percentis'][chave]:.2f} µSv/h")
+    ax.set_xlabel("Taxa de Dose (µSv/h)")
+    ax.set_ylabel("Número de Amostras")
+    ax.set_title(resultado["nome"])
+    ax.legend(fontsize=8)
+    ax.grid(True, alpha=0.3)
+    return fig
+
+
+def _linhas_resumo(resultado):
+    # Pares (rótulo, valor) comuns ao HTML e ao PDF
+    def fmt(valor, casas=2):
+        return "N/A" if valor is None else f"{valor:.{casas}f}"
+
+    linhas = [
+        ("Recomendação", resultado["recomendacao"]),
+        ("Total de amostras", str(resultado["total_amostras"])),
+        ("Dentro do limite", f"{resultado['dentro_limite']} ({resultado['percentual_dentro']:.1f}%)"),
+        ("Acima do limite", f"{resultado['acima_limite']} ({resultado['percentual_acima']:.1f}%)"),
+        ("Maior dose (µSv/h)", fmt(resultado["dose_maxima"])),
+    ]
+    for chave, valor in resultado["percentis"].items():
+        texto = fmt(valor)
+        if resultado["intervalos"]:
+            inferior, superior = resultado["intervalos"][chave]
+            texto += f" (IC 95%: {fmt(inferior)} a {fmt(superior)})"
+        linhas.append((f"{chave} (µSv/h)", texto))
+    for nome, valores in resultado["radionuclideos"].items():
+        linhas.append((f"{nome}: amostras / média / máxima (Bq/g)",
+                       f"{valores['total']} / {fmt(valores['media'])} / {fmt(valores['maxima'])}"))
+    return linhas
+
+
+def _taxa(relatorio):
+    # Sem duração mensurável (nenhum cenário, relógio grosseiro) a taxa fica indefinida
+    taxa = relatorio["cenarios_por_segundo"]
+    return "N/A" if taxa is None else f"{taxa:.2f}"
+
+
+def gravar_json(relatorio, destino):
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+
+def gravar_html(relatorio, destino):
+    partes = [
+        "<!DOCTYPE html><html lang='pt-BR'><head><meta charset='utf-8'>",
+        "<title>Validação do Limite Operacional</title>",
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:1em}"
+        "td,th{border:1px solid #ccc;padding:4px 8px;text-align:left}</style></head><body>",
+        "<h1>Validação do Limite Operacional de Dose</h1>",
+        f"<p>Gerado em {html.escape(relatorio['gerado_em'])} a partir de "
+        f"{html.escape(relatorio['origem'])} ({relatorio['cenarios']} cenários, "
+        f"{_taxa(relatorio)} cenários/s).</p>",
+    ]
+
+    tabela = pd.DataFrame([
+        {
+            "Cenário": r["nome"],
+            "Amostras": r["total_amostras"],
+            "Dentro do limite (%)": round(r["percentual_dentro"], 1),
+            "P95 (µSv/h)": r["percentis"]["P95"],
+            "Recomendação": r["recomendacao"],
+        }
+        for r in relatorio["resultados"]
+    ])
+    partes.append(tabela.to_html(index=False, na_rep="N/A", float_format=lambda v: f"{v:.2f}"))
+
+    import matplotlib.pyplot as plt
+
+    for resultado in relatorio["resultados"]:
+        partes.append(f"<h2>{html.escape(resultado['nome'])}</h2><table>")
+        for rotulo, valor in _linhas_resumo(resultado):
+            partes.append(f"<tr><th>{html.escape(rotulo)}</th><td>{html.escape(valor)}</td></tr>")
+        partes.append("</table>")
+
+        fig = _figura_distribuicao(resultado)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
+        plt.close(fig)
+        imagem = base64.b64encode(buffer.getvalue()).decode("ascii")
+        partes.append(f"<img alt='Distribuição' src='data:image/png;base64,{imagem}'>")
+
+    partes.append("</body></html>")
+    Path(destino).write_text("\n".join(partes), encoding="utf-8")
+
+
+def gravar_pdf(relatorio, destino):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    with PdfPages(destino) as pdf:
+        for resultado in relatorio["resultados"]:
+            fig = _figura_distribuicao(resultado)
+            fig.set_size_inches(8.27, 11.69)
+            fig.subplots_adjust(top=0.45)
+            texto = "\n".join(f"{rotulo}: {valor}" for rotulo, valor in _linhas_resumo(resultado))
+            fig.text(0.08, 0.95, f"Validação do Limite Operacional — {resultado['nome']}",
+                     fontsize=11, weight="bold", va="top")
+            fig.text(0.08, 0.91, texto, fontsize=9, va="top", family="monospace")
+            pdf.savefig(fig)
+            plt.close(fig)
+
+
+ESCRITORES = {"json": gravar_json, "html": gravar_html, "pdf": gravar_pdf}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relatório de validação do limite de dose (sem Streamlit)")
+    parser.add_argument("--origem", default=ARQUIVO_PADRAO, help="planilha .xlsx ou diretório com uma por site")
+    parser.add_argument("--sites", nargs="+", default=["todos"],
+                        help="grupos de sites: nome, nomes separados por vírgula ou 'todos'")
+    parser.add_argument("--tetos", nargs="+", default=["8"], help="tetos de concentração (Bq/g) ou 'todos'")
+    parser.add_argument("--limites", nargs="+", type=float, default=[5.0], help="limites de dose (µSv/h)")
+    parser.add_argument("--cenarios", help="arquivo JSON com uma lista de cenários {sites, teto, limite, nome}")
+    parser.add_argument("--reamostras", type=int, default=10000, help="reamostras bootstrap (0 desativa)")
+    parser.add_argument("--formatos", nargs="+", choices=sorted(ESCRITORES), default=["json"])
+    parser.add_argument("--saida", default=".", help="diretório de saída")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: núcleos disponíveis)")
+    args = parser.parse_args(argv)
+
+    if args.cenarios:
+        with open(args.cenarios, encoding="utf-8") as f:
+            cenarios = json.load(f)
+    else:
+        cenarios = montar_cenarios(args.sites, args.tetos, args.limites)
+
+    df = carregar_dados(args.origem)
+    resultados, duracao = executar_cenarios(df, cenarios, args.reamostras, args.workers)
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "origem": str(args.origem),
+        "impressao": df.attrs["impressao"],
+        "cenarios": len(resultados),
+        "duracao_s": duracao,
+        "cenarios_por_segundo": len(resultados) / duracao if duracao > 0 else None,
+        "resultados": resultados,
+    }
+
+    saida = Path(args.saida)
+    saida.mkdir(parents=True, exist_ok=True)
+    for formato in args.formatos:
+        destino = saida / f"relatorio.{formato}"
+        ESCRITORES[formato](relatorio, destino)
+        print(f"Gravado {destino}", file=sys.stderr)
+
+    print(f"{len(resultados)} cenários em {duracao:.2f} s ({_taxa(relatorio)} cenários/s)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Carga dos resultados radiométricos comum às páginas e ao relatório.
+
+Todas as análises leem a planilha pelo mesmo caminho, para que contem as
+mesmas amostras:
+
+- ``ler_resultados``: linhas brutas de cada site, com os resultados como
+  texto (junto com as colunas CMD) e os lotes preenchidos por site;
+- ``preparar_resultados``: resultados censurados ("< CMD", "< 0,03") com o
+  limite de detecção, via ``dosimetria.censura.aplicar_censura``;
+- ``filtrar_teto``: linhas com Ra-226 e Ra-228 até o teto de concentração.
+"""
+
+import pandas as pd
+
+from dosimetria import ARQUIVO_PADRAO, COL_DOSE, COL_RA226, COL_RA228
+from dosimetria.censura import PARES_CENSURA, aplicar_censura
+from dosimetria.incremental import COLUNAS_CHAVE, preencher_lotes
+from dosimetria.sites import carregar_sites
+
+# Colunas usadas na análise
+COLUNAS_ANALISE = [COL_DOSE, COL_RA226, COL_RA228]
+
+# Colunas com a CMD de cada radionuclídeo (usadas nos resultados "< CMD")
+COLUNAS_CMD = [coluna_cmd for coluna_cmd, _ in PARES_CENSURA.values()]
+
+
+def ler_resultados(origem=ARQUIVO_PADRAO, colunas=COLUNAS_ANALISE, planilhas=None):
+    """Linhas brutas dos sites de ``origem`` (todas as colunas, com ``colunas=None``).
+
+    Além de ``colunas``, traz as CMD e as colunas que identificam cada
+    amostra. Só a taxa de dose é convertida aqui; os resultados ficam como
+    texto para ``preparar_resultados``.
+    """
+    if colunas is not None:
+        colunas = list(dict.fromkeys([*colunas, *COLUNAS_CMD, *COLUNAS_CHAVE]))
+    df = carregar_sites(origem, colunas, numericas=[COL_DOSE], planilhas=planilhas)
+    # Lotes (células mescladas) repetidos nas linhas brutas de cada site, antes dos filtros
+    return preencher_lotes(df)
+
+
+def preparar_resultados(bruto, manter_cmd=False):
+    """Resultados numéricos, com os censurados no limite de detecção (marcados em ``Censurado_*``)."""
+    df = aplicar_censura(bruto)
+    df[COL_DOSE] = pd.to_numeric(df[COL_DOSE], errors="coerce")
+    if not manter_cmd:
+        df = df.drop(columns=COLUNAS_CMD, errors="ignore")
+    return df
+
+
+def carregar_resultados(origem=ARQUIVO_PADRAO, colunas=COLUNAS_ANALISE):
+    return preparar_resultados(ler_resultados(origem, colunas))
+
+
+def filtrar_teto(df, teto=8.0):
+    """Linhas com Ra-226 e Ra-228 até ``teto`` Bq/g e dose informada; ``teto=None`` não filtra."""
+    if teto is None:
+        return df
+    return df[
+        (df[COL_RA226] <= teto) &
+        (df[COL_RA228] <= teto) &
+        df[COL_RA226].notna() &
+        df[COL_RA228].notna() &
+        df[COL_DOSE].notna()
+    ].copy()
@@ -0,0 +1,258 @@
+"""Carga de várias planilhas (sites) em um único esquema.
+
+Cada planilha com resultados radiométricos vira um conjunto de linhas
+identificado pela coluna ``site``. As planilhas são lidas em paralelo, uma
+por processo (por thread, dentro do servidor do Streamlit), e cada uma tem
+sua própria entrada no cache em disco, chaveada pelo conteúdo da parte XML
+da planilha dentro do .xlsx, dos textos compartilhados que ela usa e dos
+formatos numéricos. Assim, editar uma planilha (inclusive os seus textos)
+invalida apenas a entrada dela.
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+import threading
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from dosimetria import COL_DOSE
+from dosimetria.cache import carregar_colunas, carregar_planilha
+from dosimetria.leitura import nomes_unicos
+
+COL_SITE = "site"
+
+# Nomes equivalentes usados nas diferentes planilhas
+ALIASES_COLUNAS = {
+    "Resultado Ra-226": "Resultado_ra226",
+    "Resultado Ra-228": "Resultado_ra228",
+}
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL_DOC = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_REL_PKG = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_TEXTOS = "xl/sharedStrings.xml"
+_ESTILOS = "xl/styles.xml"
+
+# Índice do texto compartilhado de cada célula de texto (t="s") e cada texto (<si>)
+_CELULA_TEXTO = re.compile(rb'<(?:\w+:)?c\b[^>]*?\bt="s"[^>]*>\s*<(?:\w+:)?v>(\d+)<', re.DOTALL)
+_ITEM_TEXTO = re.compile(rb"<(?:\w+:)?si\b(?:[^>]*/>|.*?</(?:\w+:)?si>)", re.DOTALL)
+
+# Memórias por processo, limitadas e protegidas por trava (o servidor é multithread)
+MAX_MEMORIA = 32
+_trava = threading.Lock()
+_descobertas = OrderedDict()
+_referencias = OrderedDict()
+_textos = OrderedDict()
+
+
+def _lembrar(memoria, chave, calcular):
+    with _trava:
+        if chave in memoria:
+            memoria.move_to_end(chave)
+            return memoria[chave]
+    valor = calcular()
+    with _trava:
+        memoria[chave] = valor
+        while len(memoria) > MAX_MEMORIA:
+            memoria.popitem(last=False)
+    return valor
+
+
+def normalizar_nome(coluna):
+    return ALIASES_COLUNAS.get(coluna, coluna)
+
+
+def listar_arquivos(origem):
+    # Aceita uma planilha ou um diretório com uma planilha por site
+    origem = Path(origem)
+    if origem.is_dir():
+        return sorted(p for p in origem.glob("*.xlsx") if not p.name.startswith("~$"))
+    return [origem]
+
+
+def _partes_planilhas(arquivo_zip):
+    workbook = ET.fromstring(arquivo_zip.read("xl/workbook.xml"))
+    relacoes = ET.fromstring(arquivo_zip.read("xl/_rels/workbook.xml.rels"))
+    alvos = {r.get("Id"): r.get("Target") for r in relacoes.iter(f"{_NS_REL_PKG}Relationship")}
+
+    partes = {}
+    for planilha in workbook.iter(f"{_NS_MAIN}sheet"):
+        alvo = alvos[planilha.get(f"{_NS_REL_DOC}id")]
+        if alvo.startswith("/"):
+            partes[planilha.get("name")] = alvo.lstrip("/")
+        else:
+            partes[planilha.get("name")] = posixpath.normpath(posixpath.join("xl", alvo))
+    return partes
+
+
+def _crc(info):
+    return f"{info.CRC:08x}:{info.file_size}"
+
+
+def _textos_referenciados(arquivo_zip, info):
+    # Índices (ordenados) dos textos compartilhados usados pela planilha; só muda com a planilha
+    def ler():
+        indices = {int(i) for i in _CELULA_TEXTO.findall(arquivo_zip.read(info.filename))}
+        return sorted(indices)
+    return _lembrar(_referencias, (info.filename, _crc(info)), ler)
+
+
+def _itens_textos(arquivo_zip, info):
+    # Hash de cada texto compartilhado (<si>), na ordem do arquivo
+    def ler():
+        return [hashlib.blake2b(item, digest_size=16).digest()
+                for item in _ITEM_TEXTO.findall(arquivo_zip.read(info.filename))]
+    return _lembrar(_textos, (info.filename, _crc(info)), ler)
+
+
+def _formatos_numericos(arquivo_zip, info):
+    # Só o que muda o valor lido: formatos numéricos (datas) e o formato de cada estilo de célula
+    estilos = ET.fromstring(arquivo_zip.read(info.filename))
+    formatos = [(f.get("numFmtId"), f.get("formatCode")) for f in estilos.iter(f"{_NS_MAIN}numFmt")]
+    celulas = estilos.find(f"{_NS_MAIN}cellXfs")
+    por_estilo = [xf.get("numFmtId") for xf in celulas.iter(f"{_NS_MAIN}xf")] if celulas is not None else []
+    return repr((formatos, por_estilo))
+
+
+def chaves_planilhas(caminho):
+    """Chave de cache de cada planilha do arquivo.
+
+    Combina o CRC e o tamanho da parte da planilha (do diretório do ZIP, sem
+    descompactar), os textos compartilhados que as células dela usam e os
+    formatos numéricos dos estilos. Alterar o texto de uma planilha muda só a
+    chave dela, mesmo com o ``sharedStrings.xml`` comum a todas. Os índices
+    usados por planilha e os textos são lidos uma vez por versão da parte.
+    """
+    with zipfile.ZipFile(caminho) as arquivo_zip:
+        infos = {i.filename: i for i in arquivo_zip.infolist()}
+        textos = _itens_textos(arquivo_zip, infos[_TEXTOS]) if _TEXTOS in infos else []
+        formatos = _formatos_numericos(arquivo_zip, infos[_ESTILOS]) if _ESTILOS in infos else ""
+
+        chaves = {}
+        for nome, parte in _partes_planilhas(arquivo_zip).items():
+            info = infos[parte]
+            h = hashlib.sha256(f"{_crc(info)}|{formatos}".encode("utf-8"))
+            for indice in _textos_referenciados(arquivo_zip, info):
+                h.update(textos[indice] if indice < len(textos) else b"-")
+            chaves[nome] = h.hexdigest()
+    return chaves
+
+
+def descobrir_planilhas(caminho):
+    """Retorna ``{planilha: cabeçalho}`` das planilhas com resultados de dose."""
+    info = os.stat(caminho)
+    assinatura = (str(Path(caminho).resolve()), info.st_mtime_ns, info.st_size)
+    return _lembrar(_descobertas, assinatura, lambda: _ler_cabecalhos(caminho))
+
+
+def _ler_cabecalhos(caminho):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        encontradas = {}
+        for ws in wb.worksheets:
+            primeira = next(ws.iter_rows(max_row=1, values_only=True), ())
+            cabecalho = nomes_unicos(primeira)
+            if COL_DOSE in cabecalho:
+                encontradas[ws.title] = cabecalho
+    finally:
+        wb.close()
+    return encontradas
+
+
+def _ler_planilha(caminho, planilha, chave, colunas, numericas, somente_cache=False):
+    if colunas is None:
+        return carregar_planilha(caminho, planilha, chave=chave, somente_cache=somente_cache)
+    return carregar_colunas(caminho, planilha, colunas, numericas=numericas,
+                            chave=chave, somente_cache=somente_cache)
+
+
+def _tarefa(args):
+    # Executada nos processos (ou threads) do pool: uma planilha por tarefa
+    return _ler_planilha(*args)
+
+
+def _pool(workers):
+    # Processos só na thread principal (linha de comando). Nas demais (servidor do Streamlit), um
+    # fork copiaria as travas das outras threads, e spawn/forkserver reexecutariam em cada processo
+    # a página, que o Streamlit instala como __main__; threads são seguras nos dois casos
+    if threading.current_thread() is threading.main_thread():
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def _normalizar(df, site):
+    df = df.rename(columns=normalizar_nome)
+    df[COL_SITE] = site
+    return df
+
+
+def carregar_sites(origem, colunas=None, numericas=(), max_workers=None, planilhas=None):
+    """Carrega todas as planilhas de resultados de ``origem`` em um DataFrame.
+
+    ``origem`` pode ser um arquivo .xlsx ou um diretório com um arquivo por
+    site. ``colunas`` e ``numericas`` usam os nomes normalizados (por exemplo,
+    ``Resultado_ra226``); ``None`` carrega todas as colunas. Planilhas já
+    presentes no cache são lidas no próprio processo, e somente as demais vão
+    para o pool de processos. ``planilhas`` restringe a carga a esses sites.
+    """
+    arquivos = listar_arquivos(origem)
+    numericas = set(numericas)
+
+    tarefas = []
+    for arquivo in arquivos:
+        encontradas = descobrir_planilhas(arquivo)
+        chaves = chaves_planilhas(arquivo)
+        for planilha, cabecalho in encontradas.items():
+            if len(arquivos) == 1:
+                site = planilha
+            elif len(encontradas) == 1:
+                site = arquivo.stem
+            else:
+                site = f"{arquivo.stem}/{planilha}"
+            if planilhas is not None and site not in planilhas:
+                continue
+
+            if colunas is None:
+                originais = None
+                numericas_originais = ()
+            else:
+                # Traduz os nomes normalizados para os nomes desta planilha
+                por_nome = {normalizar_nome(c): c for c in cabecalho}
+                originais = [por_nome[c] for c in colunas if c in por_nome]
+                numericas_originais = [por_nome[c] for c in numericas if c in por_nome]
+
+            tarefas.append((site, (str(arquivo), planilha, chaves[planilha], originais, numericas_originais)))
+
+    resultados = {}
+    faltantes = []
+    for site, args in tarefas:
+        df = _ler_planilha(*args, somente_cache=True)
+        if df is None:
+            faltantes.append((site, args))
+        else:
+            resultados[site] = df
+
+    if len(faltantes) == 1:
+        site, args = faltantes[0]
+        resultados[site] = _tarefa(args)
+    elif faltantes:
+        workers = max_workers or min(len(faltantes), os.cpu_count() or 1)
+        with _pool(workers) as pool:
+            lidos = pool.map(_tarefa, [args for _, args in faltantes])
+            for (site, _), df in zip(faltantes, lidos):
+                resultados[site] = df
+
+    partes = [_normalizar(resultados[site], site) for site, _ in tarefas]
+    if not partes:
+        return pd.DataFrame(columns=[*(colunas or []), COL_SITE])
+    return pd.concat(partes, ignore_index=True, sort=False)
@@ -0,0 +1,72 @@
+"""Varredura da recomendação sobre uma grade de limites de dose e tetos de concentração.
+
+Para cada par (teto de concentração, limite de dose) aplica o mesmo critério
+MANTENHA / AVALIE / REAVALIE da página principal. As contagens de todas as
+células saem de uma única grade de contagens acumuladas, e o P95 de cada
+teto sai do prefixo das amostras ordenadas por concentração, sem refiltrar o
+DataFrame célula a célula.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dosimetria.estatisticas import decidir_recomendacao
+from dosimetria.indice import contagem_acumulada_2d
+
+
+def varrer_limites(ra226, ra228, dose, limites_dose, tetos_concentracao):
+    """Avalia a recomendação em todas as combinações de teto e limite.
+
+    Uma amostra entra no conjunto do teto ``C`` quando Ra-226 <= C e
+    Ra-228 <= C, como no filtro de 8 Bq/g de ``load_data()``. Retorna um
+    dicionário com as bordas ordenadas e matrizes ``[teto, limite]``.
+    """
+    ra226 = np.asarray(ra226, dtype=np.float64)
+    ra228 = np.asarray(ra228, dtype=np.float64)
+    dose = np.asarray(dose, dtype=np.float64)
+
+    validos = ~(np.isnan(ra226) | np.isnan(ra228) | np.isnan(dose))
+    concentracao = np.maximum(ra226[validos], ra228[validos])
+    dose = dose[validos]
+
+    limites = np.unique(np.asarray(limites_dose, dtype=np.float64))
+    tetos = np.unique(np.asarray(tetos_concentracao, dtype=np.float64))
+
+    # dentro[i, j] = amostras com concentração <= tetos[i] e dose <= limites[j]
+    dentro = contagem_acumulada_2d(concentracao, dose, tetos, limites)
+
+    ordem = np.argsort(concentracao, kind="stable")
+    dose_por_conc = dose[ordem]
+    amostras = np.searchsorted(concentracao[ordem], tetos, side="right")
+
+    p95 = np.array([np.percentile(dose_por_conc[:k], 95) if k else np.nan for k in amostras])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percentual = np.where(amostras[:, None] > 0, dentro / amostras[:, None] * 100, np.nan)
+
+    decisao = decidir_recomendacao(np.nan_to_num(percentual), p95[:, None], limites[None, :])
+    decisao = np.where(amostras[:, None] > 0, decisao, "")
+
+    return {
+        "tetos": tetos,
+        "limites": limites,
+        "amostras": amostras,
+        "dentro": dentro,
+        "percentual": percentual,
+        "p95": p95,
+        "decisao": decisao,
+    }
+
+
+def tabela_varredura(resultado):
+    # Formato longo: uma linha por combinação de teto e limite
+    tetos, limites = resultado["tetos"], resultado["limites"]
+    return pd.DataFrame({
+        "Teto de Concentração (Bq/g)": np.repeat(tetos, len(limites)),
+        "Limite de Dose (µSv/h)": np.tile(limites, len(tetos)),
+        "Amostras": np.repeat(resultado["amostras"], len(limites)),
+        "Dentro do Limite": resultado["dentro"].ravel(),
+        "Dentro do Limite (%)": resultado["percentual"].ravel(),
+        "P95 (µSv/h)": np.repeat(resultado["p95"], len(limites)),
+        "Recomendação": resultado["decisao"].ravel(),
+    })
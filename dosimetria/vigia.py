@@ -0,0 +1,265 @@
+"""Recarga da planilha de resultados por planilha alterada e por linha.
+
+``VigiaPlanilha`` detecta mudanças no arquivo em três níveis, do mais barato
+ao mais caro: data de modificação e tamanho (um ``stat``), hash do conteúdo
+(só quando o ``stat`` muda) e chave de cada planilha dentro do .xlsx (CRC
+das partes do ZIP, ver ``dosimetria.sites``), que diz quais planilhas mudaram.
+
+``RecargaIncremental`` mantém um conjunto do armazém (``dosimetria.armazem``)
+em dia com a planilha: relê só as planilhas alteradas e compara as linhas de
+cada uma com as da carga anterior por um índice de hashes, chaveado pela
+identificação estável da amostra (``incremental.chaves_amostras``, mais o site
+e a ocorrência da chave). Apenas as linhas inseridas e alteradas passam pela
+preparação da página; as removidas e as versões antigas das alteradas saem
+dos quadros publicados, e o resto é reaproveitado.
+
+Cada versão publicada traz em ``attrs['versoes_sites']`` uma impressão do
+conteúdo de cada site. Usada nas chaves dos caches, ela invalida apenas os
+resultados que dependem dos sites alterados.
+"""
+
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dosimetria import ARQUIVO_PADRAO
+from dosimetria.armazem import armazem
+from dosimetria.cache import hash_arquivo
+from dosimetria.incremental import COLUNAS_CHAVE, chaves_amostras
+from dosimetria.sites import COL_SITE, chaves_planilhas
+
+
+def chaves_linhas(df):
+    """Hash (uint64) da chave estável de cada linha: site, lote, certificado, volume e ocorrência."""
+    chaves = pd.DataFrame(chaves_amostras(df), columns=list(COLUNAS_CHAVE), index=df.index)
+    chaves[COL_SITE] = df[COL_SITE].astype(str).to_numpy() if COL_SITE in df.columns else ""
+    # Chaves repetidas (mesma amostra em duas linhas) são distinguidas pela ordem
+    chaves["ocorrencia"] = chaves.groupby(list(chaves.columns), sort=False).cumcount()
+    return pd.util.hash_pandas_object(chaves, index=False).to_numpy()
+
+
+class IndiceLinhas:
+    """Chave e hash do conteúdo de cada linha de uma planilha."""
+
+    def __init__(self, df):
+        self.chaves = chaves_linhas(df)
+        self.conteudo = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        self._indice = pd.Index(self.chaves)
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def posicoes(self, chaves):
+        """Posição de cada chave nesta planilha (-1 se ausente)."""
+        return self._indice.get_indexer(chaves)
+
+    @property
+    def impressao(self):
+        # Muda com qualquer inserção, alteração, remoção ou troca de ordem das linhas
+        h = hashlib.blake2b(self.chaves.tobytes(), digest_size=16)
+        h.update(self.conteudo.tobytes())
+        return h.hexdigest()
+
+
+class DiferencaLinhas:
+    def __init__(self, inseridas, atualizadas, removidas):
+        self.inseridas = inseridas      # posições na planilha nova
+        self.atualizadas = atualizadas  # posições na planilha nova
+        self.removidas = removidas      # chaves das linhas que saíram
+
+    @property
+    def vazia(self):
+        return not (len(self.inseridas) or len(self.atualizadas) or len(self.removidas))
+
+    @property
+    def alteradas(self):
+        """Posições (na planilha nova) das linhas a preparar: inseridas e atualizadas."""
+        return np.sort(np.r_[self.inseridas, self.atualizadas])
+
+    def __repr__(self):
+        return (f"DiferencaLinhas(inseridas={len(self.inseridas)}, atualizadas={len(self.atualizadas)}, "
+                f"removidas={len(self.removidas)})")
+
+
+def diferenca_linhas(antigo, novo):
+    """Linhas inseridas, atualizadas e removidas de ``antigo`` para ``novo`` (``IndiceLinhas``)."""
+    if antigo is None or len(antigo) == 0:
+        return DiferencaLinhas(np.arange(len(novo)), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint64))
+    posicoes = antigo.posicoes(novo.chaves)
+    existentes = posicoes >= 0
+    mudou = np.zeros(len(novo), dtype=bool)
+    mudou[existentes] = antigo.conteudo[posicoes[existentes]] != novo.conteudo[existentes]
+    return DiferencaLinhas(
+        np.flatnonzero(~existentes),
+        np.flatnonzero(mudou),
+        antigo.chaves[~np.isin(antigo.chaves, novo.chaves)],
+    )
+
+
+class VigiaPlanilha:
+    def __init__(self, caminho=ARQUIVO_PADRAO):
+        self.caminho = caminho
+        self.assinatura = None
+        self._estado = None
+        self._chaves = {}
+
+    def verificar(self):
+        """Planilhas alteradas desde a última verificação (todas, na primeira)."""
+        info = os.stat(self.caminho)
+        estado = (info.st_mtime_ns, info.st_size)
+        if estado == self._estado:
+            return set()
+        self._estado = estado
+
+        assinatura = hash_arquivo(self.caminho)
+        if assinatura == self.assinatura:
+            # Arquivo regravado sem mudar o conteúdo
+            return set()
+        self.assinatura = assinatura
+
+        chaves = chaves_planilhas(self.caminho)
+        alteradas = {p for p in chaves.keys() | self._chaves.keys() if chaves.get(p) != self._chaves.get(p)}
+        self._chaves = chaves
+        return alteradas
+
+    def salvar(self):
+        return self._estado, self.assinatura, self._chaves
+
+    def restaurar(self, estado):
+        """Volta ao estado de ``salvar``: as mudanças vistas desde então serão vistas de novo."""
+        self._estado, self.assinatura, self._chaves = estado
+
+
+class RecargaIncremental:
+    """Conjunto ``nome`` do armazém, atualizado planilha a planilha e linha a linha.
+
+    - ``ler(planilhas)`` devolve as linhas brutas dos sites pedidos (todos,
+      com ``None``), com a coluna ``site`` e as colunas da chave das amostras;
+    - ``preparar(bruto)`` devolve ``{quadro: DataFrame}`` e deve tratar cada
+      linha isoladamente: os quadros são subconjuntos das linhas de ``bruto``,
+      com o mesmo índice;
+    - ``finalizar(quadros)`` (opcional) trabalha sobre os quadros completos
+      antes da publicação (tipos compactos, ``attrs``).
+    """
+
+    def __init__(self, nome, ler, preparar, finalizar=None, arquivo=ARQUIVO_PADRAO):
+        self.nome = nome
+        self.ler = ler
+        self.preparar = preparar
+        self.finalizar = finalizar
+        self.vigia = VigiaPlanilha(arquivo)
+        self.diferencas = {}
+        self._indices = {}
+        self._chaves = {}
+        self._ordem = []
+        self._trava = threading.Lock()
+
+    def obter(self):
+        """Versão publicada, recarregando antes as planilhas que mudaram."""
+        with self._trava:
+            estado = self.vigia.salvar()
+            alteradas = self.vigia.verificar()
+            try:
+                versao = armazem.atual(self.nome)
+                if versao is None or not self._indices:
+                    return self._carga_completa()
+                if alteradas:
+                    return self._recarga_parcial(versao, alteradas)
+                return versao
+            except BaseException:
+                # Recarga falhou (planilha sendo salva, erro na preparação): tenta de novo na próxima
+                self.vigia.restaurar(estado)
+                raise
+
+    def _indexar(self, bruto):
+        # Índice de cada site e chave de cada linha de ``bruto`` (índice posicional)
+        chaves = np.empty(len(bruto), dtype=np.uint64)
+        indices = {}
+        for site, posicoes in bruto.groupby(COL_SITE, sort=False, observed=True).indices.items():
+            indices[site] = IndiceLinhas(bruto.iloc[posicoes])
+            chaves[posicoes] = indices[site].chaves
+        return indices, chaves
+
+    def _carga_completa(self):
+        bruto = self.ler(None).reset_index(drop=True)
+        indices, chaves = self._indexar(bruto)
+        quadros = self.preparar(bruto)
+        chaves_quadros = {q: chaves[df.index.to_numpy()] for q, df in quadros.items()}
+        versao = self._publicar({q: df.reset_index(drop=True) for q, df in quadros.items()}, indices)
+        # Estado só muda depois da publicação
+        self._indices, self._ordem, self._chaves = indices, list(indices), chaves_quadros
+        self.diferencas = {}
+        return versao
+
+    def _recarga_parcial(self, versao, alteradas):
+        bruto = self.ler(alteradas).reset_index(drop=True)
+        novos_indices, chaves_bruto = self._indexar(bruto)
+        por_site = bruto.groupby(COL_SITE, sort=False, observed=True).indices
+
+        # Novo estado montado em cópias: se a preparação ou a publicação falhar, o atual fica intacto
+        indices = dict(self._indices)
+        ordem = list(self._ordem)
+        diferencas = {}
+        preparar = []
+        descartar = []
+        for site in alteradas:
+            # Planilha sem linhas (ou removida do arquivo): todas as linhas antigas saem
+            novo = novos_indices.get(site) or IndiceLinhas(bruto.iloc[:0])
+            diferenca = diferenca_linhas(self._indices.get(site), novo)
+            diferencas[site] = diferenca
+            if site in por_site:
+                preparar.append(por_site[site][diferenca.alteradas])
+            descartar.extend([diferenca.removidas, novo.chaves[diferenca.atualizadas]])
+            if len(novo):
+                indices[site] = novo
+                if site not in ordem:
+                    ordem.append(site)
+            else:
+                indices.pop(site, None)
+        if all(d.vazia for d in diferencas.values()):
+            self._indices, self._ordem, self.diferencas = indices, ordem, diferencas
+            return versao
+
+        preparadas = self.preparar(bruto.iloc[np.concatenate(preparar) if preparar else []])
+        descartar = np.concatenate(descartar) if descartar else np.empty(0, dtype=np.uint64)
+        posicao_site = {site: i for i, site in enumerate(ordem)}
+
+        quadros = {}
+        chaves_quadros = {}
+        for q, novas in preparadas.items():
+            atual = versao.dataframe(q)
+            manter = ~np.isin(self._chaves[q], descartar)
+            combinado = pd.concat([atual[manter], novas], ignore_index=True)
+            chaves = np.r_[self._chaves[q][manter], chaves_bruto[novas.index.to_numpy()]]
+
+            # Ordem: sites na ordem da planilha; nos alterados, a ordem das linhas novas
+            sites = combinado[COL_SITE].astype(str).to_numpy()
+            posicao = np.arange(len(combinado))
+            for site in alteradas:
+                if site in indices:
+                    linhas = sites == site
+                    posicao[linhas] = indices[site].posicoes(chaves[linhas])
+            ordenacao = np.lexsort((posicao, np.array([posicao_site.get(s, len(posicao_site)) for s in sites])))
+            quadros[q] = combinado.iloc[ordenacao].reset_index(drop=True)
+            chaves_quadros[q] = chaves[ordenacao]
+
+        nova = self._publicar(quadros, indices)
+        self._indices, self._ordem, self._chaves, self.diferencas = indices, ordem, chaves_quadros, diferencas
+        return nova
+
+    def _publicar(self, quadros, indices):
+        if self.finalizar is not None:
+            quadros = self.finalizar(quadros)
+        versoes = {site: indice.impressao for site, indice in indices.items()}
+        for df in quadros.values():
+            df.attrs["versoes_sites"] = versoes
+        return armazem.publicar(self.nome, quadros, self.vigia.assinatura)
+
+
+def versoes_sites(df, sites):
+    """Impressões dos ``sites`` em ``df`` (publicado por ``RecargaIncremental``), para chaves de cache."""
+    versoes = df.attrs.get("versoes_sites", {})
+    return tuple(versoes.get(site) for site in sites)
@@ -1,9 +1,21 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
+
+from dosimetria import ARQUIVO_PADRAO
+from dosimetria.armazem import armazem
+from dosimetria.censura import aplicar_censura, resumos_censurados
+from dosimetria.esquema import compactar, memoria_por_coluna
+from dosimetria.estatisticas import AVALIE, MANTENHA, REAVALIE, impressao_digital
+from dosimetria.exportacao import FORMATOS, cache_exportacoes, exportar, nome_arquivo, tipo_mime
+from dosimetria.figuras import dispersao, renderizar
+from dosimetria.grafo import grafo_analise
+from dosimetria.incremental import ResumoIncremental, ResumoSobreposto, preencher_lotes
+from dosimetria.perfil import Perfilador, resumir_log
+from dosimetria.resultados import filtrar_teto, ler_resultados, preparar_resultados
+from dosimetria.sites import normalizar_nome
+from dosimetria.varredura import tabela_varredura, varrer_limites
+from dosimetria.vigia import RecargaIncremental, versoes_sites
 
 # Configuração da página
 st.set_page_config(page_title="Validação Limite 5µSv/h - GLP", layout="wide")
@@ -15,91 +27,85 @@ pagina_selecionada = st.sidebar.radio(
     ["📊 Análise Principal", "🔬 Estudo Detalhado"]
 )
 
-# Função para carregar dados (mantida igual)
-@st.cache_data
-def load_data():
-    # Carregar os dados do arquivo Excel
-    df = pd.read_excel("Resultados de análises radiométricas - GLP.xlsx", sheet_name="Macaé")
-    
-    # Limpeza e preparação dos dados
-    df.columns = [str(col).strip() for col in df.columns]
-    
-    # Converter colunas numéricas
-    numeric_columns = ['Taxa de Dose Máxima (µSv/h)', 'Resultado_ra226', 'Resultado_ra228']
-    
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # FILTRAR APENAS DADOS ATÉ 8 Bq/g (conforme solicitação do gerente)
-    df_filtrado = df[
-        (df['Resultado_ra226'] <= 8.0) & 
-        (df['Resultado_ra228'] <= 8.0) &
-        (df['Resultado_ra226'].notna()) &
-        (df['Resultado_ra228'].notna()) &
-        (df['Taxa de Dose Máxima (µSv/h)'].notna())
-    ].copy()
-    
-    return df, df_filtrado
+# Medição de tempo (e, com o painel ativo, de memória) de cada seção desta execução
+painel_desempenho = st.sidebar.checkbox("⏱️ Painel de desempenho", value=False)
+perfil = Perfilador("main", memoria=painel_desempenho)
 
-# Função para calcular estatísticas (mantida igual)
-def calcular_estatisticas_radionuclideos(df):
-    stats_dict = {}
-    
-    # Para Ra-226
-    ra226_valid = df['Resultado_ra226'].notna()
-    stats_dict['Ra226'] = {
-        'total': ra226_valid.sum(),
-        'ate_1bq': (df[ra226_valid]['Resultado_ra226'] <= 1.0).sum(),
-        '1_3bq': ((df[ra226_valid]['Resultado_ra226'] > 1.0) & (df[ra226_valid]['Resultado_ra226'] <= 3.0)).sum(),
-        '3_5bq': ((df[ra226_valid]['Resultado_ra226'] > 3.0) & (df[ra226_valid]['Resultado_ra226'] <= 5.0)).sum(),
-        '5_8bq': ((df[ra226_valid]['Resultado_ra226'] > 5.0) & (df[ra226_valid]['Resultado_ra226'] <= 8.0)).sum(),
-        'media': df[ra226_valid]['Resultado_ra226'].mean(),
-        'maxima': df[ra226_valid]['Resultado_ra226'].max()
-    }
-    
-    # Para Ra-228
-    ra228_valid = df['Resultado_ra228'].notna()
-    stats_dict['Ra228'] = {
-        'total': ra228_valid.sum(),
-        'ate_1bq': (df[ra228_valid]['Resultado_ra228'] <= 1.0).sum(),
-        '1_3bq': ((df[ra228_valid]['Resultado_ra228'] > 1.0) & (df[ra228_valid]['Resultado_ra228'] <= 3.0)).sum(),
-        '3_5bq': ((df[ra228_valid]['Resultado_ra228'] > 3.0) & (df[ra228_valid]['Resultado_ra228'] <= 5.0)).sum(),
-        '5_8bq': ((df[ra228_valid]['Resultado_ra228'] > 5.0) & (df[ra228_valid]['Resultado_ra228'] <= 8.0)).sum(),
-        'media': df[ra228_valid]['Resultado_ra228'].mean(),
-        'maxima': df[ra228_valid]['Resultado_ra228'].max()
-    }
-    
-    return stats_dict
+# FILTRAR APENAS DADOS ATÉ 8 Bq/g (conforme solicitação do gerente)
+def filtrar_ate_8bq(df):
+    return filtrar_teto(df, 8.0)
 
-# Função para calcular estatística descritiva da Taxa de Dose Máxima
-def calcular_estatisticas_dose(df):
-    dose_data = df['Taxa de Dose Máxima (µSv/h)'].dropna()
-    
-    if len(dose_data) == 0:
-        return None
+# Lê os certificados enviados pelo usuário (xlsx com uma ou mais planilhas, ou csv)
+def ler_certificados(arquivo):
+    if arquivo.name.lower().endswith('.csv'):
+        planilhas = {'csv': pd.read_csv(arquivo)}
+    else:
+        planilhas = pd.read_excel(arquivo, sheet_name=None)
     
-    estatisticas = {
-        'count': len(dose_data),
-        'mean': dose_data.mean(),
-        'std': dose_data.std(),
-        'min': dose_data.min(),
-        '25%': dose_data.quantile(0.25),
-        '50%': dose_data.quantile(0.50),  # mediana
-        '75%': dose_data.quantile(0.75),
-        'max': dose_data.max(),
-        'range': dose_data.max() - dose_data.min(),
-        'cv': (dose_data.std() / dose_data.mean()) * 100 if dose_data.mean() != 0 else 0,  # coeficiente de variação
-        'skewness': dose_data.skew(),
-        'kurtosis': dose_data.kurtosis()
-    }
+    partes = []
+    for planilha in planilhas.values():
+        planilha = planilha.rename(columns=normalizar_nome)
+        if 'Taxa de Dose Máxima (µSv/h)' in planilha.columns:
+            # Lotes preenchidos em cada planilha, antes de juntar e filtrar
+            partes.append(preencher_lotes(planilha))
+    if not partes:
+        return pd.DataFrame(columns=['Taxa de Dose Máxima (µSv/h)', 'Resultado_ra226', 'Resultado_ra228'])
     
-    # Percentis adicionais
-    percentis = [90, 95, 99]
-    for p in percentis:
-        estatisticas[f'P{p}'] = dose_data.quantile(p/100)
+    novos = pd.concat(partes, ignore_index=True)
+    novos['Taxa de Dose Máxima (µSv/h)'] = pd.to_numeric(novos['Taxa de Dose Máxima (µSv/h)'], errors='coerce')
+    for coluna in ['Resultado_ra226', 'Resultado_ra228']:
+        if coluna not in novos.columns:
+            novos[coluna] = np.nan
+    # Resultados "< CMD" / "< 0,03" entram com o limite de detecção, como nos dados carregados
+    return aplicar_censura(novos)
+
+# Resumo incremental inicial, construído uma vez por conjunto de dados e filtros (guarda as chaves
+# de todas as amostras: só os das combinações de filtros mais recentes ficam no cache)
+@st.cache_resource(max_entries=8)
+def resumo_inicial(_df, chave):
+    resumo = ResumoIncremental()
+    resumo.anexar(_df)
+    return resumo
+
+# Estatísticas de Kaplan-Meier e ROS (resultados censurados), em cache por conjunto e filtros
+@st.cache_data(show_spinner=False, max_entries=32, ttl=3600)
+def resumo_censura(_df, chave):
+    return resumos_censurados(_df)
+
+# Colunas numéricas usadas na análise
+numeric_columns = ['Taxa de Dose Máxima (µSv/h)', 'Resultado_ra226', 'Resultado_ra228']
+
+# Função para carregar dados
+def ler_planilhas(planilhas=None):
+    # Planilhas de resultados (um site por planilha), apenas com as colunas analisadas, mais as CMD
+    # e as colunas que identificam cada amostra (ingestão incremental e recarga). Mesma leitura das
+    # outras páginas e do relatório (dosimetria.resultados)
+    return ler_resultados(ARQUIVO_PADRAO, numeric_columns, planilhas=planilhas)
+
+def preparar_linhas(bruto):
+    # Resultados censurados entram com o limite de detecção (e ficam marcados em Censurado_ra22x)
+    df = preparar_resultados(bruto)
+    return {'completo': df, 'filtrado': filtrar_ate_8bq(df)}
+
+def finalizar_quadros(quadros):
+    # Tipos compactos (categorias para site e certificado)
+    quadros = {nome: compactar(df) for nome, df in quadros.items()}
     
-    return estatisticas
+    # Impressão digital dos dados carregados (identifica o conjunto nos caches)
+    impressao = impressao_digital(quadros['completo'][numeric_columns].to_numpy())
+    for df in quadros.values():
+        df.attrs['impressao'] = impressao
+    return quadros
+
+# Recarga por planilha e por linha quando a planilha muda (uma instância por processo)
+@st.cache_resource
+def recarga_dados():
+    return RecargaIncremental('main', ler_planilhas, preparar_linhas, finalizar_quadros)
+
+def load_data():
+    # Uma única cópia somente leitura por processo, compartilhada por todas as sessões
+    versao = recarga_dados().obter()
+    return versao.dataframe('completo'), versao.dataframe('filtrado')
 
 # PÁGINA PRINCIPAL
 if pagina_selecionada == "📊 Análise Principal":
@@ -112,9 +118,19 @@ if pagina_selecionada == "📊 Análise Principal":
     st.markdown(f"<h1 style='text-align: center;'>{titulo}</h1>", unsafe_allow_html=True)
     st.markdown(f"<h3 style='text-align: center;'>{sub_titulo}</h3>", unsafe_allow_html=True)
 
+    perfil.etapa("carga_dados")
     # Carregar dados
     df_original, df = load_data()
-
+    
+    # Planilha atualizada desde a última execução desta sessão: resumo das linhas recarregadas
+    versao_dados = armazem.atual('main').versao
+    if st.session_state.get('versao_dados', versao_dados) != versao_dados:
+        for site, diferenca in recarga_dados().diferencas.items():
+            st.sidebar.info(f"🔄 Planilha {site} atualizada: {len(diferenca.inseridas)} amostras novas, "
+                            f"{len(diferenca.atualizadas)} alteradas, {len(diferenca.removidas)} removidas")
+    st.session_state['versao_dados'] = versao_dados
+
+    perfil.etapa("filtros")
     # Sidebar com informações
     st.sidebar.header("🎯 Objetivo da Análise")
     st.sidebar.info("""
@@ -122,6 +138,17 @@ if pagina_selecionada == "📊 Análise Principal":
     """)
 
     st.sidebar.header("🔧 Configurações")
+
+    # Filtro por site (planilha de origem)
+    sites_disponiveis = list(df_original['site'].unique())
+    sites_selecionados = st.sidebar.multiselect(
+        "Sites para análise",
+        sites_disponiveis,
+        default=["Macaé"] if "Macaé" in sites_disponiveis else sites_disponiveis
+    )
+    df_original = df_original[df_original['site'].isin(sites_selecionados)]
+    df = df[df['site'].isin(sites_selecionados)]
+
     show_all_data = st.sidebar.checkbox("Mostrar análise com todos os dados", value=False)
 
     if show_all_data:
@@ -131,374 +158,597 @@ if pagina_selecionada == "📊 Análise Principal":
         df_analysis = df
         st.sidebar.success("✅ Analisando apenas dados ≤ 8 Bq/g")
 
-    # Calcular estatísticas para o dataframe em análise
-    stats_radionuclideos = calcular_estatisticas_radionuclideos(df_analysis)
-    stats_dose = calcular_estatisticas_dose(df_analysis)
+    # Novos certificados para anexar à análise atual
+    certificados_novos = st.sidebar.file_uploader(
+        "Anexar novos certificados",
+        type=['xlsx', 'csv'],
+        accept_multiple_files=True
+    )
 
-    # Layout principal - RESUMO EXECUTIVO SIMPLES
-    st.header("📋 VISÃO GERAL DOS RESULTADOS")
+    # Chave dos gráficos em cache: dados carregados + estado dos filtros
+    # (a impressão de cada site selecionado: mudanças em outros sites não invalidam estes caches)
+    chave_graficos = (versoes_sites(df_original, sites_selecionados), tuple(sites_selecionados), show_all_data)
 
-    # PRIMEIRA LINHA: Métricas principais
-    col1, col2, col3, col4 = st.columns(4)
+    perfil.etapa("estatisticas")
+    # Estatísticas sob demanda: cada seção pede ao grafo só o que exibe (seções ocultas não
+    # calculam nada) e os nós comuns, como o resumo da dose ordenada, saem uma vez por execução
+    grafo = grafo_analise(df_analysis, chave_graficos)
+    total_amostras = len(df_analysis)
 
-    with col1:
-        total_amostras = len(df_analysis)
-        st.metric("Total de Amostras Analisadas", total_amostras)
+    # Cada seção é um fragmento com entradas declaradas: os widgets de uma seção (checkboxes,
+    # sliders) reexecutam só o fragmento dela; filtros da barra lateral reexecutam a página inteira
 
-    with col2:
-        amostras_ate_5usv = len(df_analysis[df_analysis['Taxa de Dose Máxima (µSv/h)'] <= 5.0])
-        percentual_ate_5usv = (amostras_ate_5usv / total_amostras * 100) if total_amostras > 0 else 0
-        st.metric("Dentro do Limite", f"{amostras_ate_5usv} ({percentual_ate_5usv:.1f}%)")
+    perfil.etapa("visao_geral")
+    # Layout principal - RESUMO EXECUTIVO SIMPLES
+    @st.fragment
+    def visao_geral(df_analysis, sites_selecionados, grafo):
+        st.header("📋 VISÃO GERAL DOS RESULTADOS")
+        contagens = grafo['contagens']
 
-    with col3:
-        amostras_acima_5usv = len(df_analysis[df_analysis['Taxa de Dose Máxima (µSv/h)'] > 5.0])
-        percentual_acima_5usv = (amostras_acima_5usv / total_amostras * 100) if total_amostras > 0 else 0
-        st.metric("Acima do Limite", f"{amostras_acima_5usv} ({percentual_acima_5usv:.1f}%)")
+        # PRIMEIRA LINHA: Métricas principais
+        col1, col2, col3, col4 = st.columns(4)
 
-    with col4:
-        max_dose = df_analysis['Taxa de Dose Máxima (µSv/h)'].max() if total_amostras > 0 else 0
-        st.metric("Maior Dose Encontrada", f"{max_dose:.2f} µSv/h")
+        with col1:
+            st.metric("Total de Amostras Analisadas", contagens['total'])
 
-    # NOVA SEÇÃO: ESTATÍSTICA DESCRITIVA DA TAXA DE DOSE MÁXIMA (COM CHECKBOX)
-    if st.checkbox("📊 Exibir Estatística Descritiva - Taxa de Dose Máxima (µSv/h)"):
-        st.header("📊 Estatística Descritiva - Taxa de Dose Máxima (µSv/h)")
-        
-        if stats_dose:
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.subheader("Medidas de Tendência Central")
-                st.metric("Média", f"{stats_dose['mean']:.4f} µSv/h")
-                st.metric("Mediana (P50)", f"{stats_dose['50%']:.4f} µSv/h")
-                st.metric("Moda", f"{df_analysis['Taxa de Dose Máxima (µSv/h)'].mode().iloc[0] if not df_analysis['Taxa de Dose Máxima (µSv/h)'].mode().empty else 'N/A'} µSv/h")
-            
-            with col2:
-                st.subheader("Medidas de Dispersão")
-                st.metric("Desvio Padrão", f"{stats_dose['std']:.4f} µSv/h")
-                st.metric("Amplitude", f"{stats_dose['range']:.4f} µSv/h")
-                st.metric("Coef. Variação", f"{stats_dose['cv']:.2f}%")
-            
-            with col3:
-                st.subheader("Valores Extremos")
-                st.metric("Mínimo", f"{stats_dose['min']:.4f} µSv/h")
-                st.metric("Máximo", f"{stats_dose['max']:.4f} µSv/h")
-                st.metric("Amplitude Interquartil", f"{stats_dose['75%'] - stats_dose['25%']:.4f} µSv/h")
-            
-            # Quartis e Percentis
-            st.subheader("Quartis e Percentis")
-            col1, col2, col3, col4, col5 = st.columns(5)
-            
-            with col1:
-                st.metric("Q1 (25%)", f"{stats_dose['25%']:.4f} µSv/h")
-            with col2:
-                st.metric("Q2 (50%)", f"{stats_dose['50%']:.4f} µSv/h")
-            with col3:
-                st.metric("Q3 (75%)", f"{stats_dose['75%']:.4f} µSv/h")
-            with col4:
-                st.metric("P90", f"{stats_dose['P90']:.4f} µSv/h")
-            with col5:
-                st.metric("P95", f"{stats_dose['P95']:.4f} µSv/h")
-            
-            # Medidas de Forma
-            st.subheader("Medidas de Forma da Distribuição")
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.metric("Assimetria (Skewness)", f"{stats_dose['skewness']:.4f}")
-                if stats_dose['skewness'] > 0:
-                    st.info("Distribuição assimétrica positiva (viés à direita)")
-                elif stats_dose['skewness'] < 0:
-                    st.info("Distribuição assimétrica negativa (viés à esquerda)")
-                else:
-                    st.info("Distribuição simétrica")
-            
-            with col2:
-                st.metric("Curtose (Kurtosis)", f"{stats_dose['kurtosis']:.4f}")
-                if stats_dose['kurtosis'] > 0:
-                    st.info("Distribuição leptocúrtica (picos mais altos, caudas mais pesadas)")
-                elif stats_dose['kurtosis'] < 0:
-                    st.info("Distribuição platicúrtica (picos mais baixos, caudas mais leves)")
-                else:
-                    st.info("Distribuição mesocúrtica (similar à normal)")
-            
-            # Tabela resumo completa
-            st.subheader("Tabela Resumo Completa")
-            resumo_data = {
-                'Estatística': [
-                    'Número de amostras', 'Média', 'Desvio Padrão', 'Mínimo', 
-                    'Primeiro Quartil (Q1)', 'Mediana (Q2)', 'Terceiro Quartil (Q3)', 
-                    'Máximo', 'Amplitude', 'Amplitude Interquartil (IQR)',
-                    'Coeficiente de Variação', 'P90', 'P95', 'P99',
-                    'Assimetria (Skewness)', 'Curtose (Kurtosis)'
-                ],
-                'Valor': [
-                    stats_dose['count'],
-                    f"{stats_dose['mean']:.4f}",
-                    f"{stats_dose['std']:.4f}",
-                    f"{stats_dose['min']:.4f}",
-                    f"{stats_dose['25%']:.4f}",
-                    f"{stats_dose['50%']:.4f}",
-                    f"{stats_dose['75%']:.4f}",
-                    f"{stats_dose['max']:.4f}",
-                    f"{stats_dose['range']:.4f}",
-                    f"{stats_dose['75%'] - stats_dose['25%']:.4f}",
-                    f"{stats_dose['cv']:.2f}%",
-                    f"{stats_dose['P90']:.4f}",
-                    f"{stats_dose['P95']:.4f}",
-                    f"{stats_dose['P99']:.4f}",
-                    f"{stats_dose['skewness']:.4f}",
-                    f"{stats_dose['kurtosis']:.4f}"
-                ],
-                'Interpretação': [
-                    'Total de observações válidas',
-                    'Valor médio das taxas de dose',
-                    'Dispersão em torno da média',
-                    'Menor valor observado',
-                    '25% dos dados estão abaixo deste valor',
-                    '50% dos dados estão abaixo deste valor',
-                    '75% dos dados estão abaixo deste valor',
-                    'Maior valor observado',
-                    'Diferença entre máximo e mínimo',
-                    'Diferença entre Q3 e Q1 (dispersão central)',
-                    'Desvio padrão relativo à média',
-                    '90% dos dados estão abaixo deste valor',
-                    '95% dos dados estão abaixo deste valor',
-                    '99% dos dados estão abaixo deste valor',
-                    'Simetria da distribuição',
-                    '"Pico" da distribuição'
-                ]
-            }
-            
-            resumo_df = pd.DataFrame(resumo_data)
-            st.dataframe(resumo_df, use_container_width=True)
-            
-        else:
-            st.warning("Não há dados suficientes para calcular estatísticas descritivas.")
+        with col2:
+            st.metric("Dentro do Limite", f"{contagens['ate_limite']} ({contagens['percentual_ate_limite']:.1f}%)")
 
+        with col3:
+            st.metric("Acima do Limite", f"{contagens['acima_limite']} ({contagens['percentual_acima_limite']:.1f}%)")
+
+        with col4:
+            st.metric("Maior Dose Encontrada", f"{contagens['maxima']:.2f} µSv/h")
+
+        # COMPARAÇÃO ENTRE SITES (quando mais de um site está selecionado)
+        if len(sites_selecionados) > 1:
+            st.subheader("🏭 Comparação entre Sites")
+            dose_por_site = df_analysis.groupby('site', observed=True)['Taxa de Dose Máxima (µSv/h)']
+            comparacao_sites = pd.DataFrame({
+                'Amostras': dose_por_site.count(),
+                'Dentro do Limite (%)': dose_por_site.apply(lambda s: (s <= 5.0).mean() * 100),
+                'Média (µSv/h)': dose_por_site.mean(),
+                'P95 (µSv/h)': dose_por_site.quantile(0.95),
+                'Máxima (µSv/h)': dose_por_site.max()
+            })
+            st.dataframe(comparacao_sites.round(2), use_container_width=True)
+
+    visao_geral(df_analysis, sites_selecionados, grafo)
+
+    perfil.etapa("estatistica_descritiva")
+    # NOVA SEÇÃO: ESTATÍSTICA DESCRITIVA DA TAXA DE DOSE MÁXIMA (COM CHECKBOX)
+    @st.fragment
+    def estatistica_descritiva(grafo):
+        if st.checkbox("📊 Exibir Estatística Descritiva - Taxa de Dose Máxima (µSv/h)"):
+            st.header("📊 Estatística Descritiva - Taxa de Dose Máxima (µSv/h)")
+            stats_dose = grafo['estatisticas_dose']
+            resumo_dose = grafo['resumo_dose']
+        
+            if stats_dose:
+                col1, col2, col3 = st.columns(3)
+            
+                with col1:
+                    st.subheader("Medidas de Tendência Central")
+                    st.metric("Média", f"{stats_dose['mean']:.4f} µSv/h")
+                    st.metric("Mediana (P50)", f"{stats_dose['50%']:.4f} µSv/h")
+                    st.metric("Moda", f"{stats_dose['mode']} µSv/h")
+            
+                with col2:
+                    st.subheader("Medidas de Dispersão")
+                    st.metric("Desvio Padrão", f"{stats_dose['std']:.4f} µSv/h")
+                    st.metric("Amplitude", f"{stats_dose['range']:.4f} µSv/h")
+                    st.metric("Coef. Variação", f"{stats_dose['cv']:.2f}%")
+            
+                with col3:
+                    st.subheader("Valores Extremos")
+                    st.metric("Mínimo", f"{stats_dose['min']:.4f} µSv/h")
+                    st.metric("Máximo", f"{stats_dose['max']:.4f} µSv/h")
+                    st.metric("Amplitude Interquartil", f"{resumo_dose.iqr:.4f} µSv/h")
+            
+                # Quartis e Percentis
+                st.subheader("Quartis e Percentis")
+                col1, col2, col3, col4, col5 = st.columns(5)
+            
+                with col1:
+                    st.metric("Q1 (25%)", f"{stats_dose['25%']:.4f} µSv/h")
+                with col2:
+                    st.metric("Q2 (50%)", f"{stats_dose['50%']:.4f} µSv/h")
+                with col3:
+                    st.metric("Q3 (75%)", f"{stats_dose['75%']:.4f} µSv/h")
+                with col4:
+                    st.metric("P90", f"{stats_dose['P90']:.4f} µSv/h")
+                with col5:
+                    st.metric("P95", f"{stats_dose['P95']:.4f} µSv/h")
+            
+                # Medidas de Forma
+                st.subheader("Medidas de Forma da Distribuição")
+                col1, col2 = st.columns(2)
+            
+                with col1:
+                    st.metric("Assimetria (Skewness)", f"{stats_dose['skewness']:.4f}")
+                    if stats_dose['skewness'] > 0:
+                        st.info("Distribuição assimétrica positiva (viés à direita)")
+                    elif stats_dose['skewness'] < 0:
+                        st.info("Distribuição assimétrica negativa (viés à esquerda)")
+                    else:
+                        st.info("Distribuição simétrica")
+            
+                with col2:
+                    st.metric("Curtose (Kurtosis)", f"{stats_dose['kurtosis']:.4f}")
+                    if stats_dose['kurtosis'] > 0:
+                        st.info("Distribuição leptocúrtica (picos mais altos, caudas mais pesadas)")
+                    elif stats_dose['kurtosis'] < 0:
+                        st.info("Distribuição platicúrtica (picos mais baixos, caudas mais leves)")
+                    else:
+                        st.info("Distribuição mesocúrtica (similar à normal)")
+            
+                # Tabela resumo completa
+                st.subheader("Tabela Resumo Completa")
+                resumo_data = {
+                    'Estatística': [
+                        'Número de amostras', 'Média', 'Desvio Padrão', 'Mínimo', 
+                        'Primeiro Quartil (Q1)', 'Mediana (Q2)', 'Terceiro Quartil (Q3)', 
+                        'Máximo', 'Amplitude', 'Amplitude Interquartil (IQR)',
+                        'Coeficiente de Variação', 'P90', 'P95', 'P99',
+                        'Assimetria (Skewness)', 'Curtose (Kurtosis)'
+                    ],
+                    'Valor': [
+                        stats_dose['count'],
+                        f"{stats_dose['mean']:.4f}",
+                        f"{stats_dose['std']:.4f}",
+                        f"{stats_dose['min']:.4f}",
+                        f"{stats_dose['25%']:.4f}",
+                        f"{stats_dose['50%']:.4f}",
+                        f"{stats_dose['75%']:.4f}",
+                        f"{stats_dose['max']:.4f}",
+                        f"{stats_dose['range']:.4f}",
+                        f"{resumo_dose.iqr:.4f}",
+                        f"{stats_dose['cv']:.2f}%",
+                        f"{stats_dose['P90']:.4f}",
+                        f"{stats_dose['P95']:.4f}",
+                        f"{stats_dose['P99']:.4f}",
+                        f"{stats_dose['skewness']:.4f}",
+                        f"{stats_dose['kurtosis']:.4f}"
+                    ],
+                    'Interpretação': [
+                        'Total de observações válidas',
+                        'Valor médio das taxas de dose',
+                        'Dispersão em torno da média',
+                        'Menor valor observado',
+                        '25% dos dados estão abaixo deste valor',
+                        '50% dos dados estão abaixo deste valor',
+                        '75% dos dados estão abaixo deste valor',
+                        'Maior valor observado',
+                        'Diferença entre máximo e mínimo',
+                        'Diferença entre Q3 e Q1 (dispersão central)',
+                        'Desvio padrão relativo à média',
+                        '90% dos dados estão abaixo deste valor',
+                        '95% dos dados estão abaixo deste valor',
+                        '99% dos dados estão abaixo deste valor',
+                        'Simetria da distribuição',
+                        '"Pico" da distribuição'
+                    ]
+                }
+            
+                resumo_df = pd.DataFrame(resumo_data)
+                st.dataframe(resumo_df, use_container_width=True)
+            
+            else:
+                st.warning("Não há dados suficientes para calcular estatísticas descritivas.")
+
+    estatistica_descritiva(grafo)
+
+    perfil.etapa("radionuclideos")
     # SEGUNDA LINHA: Estatísticas dos Radionuclídeos
-    st.subheader("📊 Estatísticas por Radionuclídeo")
+    @st.fragment
+    def radionuclideos(df_analysis, grafo, chave_graficos):
+        st.subheader("📊 Estatísticas por Radionuclídeo")
+        stats_radionuclideos = grafo['radionuclideos']
 
-    col1, col2 = st.columns(2)
+        col1, col2 = st.columns(2)
 
-    with col1:
-        st.write("**Ra-226**")
-        ra226 = stats_radionuclideos['Ra226']
-        st.write(f"""
-        - **Total de amostras:** {ra226['total']}
-        - **Distribuição por faixa:**
-          - ≤ 1.0 Bq/g: {ra226['ate_1bq']} amostras
-          - 1.1 - 3.0 Bq/g: {ra226['1_3bq']} amostras  
-          - 3.1 - 5.0 Bq/g: {ra226['3_5bq']} amostras
-          - 5.1 - 8.0 Bq/g: {ra226['5_8bq']} amostras
-        - **Média:** {ra226['media']:.2f} Bq/g
-        - **Máxima:** {ra226['maxima']:.2f} Bq/g
-        """)
+        with col1:
+            st.write("**Ra-226**")
+            ra226 = stats_radionuclideos['Ra226']
+            st.write(f"""
+            - **Total de amostras:** {ra226['total']}
+            - **Distribuição por faixa:**
+              - ≤ 1.0 Bq/g: {ra226['ate_1bq']} amostras
+              - 1.1 - 3.0 Bq/g: {ra226['1_3bq']} amostras  
+              - 3.1 - 5.0 Bq/g: {ra226['3_5bq']} amostras
+              - 5.1 - 8.0 Bq/g: {ra226['5_8bq']} amostras
+            - **Média:** {ra226['media']:.2f} Bq/g
+            - **Máxima:** {ra226['maxima']:.2f} Bq/g
+            """)
 
-    with col2:
-        st.write("**Ra-228**")
-        ra228 = stats_radionuclideos['Ra228']
-        st.write(f"""
-        - **Total de amostras:** {ra228['total']}
-        - **Distribuição por faixa:**
-          - ≤ 1.0 Bq/g: {ra228['ate_1bq']} amostras
-          - 1.1 - 3.0 Bq/g: {ra228['1_3bq']} amostras  
-          - 3.1 - 5.0 Bq/g: {ra228['3_5bq']} amostras
-          - 5.1 - 8.0 Bq/g: {ra228['5_8bq']} amostras
-        - **Média:** {ra228['media']:.2f} Bq/g
-        - **Máxima:** {ra228['maxima']:.2f} Bq/g
-        """)
+        with col2:
+            st.write("**Ra-228**")
+            ra228 = stats_radionuclideos['Ra228']
+            st.write(f"""
+            - **Total de amostras:** {ra228['total']}
+            - **Distribuição por faixa:**
+              - ≤ 1.0 Bq/g: {ra228['ate_1bq']} amostras
+              - 1.1 - 3.0 Bq/g: {ra228['1_3bq']} amostras  
+              - 3.1 - 5.0 Bq/g: {ra228['3_5bq']} amostras
+              - 5.1 - 8.0 Bq/g: {ra228['5_8bq']} amostras
+            - **Média:** {ra228['media']:.2f} Bq/g
+            - **Máxima:** {ra228['maxima']:.2f} Bq/g
+            """)
+
+        # Resultados abaixo da CMD: estimadores para dados censurados
+        censurados_ra = int(df_analysis['Censurado_ra226'].sum() + df_analysis['Censurado_ra228'].sum())
+        with st.expander(f"Resultados abaixo da CMD ({censurados_ra} valores censurados)"):
+            st.write("""
+            Resultados registrados como "< CMD" ou "< 0,03" entram nas contagens acima com o limite de
+            detecção. Abaixo, média e percentis estimados por **Kaplan-Meier** (cota superior) e por
+            **regressão sobre estatísticas de ordem (ROS)** lognormal, que tratam esses valores como censurados.
+            """)
+            st.dataframe(resumo_censura(df_analysis, chave_graficos).rename(
+                index={'Resultado_ra226': 'Ra-226 (Bq/g)', 'Resultado_ra228': 'Ra-228 (Bq/g)',
+                       'Taxa de Dose Máxima (µSv/h)': 'Taxa de dose (µSv/h)'},
+                columns={'n': 'Amostras', 'censurados': 'Censuradas', 'media_km': 'Média KM', 'desvio_km': 'Desvio KM',
+                         'media_ros': 'Média ROS', 'desvio_ros': 'Desvio ROS', 'p50_km': 'P50 KM', 'p50_ros': 'P50 ROS',
+                         'p95_km': 'P95 KM', 'p95_ros': 'P95 ROS'}
+            ).round(3), use_container_width=True)
+
+    radionuclideos(df_analysis, grafo, chave_graficos)
 
     # ANÁLISE SIMPLIFICADA - O QUE OS NÚMEROS SIGNIFICAM
     st.header("Análise da variável qualitativa continua Taxa de Dose Máxima (µSv/h)")
 
     if total_amostras > 0:
-        # Cálculos importantes
-        dose_90th = np.percentile(df_analysis['Taxa de Dose Máxima (µSv/h)'], 90)
-        dose_95th = np.percentile(df_analysis['Taxa de Dose Máxima (µSv/h)'], 95)
-        dose_99th = np.percentile(df_analysis['Taxa de Dose Máxima (µSv/h)'], 99)
-        
+        perfil.etapa("semaforo")
         # VISUALIZAÇÃO SIMPLES COM SEMÁFORO
-        st.subheader("📊 Situação das Amostras")
-        
-        # Criar colunas para o semáforo
-        col1, col2, col3 = st.columns(3)
+        @st.fragment
+        def semaforo(grafo, total_amostras):
+            st.subheader("📊 Situação das Amostras")
+            resumo_dose = grafo['resumo_dose']
+            percentis_dose = grafo['percentis_dose']
+            dose_90th, dose_95th, dose_99th = percentis_dose[90], percentis_dose[95], percentis_dose[99]
+            # Incerteza dos percentis: intervalos de confiança de 95% por bootstrap
+            ic = grafo['intervalos']
+        
+            # Criar colunas para o semáforo
+            col1, col2, col3 = st.columns(3)
         
-        with col1:
-            baixo_risco = len(df_analysis[df_analysis['Taxa de Dose Máxima (µSv/h)'] <= 3.0])
-            perc_baixo = (baixo_risco / total_amostras * 100)
-            st.success(f"""
-            **MENOR OU IGUAL A 3.0**
+            with col1:
+                baixo_risco = resumo_dose.contar_ate(3.0)
+                perc_baixo = (baixo_risco / total_amostras * 100)
+                st.success(f"""
+                **MENOR OU IGUAL A 3.0**
             
-            **{baixo_risco} amostras** ({perc_baixo:.1f}%)
+                **{baixo_risco} amostras** ({perc_baixo:.1f}%)
             
-            *Dose ≤ 3.0 µSv/h*
-            """)
+                *Dose ≤ 3.0 µSv/h*
+                """)
         
-        with col2:
-            medio_risco = len(df_analysis[(df_analysis['Taxa de Dose Máxima (µSv/h)'] > 3.0) & 
-                                        (df_analysis['Taxa de Dose Máxima (µSv/h)'] <= 5.0)])
-            perc_medio = (medio_risco / total_amostras * 100)
-            st.warning(f"""
-            **MAIOR QUE 3.0 E MENOR OU IGUAL 5.0**
+            with col2:
+                medio_risco = resumo_dose.contar_entre(3.0, 5.0)
+                perc_medio = (medio_risco / total_amostras * 100)
+                st.warning(f"""
+                **MAIOR QUE 3.0 E MENOR OU IGUAL 5.0**
             
-            **{medio_risco} amostras** ({perc_medio:.1f}%)
+                **{medio_risco} amostras** ({perc_medio:.1f}%)
             
-            *Dose entre 3.1-5.0 µSv/h*
-            """)
+                *Dose entre 3.1-5.0 µSv/h*
+                """)
         
-        with col3:
-            alto_risco = len(df_analysis[df_analysis['Taxa de Dose Máxima (µSv/h)'] > 5.0])
-            perc_alto = (alto_risco / total_amostras * 100)
-            st.error(f"""
-            **MAIOR QUE 5.0**
+            with col3:
+                alto_risco = resumo_dose.contar_acima(5.0)
+                perc_alto = (alto_risco / total_amostras * 100)
+                st.error(f"""
+                **MAIOR QUE 5.0**
             
-            **{alto_risco} amostras** ({perc_alto:.1f}%)
+                **{alto_risco} amostras** ({perc_alto:.1f}%)
             
-            *Dose > 5.0 µSv/h*
-            """)
+                *Dose > 5.0 µSv/h*
+                """)
         
-        # EXPLICAÇÃO DOS PERCENTIS COM LINGUAGEM SIMPLES
-        st.subheader("Entendendo os Percentis")
+            # EXPLICAÇÃO DOS PERCENTIS COM LINGUAGEM SIMPLES
+            st.subheader("Entendendo os Percentis")
         
-        col1, col2 = st.columns(2)
+            col1, col2 = st.columns(2)
         
-        with col1:
-            st.info(f"""
-            **📈 O que os percentis mostram:**
+            with col1:
+                st.info(f"""
+                **📈 O que os percentis mostram:**
             
-            **P90 = {dose_90th:.2f} µSv/h**  
-            👉 90% das amostras têm dose ≤ {dose_90th:.2f} µSv/h
+                **P90 = {dose_90th:.2f} µSv/h**  
+                👉 90% das amostras têm dose ≤ {dose_90th:.2f} µSv/h
             
-            **P95 = {dose_95th:.2f} µSv/h**  
-            👉 95% das amostras têm dose ≤ {dose_95th:.2f} µSv/h
+                **P95 = {dose_95th:.2f} µSv/h**  
+                👉 95% das amostras têm dose ≤ {dose_95th:.2f} µSv/h
             
-            **P99 = {dose_99th:.2f} µSv/h**  
-            👉 99% das amostras têm dose ≤ {dose_99th:.2f} µSv/h
-            """)
+                **P99 = {dose_99th:.2f} µSv/h**  
+                👉 99% das amostras têm dose ≤ {dose_99th:.2f} µSv/h
+                """)
         
+            with col2:
+                st.info(f"""
+                **🎯 Quão confiáveis são esses valores? (IC 95%, bootstrap)**
+            
+                **P90:** {ic['P90'][0]:.2f} a {ic['P90'][1]:.2f} µSv/h  
+                **P95:** {ic['P95'][0]:.2f} a {ic['P95'][1]:.2f} µSv/h  
+                **P99:** {ic['P99'][0]:.2f} a {ic['P99'][1]:.2f} µSv/h  
+                **Dentro do limite:** {ic['dentro'][0]:.1f}% a {ic['dentro'][1]:.1f}%
+            
+                👉 A recomendação usa o lado conservador: o limite superior do P95 
+                e o limite inferior do percentual dentro do limite
+                """)
+
+        semaforo(grafo, total_amostras)
+
+        perfil.etapa("grafico_distribuicao")
         # GRÁFICO SIMPLES DE DISTRIBUIÇÃO
-        st.subheader("📊 Visualização da Distribuição das Doses")
+        @st.fragment
+        def grafico_distribuicao(df_analysis, chave_graficos, grafo):
+            st.subheader("📊 Visualização da Distribuição das Doses")
+            dose_90th, dose_95th = grafo['percentis_dose'][90], grafo['percentis_dose'][95]
+            max_dose = grafo['contagens']['maxima']
         
-        fig, ax = plt.subplots(figsize=(12, 6))
+            def desenhar_distribuicao():
+                # matplotlib só é carregado quando a figura não está no cache
+                import matplotlib.pyplot as plt
+            
+                fig, ax = plt.subplots(figsize=(12, 6))
         
-        # Criar áreas coloridas
-        ax.axvspan(0, 3.0, alpha=0.3, color='green', label='Baixo Risco (≤ 3.0 µSv/h)')
-        ax.axvspan(3.0, 5.0, alpha=0.3, color='yellow', label='Atenção (3.1-5.0 µSv/h)')
-        ax.axvspan(5.0, max(10, max_dose), alpha=0.3, color='red', label='Alto Risco (> 5.0 µSv/h)')
+                # Criar áreas coloridas
+                ax.axvspan(0, 3.0, alpha=0.3, color='green', label='Baixo Risco (≤ 3.0 µSv/h)')
+                ax.axvspan(3.0, 5.0, alpha=0.3, color='yellow', label='Atenção (3.1-5.0 µSv/h)')
+                ax.axvspan(5.0, max(10, max_dose), alpha=0.3, color='red', label='Alto Risco (> 5.0 µSv/h)')
         
-        # Histograma
-        n, bins, patches = ax.hist(df_analysis['Taxa de Dose Máxima (µSv/h)'], 
-                                  bins=15, alpha=0.7, color='blue', edgecolor='black')
+                # Histograma
+                n, bins, patches = ax.hist(df_analysis['Taxa de Dose Máxima (µSv/h)'], 
+                                          bins=15, alpha=0.7, color='blue', edgecolor='black')
         
-        # Linhas dos percentis
-        ax.axvline(x=dose_90th, color='orange', linestyle='--', linewidth=2, 
-                   label=f'90% das amostras ≤ {dose_90th:.1f} µSv/h')
-        ax.axvline(x=dose_95th, color='red', linestyle='--', linewidth=2, 
-                   label=f'95% das amostras ≤ {dose_95th:.1f} µSv/h')
+                # Linhas dos percentis
+                ax.axvline(x=dose_90th, color='orange', linestyle='--', linewidth=2, 
+                           label=f'90% das amostras ≤ {dose_90th:.1f} µSv/h')
+                ax.axvline(x=dose_95th, color='red', linestyle='--', linewidth=2, 
+                           label=f'95% das amostras ≤ {dose_95th:.1f} µSv/h')
         
-        ax.set_xlabel('Taxa de Dose (µSv/h)')
-        ax.set_ylabel('Número de Amostras')
-        ax.set_title('Distribuição das Taxas de Dose - Visão Simplificada')
-        ax.legend()
-        ax.grid(True, alpha=0.3)
+                ax.set_xlabel('Taxa de Dose (µSv/h)')
+                ax.set_ylabel('Número de Amostras')
+                ax.set_title('Distribuição das Taxas de Dose - Visão Simplificada')
+                ax.legend()
+                ax.grid(True, alpha=0.3)
+            
+                return fig
         
-        st.pyplot(fig)
+            st.image(renderizar(chave_graficos + ('distribuicao', (12, 6)), desenhar_distribuicao), width="stretch")
 
+        grafico_distribuicao(df_analysis, chave_graficos, grafo)
+
+        perfil.etapa("recomendacao")
         # RECOMENDAÇÃO PRÁTICA E CLARA
-        st.header("RECOMENDAÇÃO PRÁTICA")
-        
-        if percentual_ate_5usv >= 95 and dose_95th <= 5.0:
-            st.success(f"""
-            **✅ MANTENHA O LIMITE DE 5 µSv/h**
-            
-            **Por que essa recomendação?**
-            
-            ✅ **{percentual_ate_5usv:.1f}% das amostras** estão DENTRO do limite  
-            ✅ **95% das amostras** têm dose ≤ **{dose_95th:.2f} µSv/h**  
-            ✅ **Margem de segurança** adequada  
-            ✅ Limite está **funcionando bem**
-            
-            **Próximos passos:** Continue monitorando normalmente.
-            """)
-            
-        elif percentual_ate_5usv >= 90:
-            st.warning(f"""
-            **⚠️ AVALIE COM CUIDADE O LIMITE DE 5 µSv/h**
-            
-            **Por que essa recomendação?**
-            
-            ⚠️ **{percentual_ate_5usv:.1f}% das amostras** estão dentro do limite  
-            ⚠️ **95% das amostras** têm dose ≤ **{dose_95th:.2f} µSv/h**  
-            ⚠️ **Pouca margem** de segurança  
-            ⚠️ **{amostras_acima_5usv} amostras** ({percentual_acima_5usv:.1f}%) acima do limite
-            
-            **Próximos passos:** Aumente a frequência de monitoramento.
-            """)
-            
-        else:
-            st.error(f"""
-            **❌ REAVALIE O LIMITE DE 5 µSv/h**
-            
-            **Por que essa recomendação?**
+        @st.fragment
+        def recomendacao(grafo):
+            st.header("RECOMENDAÇÃO PRÁTICA")
+            contagens = grafo['contagens']
+            percentual_ate_5usv = contagens['percentual_ate_limite']
+            amostras_acima_5usv = contagens['acima_limite']
+            percentual_acima_5usv = contagens['percentual_acima_limite']
+            dose_95th = grafo['percentis_dose'][95]
+            ic = grafo['intervalos']
+        
+            # Decisão robusta à incerteza amostral: limites de confiança em vez das estimativas pontuais
+            recomendacao = grafo['recomendacao']
+        
+            if recomendacao == MANTENHA:
+                st.success(f"""
+                **✅ MANTENHA O LIMITE DE 5 µSv/h**
+            
+                **Por que essa recomendação?**
+            
+                ✅ **{percentual_ate_5usv:.1f}% das amostras** estão DENTRO do limite  
+                ✅ **95% das amostras** têm dose ≤ **{dose_95th:.2f} µSv/h** (até {ic['P95'][1]:.2f} µSv/h com 95% de confiança)  
+                ✅ **Margem de segurança** adequada  
+                ✅ Limite está **funcionando bem**
+            
+                **Próximos passos:** Continue monitorando normalmente.
+                """)
+            
+            elif recomendacao == AVALIE:
+                st.warning(f"""
+                **⚠️ AVALIE COM CUIDADE O LIMITE DE 5 µSv/h**
+            
+                **Por que essa recomendação?**
+            
+                ⚠️ **{percentual_ate_5usv:.1f}% das amostras** estão dentro do limite  
+                ⚠️ **95% das amostras** têm dose ≤ **{dose_95th:.2f} µSv/h**  
+                ⚠️ **Pouca margem** de segurança  
+                ⚠️ **{amostras_acima_5usv} amostras** ({percentual_acima_5usv:.1f}%) acima do limite
+            
+                **Próximos passos:** Aumente a frequência de monitoramento.
+                """)
+            
+            else:
+                st.error(f"""
+                **❌ REAVALIE O LIMITE DE 5 µSv/h**
+            
+                **Por que essa recomendação?**
+            
+                ❌ Apenas **{percentual_ate_5usv:.1f}%** dentro do limite  
+                ❌ **{amostras_acima_5usv} amostras** ({percentual_acima_5usv:.1f}%) acima do limite  
+                ❌ **95% das amostras** têm dose ≤ **{dose_95th:.2f} µSv/h**  
+                ❌ **Risco frequente** de ultrapassar o limite
+            
+                **Próximos passos:** Considere ajustar o limite ou melhorar controles.
+                """)
+
+        recomendacao(grafo)
+
+        perfil.etapa("varredura")
+        # VARREDURA DE LIMITES: mesma recomendação para vários limites e tetos
+        @st.fragment
+        def varredura(df_original, chave_graficos):
+            if st.checkbox("🧪 Simular outros limites de dose e tetos de concentração"):
+                st.subheader("Varredura: Limite de Dose × Teto de Concentração")
+            
+                col1, col2 = st.columns(2)
+            
+                with col1:
+                    faixa_limites = st.slider("Limites de dose (µSv/h)", 1.0, 10.0, (3.0, 7.0), step=0.5)
+            
+                with col2:
+                    faixa_tetos = st.slider("Tetos de concentração (Bq/g)", 1.0, 20.0, (4.0, 12.0), step=1.0)
+            
+                varredura = varrer_limites(
+                    df_original['Resultado_ra226'], df_original['Resultado_ra228'],
+                    df_original['Taxa de Dose Máxima (µSv/h)'],
+                    np.arange(faixa_limites[0], faixa_limites[1] + 0.25, 0.5),
+                    np.arange(faixa_tetos[0], faixa_tetos[1] + 0.5, 1.0)
+                )
+            
+                # Mapa de viabilidade: verde = mantenha, amarelo = avalie, vermelho = reavalie
+                codigos = {MANTENHA: 0, AVALIE: 1, REAVALIE: 2}
+                mapa = np.vectorize(lambda d: codigos.get(d, np.nan), otypes=[float])(varredura['decisao'])
+            
+                def desenhar_varredura():
+                    import matplotlib.pyplot as plt
+                    from matplotlib.colors import ListedColormap
+                
+                    fig, ax = plt.subplots(figsize=(12, 6))
+                    ax.imshow(mapa, cmap=ListedColormap(['green', 'yellow', 'red']), vmin=0, vmax=2,
+                              aspect='auto', origin='lower', alpha=0.6)
+            
+                    for i in range(len(varredura['tetos'])):
+                        for j in range(len(varredura['limites'])):
+                            percentual = varredura['percentual'][i, j]
+                            if not np.isnan(percentual):
+                                ax.text(j, i, f"{percentual:.1f}%", ha='center', va='center', fontsize=8)
+            
+                    ax.set_xticks(range(len(varredura['limites'])))
+                    ax.set_xticklabels([f"{v:g}" for v in varredura['limites']])
+                    ax.set_yticks(range(len(varredura['tetos'])))
+                    ax.set_yticklabels([f"{v:g}" for v in varredura['tetos']])
+                    ax.set_xlabel('Limite de Dose (µSv/h)')
+                    ax.set_ylabel('Teto de Concentração (Bq/g)')
+                    ax.set_title('Viabilidade do Limite (verde = mantenha, amarelo = avalie, vermelho = reavalie)')
+                
+                    return fig
             
-            ❌ Apenas **{percentual_ate_5usv:.1f}%** dentro do limite  
-            ❌ **{amostras_acima_5usv} amostras** ({percentual_acima_5usv:.1f}%) acima do limite  
-            ❌ **95% das amostras** têm dose ≤ **{dose_95th:.2f} µSv/h**  
-            ❌ **Risco frequente** de ultrapassar o limite
+                st.image(renderizar(chave_graficos + (faixa_limites, faixa_tetos) + ('varredura', (12, 6)), desenhar_varredura), width="stretch")
             
-            **Próximos passos:** Considere ajustar o limite ou melhorar controles.
-            """)
+                st.dataframe(tabela_varredura(varredura).round(2), use_container_width=True)
+
+        varredura(df_original, chave_graficos)
 
+        perfil.etapa("concentracao_vs_dose")
         # RELAÇÃO ENTRE CONCENTRAÇÃO E DOSE (SIMPLES)
-        st.header("Relação: Concentração vs Dose")
+        @st.fragment
+        def concentracao_vs_dose(df_analysis, grafo, chave_graficos):
+            st.header("Relação: Concentração vs Dose")
+            stats_radionuclideos = grafo['radionuclideos']
+        
+            st.write(f"""
+            **Contexto das amostras analisadas:**
+            - **Ra-226:** {stats_radionuclideos['Ra226']['total']} amostras válidas
+            - **Ra-228:** {stats_radionuclideos['Ra228']['total']} amostras válidas  
+            - **Análise:** Vamos ver se amostras com maior concentração têm maior dose
+            """)
         
-        st.write(f"""
-        **Contexto das amostras analisadas:**
-        - **Ra-226:** {stats_radionuclideos['Ra226']['total']} amostras válidas
-        - **Ra-228:** {stats_radionuclideos['Ra228']['total']} amostras válidas  
-        - **Análise:** Vamos ver se amostras com maior concentração têm maior dose
-        """)
+            def desenhar_dispersao():
+                import matplotlib.pyplot as plt
+            
+                fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
+        
+                # Ra-226 vs Dose
+                dispersao(ax1, df_analysis['Resultado_ra226'], df_analysis['Taxa de Dose Máxima (µSv/h)'],
+                          cor='blue', limite=5.0)
+                ax1.set_xlabel('Concentração de Ra-226 (Bq/g)')
+                ax1.set_ylabel('Taxa de Dose (µSv/h)')
+                ax1.set_title('Ra-226: Maior concentração = Maior dose?')
+                ax1.legend()
+                ax1.grid(True, alpha=0.3)
         
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
-        
-        # Ra-226 vs Dose
-        scatter1 = ax1.scatter(df_analysis['Resultado_ra226'], 
-                              df_analysis['Taxa de Dose Máxima (µSv/h)'],
-                              alpha=0.6, c='blue', s=50)
-        ax1.axhline(y=5.0, color='red', linestyle='--', linewidth=2, label='Limite 5 µSv/h')
-        ax1.set_xlabel('Concentração de Ra-226 (Bq/g)')
-        ax1.set_ylabel('Taxa de Dose (µSv/h)')
-        ax1.set_title('Ra-226: Maior concentração = Maior dose?')
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-        
-        # Ra-228 vs Dose
-        scatter2 = ax2.scatter(df_analysis['Resultado_ra228'], 
-                              df_analysis['Taxa de Dose Máxima (µSv/h)'],
-                              alpha=0.6, c='red', s=50)
-        ax2.axhline(y=5.0, color='red', linestyle='--', linewidth=2, label='Limite 5 µSv/h')
-        ax2.set_xlabel('Concentração de Ra-228 (Bq/g)')
-        ax2.set_ylabel('Taxa de Dose (µSv/h)')
-        ax2.set_title('Ra-228: Maior concentração = Maior dose?')
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-        
-        st.pyplot(fig)
+                # Ra-228 vs Dose
+                dispersao(ax2, df_analysis['Resultado_ra228'], df_analysis['Taxa de Dose Máxima (µSv/h)'],
+                          cor='red', limite=5.0)
+                ax2.set_xlabel('Concentração de Ra-228 (Bq/g)')
+                ax2.set_ylabel('Taxa de Dose (µSv/h)')
+                ax2.set_title('Ra-228: Maior concentração = Maior dose?')
+                ax2.legend()
+                ax2.grid(True, alpha=0.3)
+            
+                return fig
+        
+            st.image(renderizar(chave_graficos + ('dispersao', (15, 5)), desenhar_dispersao), width="stretch")
+
+        concentracao_vs_dose(df_analysis, grafo, chave_graficos)
 
     else:
         st.warning("Não há dados para análise com os critérios selecionados.")
 
-    # DOWNLOAD SIMPLIFICADO
-    st.header("📥 Baixar Dados da Análise")
+    perfil.etapa("novos_certificados")
+    # NOVOS CERTIFICADOS: estatísticas atualizadas sem recalcular o histórico
+    if certificados_novos:
+        st.header("📎 Resultados com Novos Certificados")
+        
+        # Cada sessão sobrepõe as linhas novas ao resumo inicial (compartilhado, nunca alterado nem
+        # copiado). O resumo é refeito quando os filtros ou o conjunto de arquivos enviados mudam (um
+        # arquivo retirado do envio deixa de contar) e reaproveitado nas demais reexecuções
+        chave_incremental = (chave_graficos, tuple((arquivo.name, arquivo.size) for arquivo in certificados_novos))
+        if st.session_state.get('chave_incremental') != chave_incremental:
+            resumo_incremental = ResumoSobreposto(resumo_inicial(df_analysis, chave_graficos))
+            for arquivo in certificados_novos:
+                novos = ler_certificados(arquivo)
+                if not show_all_data:
+                    novos = filtrar_ate_8bq(novos)
+                resumo_incremental.anexar(novos)
+            st.session_state['resumo_incremental'] = resumo_incremental
+            st.session_state['chave_incremental'] = chave_incremental
+        resumo_incremental = st.session_state['resumo_incremental']
+        
+        amostras_novas = resumo_incremental.count - grafo['resumo_dose'].count
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("Total de Amostras", resumo_incremental.count, delta=amostras_novas)
+        
+        with col2:
+            st.metric("Dentro do Limite (≤ 5 µSv/h)", f"{resumo_incremental.percentual_ate(5.0):.1f}%")
+        
+        with col3:
+            st.metric("P95 (aproximado)", f"{resumo_incremental.percentil(95):.3f} µSv/h")
+        
+        with col4:
+            st.metric("P99 (aproximado)", f"{resumo_incremental.percentil(99):.3f} µSv/h")
+        
+        st.caption("Percentis estimados por esboço de quantis (erro relativo de até 1%); contagens exatas.")
+        
+        faixas_incremental = resumo_incremental.estatisticas_radionuclideos()
+        st.dataframe(pd.DataFrame({
+            'Faixa': ['≤ 1 Bq/g', '1-3 Bq/g', '3-5 Bq/g', '5-8 Bq/g', 'Total'],
+            'Ra-226': [faixas_incremental['Ra226'][r] for r in ('ate_1bq', '1_3bq', '3_5bq', '5_8bq', 'total')],
+            'Ra-228': [faixas_incremental['Ra228'][r] for r in ('ate_1bq', '1_3bq', '3_5bq', '5_8bq', 'total')],
+        }), use_container_width=True)
 
-    if len(df_analysis) > 0:
-        csv = df_analysis[['Taxa de Dose Máxima (µSv/h)', 'Resultado_ra226', 'Resultado_ra228']].to_csv(index=False)
-        st.download_button(
-            label="📄 Baixar planilha com os dados analisados",
-            data=csv,
-            file_name="analise_limite_5usvh.csv",
-            mime="text/csv"
-        )
+    perfil.etapa("download")
+    # DOWNLOAD SIMPLIFICADO
+    @st.fragment
+    def download(df_analysis, chave_graficos):
+        st.header("📥 Baixar Dados da Análise")
+
+        if len(df_analysis) > 0:
+            formato = st.radio("Formato do arquivo", list(FORMATOS), format_func=lambda f: FORMATOS[f][0],
+                               horizontal=True)
+            # O arquivo só é gerado quando pedido e fica em cache por estado dos filtros e formato
+            chave_exportacao = (chave_graficos, 'analise')
+            if cache_exportacoes.contem(chave_exportacao, formato) or st.button("Preparar arquivo"):
+                colunas = ['Taxa de Dose Máxima (µSv/h)', 'Resultado_ra226', 'Resultado_ra228']
+                with st.spinner("Gerando arquivo..."):
+                    arquivo = exportar(chave_exportacao, formato, df_analysis[colunas])
+                with arquivo:
+                    st.download_button(
+                        label="📄 Baixar planilha com os dados analisados",
+                        data=arquivo,
+                        file_name=nome_arquivo("analise_limite_5usvh", formato),
+                        mime=tipo_mime(formato)
+                    )
+
+    download(df_analysis, chave_graficos)
 
     # RODAPÉ COM EXPLICAÇÕES
     st.markdown("---")
@@ -512,6 +762,8 @@ if pagina_selecionada == "📊 Análise Principal":
 
 # PÁGINA DE ESTUDO DETALHADO (mantida igual)
 else:
+    perfil.etapa("estudo_detalhado")
+    
     st.title("Estudo Detalhado - Metodologia e Parâmetros")
     
     st.markdown("""
@@ -705,4 +957,26 @@ st.sidebar.markdown("""
 **Desenvolvido por**  
 *Equipe de Radioproteção e SMS*  
 *Análise Estatística para Validação de Limites Operacionais*
-""")
\ No newline at end of file
+""")
+
+# Painel de desempenho: seções desta execução e histórico do log
+execucao = perfil.finalizar()
+if painel_desempenho:
+    st.sidebar.header("⏱️ Desempenho")
+    st.sidebar.metric("Esta execução", f"{execucao['tempo_s'] * 1000:.0f} ms")
+    secoes = pd.DataFrame(execucao['secoes']).set_index('secao')
+    st.sidebar.dataframe(pd.DataFrame({
+        'tempo (ms)': secoes['tempo_s'] * 1000,
+        'CPU (ms)': secoes['cpu_s'] * 1000,
+        'pico (MB)': secoes['pico_mb'],
+    }).round(1), use_container_width=True)
+    if not execucao['memoria']:
+        st.sidebar.caption("Pico de memória indisponível: outra sessão está medindo a memória agora")
+    st.sidebar.caption("Histórico (p50/p95 por seção)")
+    st.sidebar.dataframe(resumir_log(pagina="main").round(1), use_container_width=True)
+    st.sidebar.caption("Memória por coluna dos dados carregados")
+    st.sidebar.dataframe(memoria_por_coluna(load_data()[0]).round(1), use_container_width=True)
+    if pagina_selecionada == "📊 Análise Principal":
+        # Nós do grafo de estatísticas: calculados agora x reaproveitados da memória
+        st.sidebar.caption(f"Estatísticas calculadas: {', '.join(grafo.calculados) or 'nenhuma'}")
+        st.sidebar.caption(f"Estatísticas usadas: {', '.join(grafo.avaliados()) or 'nenhuma'}")
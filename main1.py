@@ -1,9 +1,19 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
+
+from dosimetria import ARQUIVO_PADRAO
+from dosimetria.envoltoria import dose_envoltoria, envoltoria_dataframe, tetos_concentracao
+from dosimetria.esquema import compactar, memoria_por_coluna
+from dosimetria.estatisticas import impressao_digital
+from dosimetria.exportacao import FORMATOS, cache_exportacoes, exportar, nome_arquivo, tipo_mime
+from dosimetria.figuras import dispersao, renderizar
+from dosimetria.indice import IndiceLimiares
+from dosimetria.montecarlo import simular_incerteza
+from dosimetria.perfil import Perfilador, resumir_log
+from dosimetria.regressao import regressoes_dataframe
+from dosimetria.resultados import ler_resultados, preparar_resultados
+from dosimetria.vigia import RecargaIncremental
 
 # Configuração da página
 st.set_page_config(page_title="Análise Radiométrica - GLP", layout="wide")
@@ -13,19 +23,20 @@ st.title("📊 Análise Estatística de Resultados Radiométricos")
 st.subheader("Relação entre Taxa de Dose e Concentrações de Ra-226 e Ra-228")
 
 # Processamento dos dados
-@st.cache_data
-def load_data():
-    # Carregar os dados do arquivo Excel
-    df = pd.read_excel("Resultados de análises radiométricas - GLP.xlsx", sheet_name="Macaé")
+def ler_planilhas(planilhas=None):
+    # Carregar as planilhas de resultados (um site por planilha, via cache colunar em disco)
+    return ler_resultados(ARQUIVO_PADRAO, colunas=None, planilhas=planilhas)
+
+def preparar_linhas(bruto):
+    # Resultados "< CMD" / "< 0,03" no limite de detecção, como nas outras páginas
+    df = preparar_resultados(bruto, manter_cmd=True)
     
     # Limpeza e preparação dos dados
     # Renomear colunas para facilitar o trabalho
     df.columns = [str(col).strip() for col in df.columns]
     
-    # Converter colunas numéricas - usando os nomes corretos da sua planilha
-    numeric_columns = ['Taxa de Dose Máxima (µSv/h)', 'Resultado_ra226', 
-                      'Incerteza', 'Resultado_ra228', 
-                      'Incerteza.1', 'Massa Líquida (kg)']
+    # Converter as demais colunas numéricas - usando os nomes corretos da sua planilha
+    numeric_columns = ['Incerteza', 'Incerteza.1', 'Massa Líquida (kg)']
     
     for col in numeric_columns:
         if col in df.columns:
@@ -35,13 +46,79 @@ def load_data():
     df = df.dropna(subset=['Taxa de Dose Máxima (µSv/h)', 'Resultado_ra226', 
                           'Resultado_ra228'])
     
-    return df
+    return {'completo': df}
+
+def finalizar_quadros(quadros):
+    # Tipos compactos: float32 nas medições auxiliares, categorias nos rótulos, ano inteiro e datas
+    df = compactar(quadros['completo'])
+    
+    # Impressão digital dos dados carregados (identifica o conjunto nos caches)
+    df.attrs['impressao'] = impressao_digital(
+        df[['Taxa de Dose Máxima (µSv/h)', 'Resultado_ra226', 'Resultado_ra228']].to_numpy()
+    )
+    
+    return {'completo': df}
+
+# Recarga por planilha e por linha quando a planilha muda (uma instância por processo)
+@st.cache_resource
+def recarga_dados():
+    return RecargaIncremental('main1', ler_planilhas, preparar_linhas, finalizar_quadros)
+
+def load_data():
+    # Uma única cópia somente leitura por processo, compartilhada por todas as sessões
+    return recarga_dados().obter().dataframe('completo')
+
+# Índice de limiares (concentração máxima x dose), construído uma vez por conjunto de dados;
+# a grade vai só até o máximo dos sliders de concentração (20 Bq/g) e de dose (10 µSv/h).
+# Chave por conjunto e sites selecionados; as combinações menos usadas saem do cache
+@st.cache_resource(max_entries=8)
+def construir_indice(_df, chave):
+    concentracao = np.maximum(_df['Resultado_ra226'].to_numpy(), _df['Resultado_ra228'].to_numpy())
+    return IndiceLimiares(concentracao, _df['Taxa de Dose Máxima (µSv/h)'].to_numpy(),
+                          teto_conc=20.0, teto_dose=10.0)
+
+# Simulação Monte Carlo das concentrações, em cache por conjunto de dados e parâmetros; cada
+# posição dos sliders é uma entrada, então o cache é limitado e as entradas expiram
+@st.cache_data(show_spinner="Simulando incertezas...", max_entries=32, ttl=3600)
+def simular_monte_carlo(_df, chave, teto, n_realizacoes, fator_abrangencia):
+    return simular_incerteza(
+        _df['Resultado_ra226'].to_numpy(), _df['Incerteza'].to_numpy(),
+        _df['Resultado_ra228'].to_numpy(), _df['Incerteza.1'].to_numpy(),
+        _df['Taxa de Dose Máxima (µSv/h)'].to_numpy(),
+        teto=teto, limite=5.0, n_realizacoes=n_realizacoes, fator_abrangencia=fator_abrangencia
+    )
+
+# Regressões da dose sobre as concentrações, em cache por filtro, método e agrupamento (limitado:
+# cada posição dos sliders é uma entrada)
+@st.cache_data(show_spinner=False, max_entries=64, ttl=3600)
+def ajustar_regressoes_cache(_df, chave, metodo, grupo=None):
+    return regressoes_dataframe(_df, metodo=metodo, grupo=grupo)
+
+# Envoltória P95/P99 da dose (regressão quantílica), em cache por conjunto de dados e sites
+@st.cache_data(show_spinner="Ajustando a envoltória de dose...", max_entries=8, ttl=3600)
+def ajustar_envoltoria_cache(_df, chave):
+    return envoltoria_dataframe(_df)
 
+# Medição de tempo (e, com o painel ativo, de memória) de cada seção desta execução
+painel_desempenho = st.sidebar.checkbox("⏱️ Painel de desempenho", value=False)
+perfil = Perfilador("main1", memoria=painel_desempenho)
+
+perfil.etapa("carga_dados")
 df = load_data()
 
+perfil.etapa("filtros")
 # Sidebar com filtros
 st.sidebar.header("🔧 Filtros de Análise")
 
+# Filtro por site (planilha de origem)
+sites_disponiveis = list(df['site'].unique())
+sites_selecionados = st.sidebar.multiselect(
+    "Sites para análise",
+    sites_disponiveis,
+    default=["Macaé"] if "Macaé" in sites_disponiveis else sites_disponiveis
+)
+df = df[df['site'].isin(sites_selecionados)]
+
 # Filtro por concentração máxima
 max_concentration = st.sidebar.slider(
     "Concentração máxima para análise (Bq/g)",
@@ -54,21 +131,40 @@ max_dose_rate = st.sidebar.slider(
     min_value=0.1, max_value=10.0, value=5.0, step=0.1
 )
 
-# Aplicar filtros
-filtered_df = df[
-    (df['Resultado_ra226'] <= max_concentration) & 
-    (df['Resultado_ra228'] <= max_concentration) &
-    (df['Taxa de Dose Máxima (µSv/h)'] <= max_dose_rate)
-]
+# Modo Monte Carlo: propaga a incerteza declarada das concentrações
+modo_monte_carlo = st.sidebar.checkbox("🎲 Propagar incerteza das concentrações (Monte Carlo)", value=False)
+if modo_monte_carlo:
+    n_realizacoes = st.sidebar.select_slider("Número de realizações", options=[500, 1000, 2000, 5000], value=1000)
+    fator_abrangencia = st.sidebar.radio(
+        "Fator de abrangência (k) da incerteza declarada", [1, 2], horizontal=True,
+        help="Use k=2 se a incerteza do certificado for expandida (≈95%)"
+    )
+
+# Envoltória de dose: deriva o teto de concentração a partir de um limite de dose
+modo_envoltoria = st.sidebar.checkbox("📈 Envoltória de dose (regressão quantílica)", value=False)
+if modo_envoltoria:
+    limite_envoltoria = st.sidebar.number_input(
+        "Limite de dose para o teto (µSv/h)", min_value=0.1, max_value=20.0, value=5.0, step=0.1
+    )
+
+perfil.etapa("indice_filtro")
+# Aplicar filtros (busca binária no índice, sem máscaras sobre todo o DataFrame)
+indice = construir_indice(df, (df.attrs['impressao'], tuple(sites_selecionados)))
+filtered_df = df.iloc[indice.selecionar(max_concentration, max_dose_rate)]
+amostras_filtradas = indice.contar(max_concentration, max_dose_rate)
 
+# Chave dos gráficos em cache: dados carregados + estado dos filtros
+chave_graficos = (df.attrs['impressao'], tuple(sites_selecionados), max_concentration, max_dose_rate)
+
+perfil.etapa("metricas")
 # Layout principal
 col1, col2 = st.columns(2)
 
 with col1:
     st.metric("Total de Amostras", len(df))
-    st.metric("Amostras Filtradas", len(filtered_df))
+    st.metric("Amostras Filtradas", amostras_filtradas)
     if len(df) > 0:
-        st.metric("Percentual Utilizado", f"{(len(filtered_df)/len(df)*100):.1f}%")
+        st.metric("Percentual Utilizado", f"{(amostras_filtradas/len(df)*100):.1f}%")
     else:
         st.metric("Percentual Utilizado", "0%")
 
@@ -82,6 +178,7 @@ with col2:
         st.metric("Ra-228 Máximo (Bq/g)", "N/A")
         st.metric("Dose Máxima (µSv/h)", "N/A")
 
+perfil.etapa("estatistica_descritiva")
 # Análise estatística
 st.header("📈 Análise Estatística Detalhada")
 
@@ -119,55 +216,65 @@ if len(filtered_df) > 0:
     # Visualizações
     st.header("📊 Visualizações")
 
+    perfil.etapa("grafico_dispersao")
     # Gráfico 1: Dispersão Ra-226 vs Taxa de Dose
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-
-    # Scatter plot Ra-226
-    scatter1 = ax1.scatter(filtered_df['Resultado_ra226'], 
-                          filtered_df['Taxa de Dose Máxima (µSv/h)'],
-                          alpha=0.6, c='blue', s=50)
-    ax1.set_xlabel('Ra-226 (Bq/g)')
-    ax1.set_ylabel('Taxa de Dose (µSv/h)')
-    ax1.set_title('Ra-226 vs Taxa de Dose')
-    ax1.grid(True, alpha=0.3)
-
-    # Scatter plot Ra-228
-    scatter2 = ax2.scatter(filtered_df['Resultado_ra228'], 
-                          filtered_df['Taxa de Dose Máxima (µSv/h)'],
-                          alpha=0.6, c='red', s=50)
-    ax2.set_xlabel('Ra-228 (Bq/g)')
-    ax2.set_ylabel('Taxa de Dose (µSv/h)')
-    ax2.set_title('Ra-228 vs Taxa de Dose')
-    ax2.grid(True, alpha=0.3)
-
-    st.pyplot(fig)
+    def desenhar_dispersao():
+        # matplotlib só é carregado quando a figura não está no cache
+        import matplotlib.pyplot as plt
+        
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+
+        # Scatter plot Ra-226
+        dispersao(ax1, filtered_df['Resultado_ra226'], filtered_df['Taxa de Dose Máxima (µSv/h)'], cor='blue')
+        ax1.set_xlabel('Ra-226 (Bq/g)')
+        ax1.set_ylabel('Taxa de Dose (µSv/h)')
+        ax1.set_title('Ra-226 vs Taxa de Dose')
+        ax1.grid(True, alpha=0.3)
+
+        # Scatter plot Ra-228
+        dispersao(ax2, filtered_df['Resultado_ra228'], filtered_df['Taxa de Dose Máxima (µSv/h)'], cor='red')
+        ax2.set_xlabel('Ra-228 (Bq/g)')
+        ax2.set_ylabel('Taxa de Dose (µSv/h)')
+        ax2.set_title('Ra-228 vs Taxa de Dose')
+        ax2.grid(True, alpha=0.3)
+        
+        return fig
+    
+    st.image(renderizar(chave_graficos + ('dispersao', (15, 6)), desenhar_dispersao), width="stretch")
 
+    perfil.etapa("grafico_histogramas")
     # Gráfico 2: Histogramas
-    fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 5))
-
-    # Histograma Ra-226
-    ax1.hist(filtered_df['Resultado_ra226'], bins=20, alpha=0.7, color='blue', edgecolor='black')
-    ax1.set_xlabel('Ra-226 (Bq/g)')
-    ax1.set_ylabel('Frequência')
-    ax1.set_title('Distribuição de Ra-226')
-    ax1.grid(True, alpha=0.3)
-
-    # Histograma Ra-228
-    ax2.hist(filtered_df['Resultado_ra228'], bins=20, alpha=0.7, color='red', edgecolor='black')
-    ax2.set_xlabel('Ra-228 (Bq/g)')
-    ax2.set_ylabel('Frequência')
-    ax2.set_title('Distribuição de Ra-228')
-    ax2.grid(True, alpha=0.3)
-
-    # Histograma Taxa de Dose
-    ax3.hist(filtered_df['Taxa de Dose Máxima (µSv/h)'], bins=20, alpha=0.7, color='green', edgecolor='black')
-    ax3.set_xlabel('Taxa de Dose (µSv/h)')
-    ax3.set_ylabel('Frequência')
-    ax3.set_title('Distribuição da Taxa de Dose')
-    ax3.grid(True, alpha=0.3)
-
-    st.pyplot(fig)
+    def desenhar_histogramas():
+        import matplotlib.pyplot as plt
+        
+        fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 5))
+
+        # Histograma Ra-226
+        ax1.hist(filtered_df['Resultado_ra226'], bins=20, alpha=0.7, color='blue', edgecolor='black')
+        ax1.set_xlabel('Ra-226 (Bq/g)')
+        ax1.set_ylabel('Frequência')
+        ax1.set_title('Distribuição de Ra-226')
+        ax1.grid(True, alpha=0.3)
+
+        # Histograma Ra-228
+        ax2.hist(filtered_df['Resultado_ra228'], bins=20, alpha=0.7, color='red', edgecolor='black')
+        ax2.set_xlabel('Ra-228 (Bq/g)')
+        ax2.set_ylabel('Frequência')
+        ax2.set_title('Distribuição de Ra-228')
+        ax2.grid(True, alpha=0.3)
+
+        # Histograma Taxa de Dose
+        ax3.hist(filtered_df['Taxa de Dose Máxima (µSv/h)'], bins=20, alpha=0.7, color='green', edgecolor='black')
+        ax3.set_xlabel('Taxa de Dose (µSv/h)')
+        ax3.set_ylabel('Frequência')
+        ax3.set_title('Distribuição da Taxa de Dose')
+        ax3.grid(True, alpha=0.3)
+        
+        return fig
+    
+    st.image(renderizar(chave_graficos + ('histogramas', (18, 5)), desenhar_histogramas), width="stretch")
 
+    perfil.etapa("correlacao")
     # Análise de correlação
     st.header("🔗 Análise de Correlação")
 
@@ -175,43 +282,82 @@ if len(filtered_df) > 0:
     corr_matrix = filtered_df[['Resultado_ra226', 'Resultado_ra228', 
                               'Taxa de Dose Máxima (µSv/h)']].corr()
 
-    fig, ax = plt.subplots(figsize=(8, 6))
-    sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', center=0, ax=ax,
-                square=True, fmt='.3f', cbar_kws={"shrink": .8})
-    ax.set_title('Matriz de Correlação')
-    st.pyplot(fig)
+    def desenhar_correlacao():
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
+        fig, ax = plt.subplots(figsize=(8, 6))
+        sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', center=0, ax=ax,
+                    square=True, fmt='.3f', cbar_kws={"shrink": .8})
+        ax.set_title('Matriz de Correlação')
+        
+        return fig
+    
+    st.image(renderizar(chave_graficos + ('correlacao', (8, 6)), desenhar_correlacao), width="stretch")
 
+    perfil.etapa("regressao")
     # Análise de regressão
     st.subheader("Análise de Regressão")
 
-    col1, col2 = st.columns(2)
+    metodos_regressao = {
+        "Mínimos quadrados": "mqo",
+        "Ponderada pela incerteza": "incerteza",
+        "Robusta (Huber)": "huber",
+        "Robusta (Theil-Sen)": "theil-sen",
+    }
+    nome_metodo = st.selectbox("Método de ajuste", list(metodos_regressao), index=0)
+    metodo_regressao = metodos_regressao[nome_metodo]
+    regressoes = ajustar_regressoes_cache(filtered_df, chave_graficos, metodo_regressao)
+
+    def escrever_regressao(modelo, inclinacoes):
+        linha = regressoes[regressoes['modelo'] == modelo].iloc[0]
+        st.write(f"**{modelo} vs Taxa de Dose:**")
+        for coluna, rotulo in inclinacoes:
+            st.write(f"{rotulo}: {linha[coluna]:.4f}")
+        st.write(f"Coeficiente linear: {linha['intercepto']:.4f}")
+        st.write(f"R²: {linha['r2']:.4f}")
+        if metodo_regressao != "theil-sen":
+            for coluna, rotulo in inclinacoes:
+                p_valor = linha[coluna.replace('coef', 'p')]
+                st.write(f"Valor-p{rotulo.removeprefix('Coeficiente angular')}: {p_valor:.4f}")
+
+    col1, col2, col3 = st.columns(3)
 
     with col1:
         # Regressão Ra-226 vs Dose
-        slope_226, intercept_226, r_value_226, p_value_226, std_err_226 = stats.linregress(
-            filtered_df['Resultado_ra226'], 
-            filtered_df['Taxa de Dose Máxima (µSv/h)']
-        )
-        
-        st.write("**Ra-226 vs Taxa de Dose:**")
-        st.write(f"Coeficiente angular: {slope_226:.4f}")
-        st.write(f"Coeficiente linear: {intercept_226:.4f}")
-        st.write(f"R²: {r_value_226**2:.4f}")
-        st.write(f"Valor-p: {p_value_226:.4f}")
+        escrever_regressao("Ra-226", [("coef_ra226", "Coeficiente angular")])
 
     with col2:
         # Regressão Ra-228 vs Dose
-        slope_228, intercept_228, r_value_228, p_value_228, std_err_228 = stats.linregress(
-            filtered_df['Resultado_ra228'], 
-            filtered_df['Taxa de Dose Máxima (µSv/h)']
+        escrever_regressao("Ra-228", [("coef_ra228", "Coeficiente angular")])
+
+    with col3:
+        # Regressão conjunta Ra-226 + Ra-228 vs Dose
+        if metodo_regressao == "theil-sen":
+            st.write("**Ra-226 + Ra-228 vs Taxa de Dose:**")
+            st.write("O Theil-Sen só se aplica aos modelos com uma concentração.")
+        else:
+            escrever_regressao("Ra-226 + Ra-228", [("coef_ra226", "Coeficiente angular (Ra-226)"),
+                                                   ("coef_ra228", "Coeficiente angular (Ra-228)")])
+
+    with st.expander("Regressão por grupo"):
+        grupos_regressao = {
+            "Site": "site",
+            "Ano de geração": "Ano de Geração",
+            "Tipo de resíduo": "Tipo de Resíduo",
+        }
+        nome_grupo = st.selectbox("Agrupar por", list(grupos_regressao), index=0)
+        por_grupo = ajustar_regressoes_cache(filtered_df, chave_graficos, metodo_regressao,
+                                             grupos_regressao[nome_grupo])
+        st.dataframe(
+            por_grupo[['grupo', 'modelo', 'n', 'intercepto', 'coef_ra226', 'coef_ra228', 'r2']]
+            .rename(columns={'grupo': nome_grupo, 'modelo': 'Modelo', 'intercepto': 'Coeficiente linear',
+                             'coef_ra226': 'Coef. Ra-226', 'coef_ra228': 'Coef. Ra-228', 'r2': 'R²'})
+            .round(4),
+            use_container_width=True, hide_index=True
         )
-        
-        st.write("**Ra-228 vs Taxa de Dose:**")
-        st.write(f"Coeficiente angular: {slope_228:.4f}")
-        st.write(f"Coeficiente linear: {intercept_228:.4f}")
-        st.write(f"R²: {r_value_228**2:.4f}")
-        st.write(f"Valor-p: {p_value_228:.4f}")
 
+    perfil.etapa("limites")
     # Análise de limites
     st.header("🎯 Análise de Limites Operacionais")
 
@@ -231,6 +377,7 @@ if len(filtered_df) > 0:
     with col3:
         st.metric("Percentil 99%", f"{dose_99th:.2f} µSv/h")
 
+    perfil.etapa("recomendacoes")
     # Recomendações
     st.header("💡 Recomendações e Conclusões")
 
@@ -250,19 +397,157 @@ if len(filtered_df) > 0:
 else:
     st.warning("⚠️ Não há dados suficientes para análise com os filtros atuais.")
 
-# Download dos dados filtrados
-st.header("📥 Download dos Dados")
+perfil.etapa("monte_carlo")
+# Propagação da incerteza das concentrações
+if modo_monte_carlo and len(df) > 0:
+    st.header("🎲 Incerteza das Concentrações (Monte Carlo)")
+    
+    simulacao = simular_monte_carlo(
+        df, (df.attrs['impressao'], tuple(sites_selecionados)), max_concentration, n_realizacoes, fator_abrangencia
+    )
+    
+    st.write(f"""
+    Cada uma das **{n_realizacoes} realizações** sorteia Ra-226 e Ra-228 de todas as amostras
+    a partir da incerteza declarada (k = {fator_abrangencia}); a taxa de dose é mantida como medida.
+    """)
+    
+    prob_acima = simulacao['prob_acima']
+    nominal_dentro = (df['Resultado_ra226'] <= max_concentration) & (df['Resultado_ra228'] <= max_concentration)
+    percentual_mc = simulacao['percentual'][~np.isnan(simulacao['percentual'])]
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric(f"Amostras ≤ {max_concentration:g} Bq/g (média)", f"{simulacao['amostras'].mean():.1f}",
+                  delta=f"{simulacao['amostras'].mean() - nominal_dentro.sum():.1f} vs. nominal")
+    
+    with col2:
+        st.metric(f"Com P(> {max_concentration:g} Bq/g) ≥ 5%", int(np.count_nonzero(prob_acima >= 0.05)))
+    
+    with col3:
+        if len(percentual_mc) > 0:
+            st.metric("Dose ≤ 5 µSv/h (IC 95%)",
+                      f"{np.percentile(percentual_mc, 2.5):.1f}% a {np.percentile(percentual_mc, 97.5):.1f}%")
+        else:
+            st.metric("Dose ≤ 5 µSv/h (IC 95%)", "N/A")
+    
+    # Distribuição das contagens por faixa ao longo das realizações
+    st.subheader("Contagens por Faixa de Concentração")
+    
+    rotulos = ['≤ 1 Bq/g', '1-3 Bq/g', '3-5 Bq/g', '5-8 Bq/g', '> 8 Bq/g']
+    faixas_mc = pd.DataFrame({'Faixa': rotulos})
+    for nome, contagens in simulacao['faixas'].items():
+        faixas_mc[f'{nome} (média)'] = contagens.mean(axis=0).round(1)
+        faixas_mc[f'{nome} (P2,5 - P97,5)'] = [
+            f"{inferior:.0f} - {superior:.0f}"
+            for inferior, superior in zip(np.percentile(contagens, 2.5, axis=0), np.percentile(contagens, 97.5, axis=0))
+        ]
+    st.dataframe(faixas_mc, use_container_width=True)
+    
+    # Amostras nominalmente dentro do teto, mas com chance relevante de ultrapassá-lo
+    st.subheader(f"Amostras com Risco de Ultrapassar {max_concentration:g} Bq/g")
+    
+    em_risco = df.assign(**{
+        'P(Ra-226 > teto)': simulacao['prob_acima_226'],
+        'P(Ra-228 > teto)': simulacao['prob_acima_228'],
+        'P(> teto)': prob_acima,
+    })[nominal_dentro.to_numpy() & (prob_acima >= 0.05)].sort_values('P(> teto)', ascending=False)
+    
+    if len(em_risco) > 0:
+        colunas_risco = [c for c in ['Certificado de Análise', 'No\xa0Volume'] if c in em_risco.columns]
+        st.dataframe(em_risco[colunas_risco + ['Resultado_ra226', 'Incerteza', 'Resultado_ra228', 'Incerteza.1',
+                                               'P(Ra-226 > teto)', 'P(Ra-228 > teto)', 'P(> teto)']],
+                     use_container_width=True)
+    else:
+        st.info("Nenhuma amostra dentro do teto tem probabilidade ≥ 5% de ultrapassá-lo.")
 
-if len(filtered_df) > 0:
-    csv = filtered_df.to_csv(index=False)
-    st.download_button(
-        label="Baixar dados filtrados como CSV",
-        data=csv,
-        file_name="dados_radiometricos_filtrados.csv",
-        mime="text/csv"
+perfil.etapa("envoltoria")
+# Envoltória superior da dose e teto de concentração compatível com o limite
+if modo_envoltoria and len(df) > 0:
+    st.header("📈 Envoltória de Dose (Regressão Quantílica)")
+    
+    # Ajustada sobre todas as amostras dos sites, sem o teto de concentração que se quer derivar
+    envoltoria = tetos_concentracao(
+        ajustar_envoltoria_cache(df, (df.attrs['impressao'], tuple(sites_selecionados))), limite_envoltoria
     )
-else:
-    st.info("Não há dados para download com os filtros atuais.")
+    
+    st.write(f"""
+    Os percentis 95 e 99 da taxa de dose são ajustados como função linear das concentrações.
+    A envoltória é avaliada no pior caso (Ra-226 e Ra-228 no teto) e invertida para obter a maior
+    concentração compatível com **{limite_envoltoria:g} µSv/h**.
+    """)
+    
+    conjunta = envoltoria[envoltoria['modelo'] == 'Ra-226 + Ra-228'].set_index('quantil')
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Teto pela envoltória P95", f"{conjunta.loc[0.95, 'concentracao_maxima']:.2f} Bq/g")
+    
+    with col2:
+        st.metric("Teto pela envoltória P99", f"{conjunta.loc[0.99, 'concentracao_maxima']:.2f} Bq/g")
+    
+    with col3:
+        st.metric("Teto atual", f"{max_concentration:g} Bq/g")
+    
+    st.dataframe(
+        envoltoria.assign(quantil=envoltoria['quantil'].map(lambda q: f"P{q * 100:g}"))
+        [['quantil', 'modelo', 'intercepto', 'coef_ra226', 'coef_ra228', 'concentracao_maxima']]
+        .rename(columns={'quantil': 'Quantil', 'modelo': 'Modelo', 'intercepto': 'Coeficiente linear',
+                         'coef_ra226': 'Coef. Ra-226', 'coef_ra228': 'Coef. Ra-228',
+                         'concentracao_maxima': 'Concentração máxima (Bq/g)'})
+        .round(4),
+        use_container_width=True, hide_index=True
+    )
+    
+    def desenhar_envoltoria():
+        import matplotlib.pyplot as plt
+        
+        concentracao = np.maximum(df['Resultado_ra226'], df['Resultado_ra228'])
+        fig, ax = plt.subplots(figsize=(10, 6))
+        dispersao(ax, concentracao, df['Taxa de Dose Máxima (µSv/h)'], cor='green', limite=limite_envoltoria)
+        
+        grade = np.linspace(0, np.nanmax(concentracao), 200)
+        for (quantil, linha), estilo in zip(conjunta.iterrows(), ['-', '--']):
+            ax.plot(grade, dose_envoltoria(linha, grade), color='black', linestyle=estilo,
+                    label=f'Envoltória P{quantil * 100:g}')
+        ax.set_xlabel('max(Ra-226, Ra-228) (Bq/g)')
+        ax.set_ylabel('Taxa de Dose (µSv/h)')
+        ax.set_title('Envoltória Superior da Taxa de Dose')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        
+        return fig
+    
+    st.image(renderizar((df.attrs['impressao'], tuple(sites_selecionados), 'envoltoria', limite_envoltoria, (10, 6)),
+                        desenhar_envoltoria), width="stretch")
+
+perfil.etapa("download")
+# Download dos dados filtrados (fragmento: escolher o formato e preparar o arquivo não
+# reexecutam a página)
+@st.fragment
+def download(filtered_df, chave_graficos):
+    st.header("📥 Download dos Dados")
+
+    if len(filtered_df) > 0:
+        formato = st.radio("Formato do arquivo", list(FORMATOS), format_func=lambda f: FORMATOS[f][0],
+                           horizontal=True)
+        # O arquivo só é gerado quando pedido e fica em cache por estado dos filtros e formato
+        chave_exportacao = (chave_graficos, 'filtrados')
+        if cache_exportacoes.contem(chave_exportacao, formato) or st.button("Preparar arquivo"):
+            with st.spinner("Gerando arquivo..."):
+                arquivo = exportar(chave_exportacao, formato, filtered_df)
+            with arquivo:
+                st.download_button(
+                    label=f"Baixar dados filtrados ({FORMATOS[formato][0]})",
+                    data=arquivo,
+                    file_name=nome_arquivo("dados_radiometricos_filtrados", formato),
+                    mime=tipo_mime(formato)
+                )
+    else:
+        st.info("Não há dados para download com os filtros atuais.")
+
+download(filtered_df, chave_graficos)
 
 # Informações adicionais
 st.sidebar.header("ℹ️ Sobre a Análise")
@@ -278,4 +563,22 @@ e taxas de dose, com ênfase no limite operacional de 5 µSv/h.
 - Resultado_ra226: Concentração de Ra-226
 - Resultado_ra228: Concentração de Ra-228  
 - Taxa de Dose Máxima (µSv/h): Taxa de dose medida
-""")
\ No newline at end of file
+""")
+
+# Painel de desempenho: seções desta execução e histórico do log
+execucao = perfil.finalizar()
+if painel_desempenho:
+    st.sidebar.header("⏱️ Desempenho")
+    st.sidebar.metric("Esta execução", f"{execucao['tempo_s'] * 1000:.0f} ms")
+    secoes = pd.DataFrame(execucao['secoes']).set_index('secao')
+    st.sidebar.dataframe(pd.DataFrame({
+        'tempo (ms)': secoes['tempo_s'] * 1000,
+        'CPU (ms)': secoes['cpu_s'] * 1000,
+        'pico (MB)': secoes['pico_mb'],
+    }).round(1), use_container_width=True)
+    if not execucao['memoria']:
+        st.sidebar.caption("Pico de memória indisponível: outra sessão está medindo a memória agora")
+    st.sidebar.caption("Histórico (p50/p95 por seção)")
+    st.sidebar.dataframe(resumir_log(pagina="main1").round(1), use_container_width=True)
+    st.sidebar.caption("Memória por coluna dos dados carregados")
+    st.sidebar.dataframe(memoria_por_coluna(load_data()).round(1), use_container_width=True)
@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
+
+from dosimetria import ARQUIVO_PADRAO
+from dosimetria.esquema import compactar
+from dosimetria.resultados import COLUNAS_ANALISE, filtrar_teto, ler_resultados, preparar_resultados
+from dosimetria.vigia import RecargaIncremental
 
 # Configuração da página
 st.set_page_config(page_title="Validação Limite 5µSv/h - GLP", layout="wide")
@@ -13,31 +15,30 @@ st.title("📊 Validação do Limite Operacional de 5 µSv/h")
 st.subheader("Análise com base em concentrações até 8 Bq/g de Ra-226 e Ra-228")
 
 # Processamento dos dados
-@st.cache_data
-def load_data():
-    # Carregar os dados do arquivo Excel
-    df = pd.read_excel("Resultados de análises radiométricas - GLP.xlsx", sheet_name="Macaé")
-    
-    # Limpeza e preparação dos dados
-    df.columns = [str(col).strip() for col in df.columns]
-    
-    # Converter colunas numéricas
-    numeric_columns = ['Taxa de Dose Máxima (µSv/h)', 'Resultado_ra226', 'Resultado_ra228']
-    
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+def ler_planilhas(planilhas=None):
+    # Planilhas de resultados (um site por planilha), apenas com as colunas analisadas
+    return ler_resultados(ARQUIVO_PADRAO, COLUNAS_ANALISE, planilhas=planilhas)
+
+def preparar_linhas(bruto):
+    # Resultados "< CMD" / "< 0,03" entram com o limite de detecção, como nas outras páginas
+    df = preparar_resultados(bruto)
     
     # FILTRAR APENAS DADOS ATÉ 8 Bq/g (conforme solicitação do gerente)
-    df_filtrado = df[
-        (df['Resultado_ra226'] <= 8.0) & 
-        (df['Resultado_ra228'] <= 8.0) &
-        (df['Resultado_ra226'].notna()) &
-        (df['Resultado_ra228'].notna()) &
-        (df['Taxa de Dose Máxima (µSv/h)'].notna())
-    ].copy()
-    
-    return df, df_filtrado
+    return {'completo': df, 'filtrado': filtrar_teto(df, 8.0)}
+
+def finalizar_quadros(quadros):
+    # Tipos compactos (categoria para o site)
+    return {nome: compactar(df) for nome, df in quadros.items()}
+
+# Recarga por planilha e por linha quando a planilha muda (uma instância por processo)
+@st.cache_resource
+def recarga_dados():
+    return RecargaIncremental('main2', ler_planilhas, preparar_linhas, finalizar_quadros)
+
+def load_data():
+    # Uma única cópia somente leitura por processo, compartilhada por todas as sessões
+    versao = recarga_dados().obter()
+    return versao.dataframe('completo'), versao.dataframe('filtrado')
 
 df_original, df = load_data()
 
@@ -49,6 +50,17 @@ Validar se o limite de 5 µSv/h é adequado, analisando dados com concentraçõe
 """)
 
 st.sidebar.header("🔧 Configurações")
+
+# Filtro por site (planilha de origem)
+sites_disponiveis = list(df_original['site'].unique())
+sites_selecionados = st.sidebar.multiselect(
+    "Sites para análise",
+    sites_disponiveis,
+    default=["Macaé"] if "Macaé" in sites_disponiveis else sites_disponiveis
+)
+df_original = df_original[df_original['site'].isin(sites_selecionados)]
+df = df[df['site'].isin(sites_selecionados)]
+
 show_all_data = st.sidebar.checkbox("Mostrar análise com todos os dados", value=False)
 
 if show_all_data:
@@ -168,6 +180,9 @@ if total_amostras > 0:
     # GRÁFICO SIMPLES DE DISTRIBUIÇÃO
     st.subheader("📊 Visualização da Distribuição das Doses")
     
+    # matplotlib só é carregado quando há dados para os gráficos
+    import matplotlib.pyplot as plt
+    
     fig, ax = plt.subplots(figsize=(12, 6))
     
     # Criar áreas coloridas
@@ -0,0 +1,52 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+from dosimetria import cache
+from dosimetria.cache import carregar_cache, hash_arquivo, podar_cache, salvar_cache
+
+
+def test_coluna_mista_sem_pickle(tmp_path):
+    mista = pd.array([None, 1.5, np.nan, 3, "< CMD", datetime.datetime(2024, 1, 2, 3, 4, 5), True,
+                      datetime.time(1, 2), datetime.timedelta(seconds=3)], dtype=object)
+    df = pd.DataFrame({"mista": mista, "dose": np.arange(9.0), "texto": ["a", np.nan] * 4 + ["b"]})
+    salvar_cache(df, tmp_path / "entrada", chave="k")
+
+    lido = carregar_cache(tmp_path / "entrada")
+    assert [type(v) for v in lido["mista"]] == [type(v) for v in mista]
+    pd.testing.assert_frame_equal(lido, df)
+    # Nenhum array exige pickle para ser lido
+    for arquivo in (tmp_path / "entrada").glob("*.npy"):
+        np.load(arquivo, allow_pickle=False)
+
+
+def test_poda_mantem_as_chaves_mais_recentes(tmp_path):
+    df = pd.DataFrame({"dose": [1.0, 2.0]})
+    for i in range(5):
+        salvar_cache(df, tmp_path / f"entrada{i}", chave=f"k{i}")
+        os.utime(tmp_path / f"entrada{i}" / "meta.json", (1000 + i, 1000 + i))
+    # Lida agora: passa a ser a mais recente
+    assert carregar_cache(tmp_path / "entrada0") is not None
+    (tmp_path / "perfil.jsonl").write_text("{}\n")
+
+    podar_cache(tmp_path, manter=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["entrada0", "entrada4", "perfil.jsonl"]
+
+
+def test_entradas_de_outro_formato_saem(tmp_path):
+    (tmp_path / "antiga").mkdir()
+    (tmp_path / "antiga" / "meta.json").write_text('{"versao": 1, "colunas": []}')
+    salvar_cache(pd.DataFrame({"dose": [1.0]}), tmp_path / "nova", chave="k")
+    assert [p.name for p in tmp_path.iterdir()] == ["nova"]
+
+
+def test_memoria_de_hashes_limitada(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "MAX_HASHES", 3)
+    monkeypatch.setattr(cache, "_hashes", cache.OrderedDict())
+    for i in range(5):
+        arquivo = tmp_path / f"{i}.bin"
+        arquivo.write_bytes(bytes([i]))
+        hash_arquivo(arquivo)
+    assert len(cache._hashes) == 3
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dosimetria import COL_DOSE, COL_RA226, COL_RA228
+from dosimetria.censura import aplicar_censura, imputar_ros, kaplan_meier, separar_censurados
+from dosimetria.resultados import filtrar_teto, preparar_resultados
+
+
+def test_separar_censurados():
+    valores = pd.Series(["< CMD", "<0,03", "1,5", 2.25, "CMD", "não analisado", None], dtype=object)
+    cmd = pd.Series([0.12, 0.5, 0.5, 0.5, "< 0,31", 0.5, 0.5], dtype=object)
+    valor, censurado, limite = separar_censurados(valores, cmd)
+
+    np.testing.assert_allclose(valor, [0.12, 0.03, 1.5, 2.25, 0.31, np.nan, np.nan])
+    assert censurado.tolist() == [True, True, False, False, True, False, False]
+    np.testing.assert_allclose(limite[:2], [0.12, 0.03])
+    assert limite[4] == pytest.approx(0.31)
+
+
+def test_cmd_sem_coluna_fica_sem_valor():
+    valor, censurado, _ = separar_censurados(pd.Series(["< CMD", "0,7"]))
+    assert np.isnan(valor[0]) and censurado[0]
+    assert valor[1] == pytest.approx(0.7)
+
+
+def _bruto():
+    return pd.DataFrame({
+        COL_DOSE: [1.0, 2.0, 3.0, 4.0],
+        COL_RA226: ["< CMD", "0,5", "9,1", 2.0],
+        "CMD": [0.04, 0.04, 0.04, 0.04],
+        COL_RA228: ["1,2", "<0,08", 1.0, None],
+        "CMD.1": [0.06, 0.06, 0.06, 0.06],
+    })
+
+
+def test_aplicar_censura():
+    df = aplicar_censura(_bruto())
+    np.testing.assert_allclose(df[COL_RA226], [0.04, 0.5, 9.1, 2.0])
+    assert df["Censurado_ra226"].tolist() == [True, False, False, False]
+    assert df["Censurado_ra228"].tolist() == [False, True, False, False]
+    assert df["Limite_ra228"].iloc[1] == pytest.approx(0.08)
+
+
+def test_preparar_e_filtrar_teto():
+    df = preparar_resultados(_bruto())
+    assert "CMD" not in df.columns and "CMD.1" not in df.columns
+    # Censurados ficam; acima do teto e sem Ra-228 saem
+    filtrado = filtrar_teto(df, 8.0)
+    assert filtrado.index.tolist() == [0, 1]
+    assert filtrar_teto(df, None) is df
+
+
+def test_kaplan_meier_sem_censura_e_a_distribuicao_empirica():
+    valores = np.array([1.0, 2.0, 2.0, 5.0])
+    km = kaplan_meier(valores)
+    assert km.media == pytest.approx(valores.mean())
+    assert km.quantil(0.5) == 2.0
+    assert km.percentil(100) == 5.0
+
+
+def test_kaplan_meier_censurados_abaixo_do_menor_detectado():
+    km = kaplan_meier([0.1, 0.1, 1.0, 3.0], [True, True, False, False])
+    assert km.censurados == 2
+    # A massa dos censurados fica no menor detectado: média é cota superior
+    assert km.media == pytest.approx((3 * 1.0 + 3.0) / 4)
+
+
+def test_ros_imputa_abaixo_do_limite():
+    rng = np.random.default_rng(0)
+    valores = rng.lognormal(0.0, 1.0, 200)
+    censurados = valores < 0.5
+    valores = np.where(censurados, 0.5, valores)
+    imputados = imputar_ros(valores, censurados)
+    assert (imputados[censurados] < 0.5).all()
+    np.testing.assert_array_equal(imputados[~censurados], valores[~censurados])
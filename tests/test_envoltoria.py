@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import linprog
+
+from dosimetria.envoltoria import (
+    ajustar_envoltoria, concentracao_maxima, dose_envoltoria, regressao_quantilica, tetos_concentracao,
+)
+
+
+def _perda(X, y, beta, quantil):
+    # Função de perda da regressão quantílica (check function)
+    residuos = y - X @ beta
+    return np.sum(np.where(residuos >= 0, quantil * residuos, (quantil - 1) * residuos))
+
+
+def _primal(X, y, quantil):
+    # min τ·1'u + (1 - τ)·1'v  sujeito a  Xβ + u - v = y,  u, v >= 0
+    n, p = X.shape
+    custo = np.r_[np.zeros(p), np.full(n, quantil), np.full(n, 1 - quantil)]
+    restricoes = np.hstack([X, np.eye(n), -np.eye(n)])
+    limites = [(None, None)] * p + [(0, None)] * (2 * n)
+    return linprog(custo, A_eq=restricoes, b_eq=y, bounds=limites, method="highs").x[:p]
+
+
+@pytest.fixture
+def amostras():
+    rng = np.random.default_rng(0)
+    n = 150
+    ra226 = rng.lognormal(0.0, 0.8, n)
+    ra228 = rng.lognormal(0.2, 0.8, n)
+    dose = 0.3 + 0.5 * ra226 + 0.7 * ra228 + rng.gumbel(0.0, 0.4, n)
+    return ra226, ra228, dose
+
+
+@pytest.mark.parametrize("quantil", [0.5, 0.95, 0.99])
+def test_dual_igual_ao_primal(amostras, quantil):
+    ra226, ra228, dose = amostras
+    X = np.column_stack([np.ones_like(dose), ra226, ra228])
+    beta = regressao_quantilica(X, dose, quantil)
+    esperado = _primal(X, dose, quantil)
+    assert _perda(X, dose, beta, quantil) == pytest.approx(_perda(X, dose, esperado, quantil), rel=1e-6)
+    np.testing.assert_allclose(beta, esperado, rtol=1e-4, atol=1e-6)
+
+
+def test_so_intercepto_e_o_quantil_amostral(amostras):
+    dose = amostras[2]
+    uns = np.ones((len(dose), 1))
+    intercepto = regressao_quantilica(uns, dose, 0.95)[0]
+    # Força bruta: o mínimo da perda está em uma das observações
+    perdas = [_perda(uns, dose, np.array([v]), 0.95) for v in dose]
+    assert _perda(uns, dose, np.array([intercepto]), 0.95) == pytest.approx(min(perdas), rel=1e-9)
+    assert np.mean(dose <= intercepto) == pytest.approx(0.95, abs=1 / len(dose))
+
+
+def test_poucas_amostras():
+    assert np.isnan(regressao_quantilica(np.ones((2, 2)), [1.0, 2.0], 0.95)).all()
+
+
+def test_tabela_da_envoltoria(amostras):
+    ra226, ra228, dose = amostras
+    ra226 = ra226.copy()
+    ra226[0] = np.nan
+    tabela = ajustar_envoltoria(ra226, ra228, dose, quantis=(0.95,)).set_index("modelo")
+    assert (tabela["n"] == len(dose) - 1).all()
+    X = np.column_stack([np.ones(len(dose) - 1), ra226[1:], ra228[1:]])
+    np.testing.assert_allclose(
+        tabela.loc["Ra-226 + Ra-228", ["intercepto", "coef_ra226", "coef_ra228"]].to_numpy(dtype=float),
+        regressao_quantilica(X, dose[1:], 0.95))
+    assert np.isnan(tabela.loc["Ra-226", "coef_ra228"])
+
+
+def test_inversao_da_envoltoria():
+    linha = pd.Series({"intercepto": 1.0, "coef_ra226": 0.5, "coef_ra228": -0.2})
+    teto = concentracao_maxima(linha, 5.0)
+    assert teto == pytest.approx(8.0)
+    assert dose_envoltoria(linha, teto) == pytest.approx(5.0)
+    assert concentracao_maxima({**linha, "intercepto": 6.0}, 5.0) == 0.0
+    assert concentracao_maxima({**linha, "coef_ra226": -0.1}, 5.0) == np.inf
+    assert np.isnan(concentracao_maxima({**linha, "intercepto": np.nan}, 5.0))
+    tabela = tetos_concentracao(pd.DataFrame([linha]), 5.0)
+    assert tabela["concentracao_maxima"].tolist() == pytest.approx([8.0])
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dosimetria import COL_DOSE, COL_RA226
+from dosimetria.esquema import comparar_memoria, compactar
+
+
+def _bruto(n=40):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        COL_DOSE: rng.uniform(0.0, 6.0, n).round(2),
+        COL_RA226: rng.lognormal(0.0, 1.0, n),
+        "Incerteza": rng.uniform(0.01, 0.5, n).round(3),
+        "Unidade Geradora": pd.array(["P-51", "P-52", 0, None] * (n // 4), dtype=object),
+        "Ano de Geração": pd.array([2019, 2021.0, "2022", None] * (n // 4), dtype=object),
+        "Nível de Resíduo no Volume (cm)": pd.array([10, 20, "30", 40] * (n // 4), dtype=object),
+        # Serial do Excel, datetime e texto na mesma coluna
+        "Data da análise": pd.array([45000, pd.Timestamp("2024-03-05"), "05/04/2024", None] * (n // 4),
+                                    dtype=object),
+        # Legenda das cores: coluna sem cabeçalho em posição que varia com a planilha
+        "Unnamed: 7": pd.array(["Armazenado", "Dispensa"] + [None] * (n - 2), dtype=object),
+        "Unnamed: 9": pd.array(rng.uniform(0, 1, n), dtype=object),
+    })
+
+
+def test_tipos_compactos():
+    compacto = compactar(_bruto())
+    tipos = compacto.dtypes.astype(str).to_dict()
+    # Comparados com os limites dos filtros: continuam float64
+    assert tipos[COL_DOSE] == tipos[COL_RA226] == "float64"
+    assert tipos["Incerteza"] == "float32"
+    assert tipos["Unidade Geradora"] == "category"
+    assert tipos["Ano de Geração"] == "Int16"
+    assert tipos["Nível de Resíduo no Volume (cm)"] == "int8"
+    assert tipos["Data da análise"] == "datetime64[ns]"
+    assert tipos["Unnamed: 7"] == "category"
+    # Sem cabeçalho e sem rótulos repetidos: fica como veio
+    assert tipos["Unnamed: 9"] == "object"
+
+
+def test_valores_preservados():
+    bruto = _bruto()
+    compacto = compactar(bruto)
+
+    pd.testing.assert_series_equal(compacto[COL_DOSE], bruto[COL_DOSE])
+    np.testing.assert_allclose(compacto["Incerteza"], bruto["Incerteza"], rtol=1e-6)
+    assert compacto["Unidade Geradora"].astype(object).tolist()[:4] == ["P-51", "P-52", "0", np.nan]
+    assert compacto["Ano de Geração"].tolist()[:4] == [2019, 2021, 2022, pd.NA]
+    assert compacto["Nível de Resíduo no Volume (cm)"].tolist()[:4] == [10, 20, 30, 40]
+    assert compacto["Data da análise"].tolist()[:3] == [pd.Timestamp("2023-03-15"), pd.Timestamp("2024-03-05"),
+                                                        pd.Timestamp("2024-04-05")]
+    assert compacto["Data da análise"].isna().tolist()[3]
+    assert compacto["Unnamed: 7"].astype(object).tolist()[:3] == ["Armazenado", "Dispensa", np.nan]
+
+
+def test_nivel_com_faltantes_vira_float32():
+    df = pd.DataFrame({"Nível de Resíduo no Volume (cm)": [10, None, 30]})
+    nivel = compactar(df)["Nível de Resíduo no Volume (cm)"]
+    assert nivel.dtype == "float32" and np.isnan(nivel[1])
+
+
+def test_attrs_e_original_preservados():
+    bruto = _bruto()
+    bruto.attrs["impressao"] = "abc"
+    antes = bruto.copy()
+    compacto = compactar(bruto)
+    assert compacto.attrs["impressao"] == "abc"
+    pd.testing.assert_frame_equal(bruto, antes)
+
+
+def test_memoria_reduzida():
+    bruto = _bruto(400)
+    tabela = comparar_memoria(bruto, compactar(bruto))
+    assert tabela.loc["(total)", "KB compacto"] < tabela.loc["(total)", "KB original"]
+    assert tabela.loc["(total)", "KB original"] == pytest.approx(tabela["KB original"].iloc[:-1].sum())
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dosimetria.estatisticas import (
+    AVALIE, MANTENHA, REAVALIE, DoseSummary, classificar_valores, decidir_recomendacao, obter_resumo_dose,
+)
+
+
+@pytest.fixture
+def doses():
+    rng = np.random.default_rng(0)
+    # Valores repetidos (duas casas, como nos certificados) e faltantes
+    valores = rng.lognormal(0.5, 0.7, 500).round(2)
+    valores[::37] = np.nan
+    return valores
+
+
+def test_momentos_iguais_aos_do_pandas(doses):
+    resumo = DoseSummary(doses)
+    serie = pd.Series(doses)
+    assert resumo.count == serie.count()
+    assert resumo.mean == pytest.approx(serie.mean(), rel=1e-12)
+    assert resumo.std == pytest.approx(serie.std(), rel=1e-12)
+    assert resumo.skewness == pytest.approx(serie.skew(), rel=1e-9)
+    assert resumo.kurtosis == pytest.approx(serie.kurt(), rel=1e-9)
+    assert resumo.moda == serie.mode().iloc[0]
+    assert (resumo.min, resumo.max) == (serie.min(), serie.max())
+
+
+def test_quantis_iguais_ao_numpy(doses):
+    resumo = DoseSummary(doses)
+    validos = doses[~np.isnan(doses)]
+    for p in (0, 1, 25, 50, 75, 90, 95, 97.5, 99, 100):
+        assert resumo.percentil(p) == pytest.approx(np.percentile(validos, p), rel=1e-12)
+    assert resumo.iqr == pytest.approx(np.subtract(*np.percentile(validos, [75, 25])), rel=1e-12)
+
+
+def test_contagens_iguais_a_contagem_direta(doses):
+    resumo = DoseSummary(doses)
+    validos = doses[~np.isnan(doses)]
+    # Limites sobre valores existentes testam a borda (<=)
+    for limite in (0.0, 1.0, validos[3], 3.0, 5.0, 100.0):
+        assert resumo.contar_ate(limite) == (validos <= limite).sum()
+        assert resumo.contar_acima(limite) == (validos > limite).sum()
+    assert resumo.contar_entre(3.0, 5.0) == ((validos > 3.0) & (validos <= 5.0)).sum()
+
+
+def test_conjuntos_pequenos():
+    vazio = DoseSummary([np.nan])
+    assert vazio.count == 0 and np.isnan(vazio.percentil(95)) and np.isnan(vazio.max)
+    constante = DoseSummary([2.0, 2.0, 2.0, 2.0])
+    assert constante.skewness == constante.kurtosis == 0.0
+    assert np.isnan(DoseSummary([1.0, 2.0]).skewness)
+
+
+def test_resumo_memorizado(doses):
+    assert obter_resumo_dose(doses) is obter_resumo_dose(doses.copy())
+    assert obter_resumo_dose(pd.Series(doses)).count == DoseSummary(doses).count
+
+
+def test_classificar_valores_igual_a_contagem_direta(doses):
+    validos = doses[~np.isnan(doses)]
+    bordas = (1.0, 3.0, 5.0, 8.0)
+    faixas = classificar_valores(validos, bordas)
+    limites = (-np.inf, *bordas, np.inf)
+    for i, (inferior, superior) in enumerate(zip(limites[:-1], limites[1:])):
+        na_faixa = validos[(validos > inferior) & (validos <= superior)]
+        assert faixas["contagens"][i] == len(na_faixa)
+        if len(na_faixa):
+            assert faixas["medias"][i] == pytest.approx(na_faixa.mean())
+            assert faixas["maximos"][i] == na_faixa.max()
+        else:
+            assert np.isnan(faixas["medias"][i])
+    assert faixas["total"] == len(validos) and faixas["maxima"] == validos.max()
+
+
+def test_decidir_recomendacao():
+    assert decidir_recomendacao(96.0, 4.9) == MANTENHA
+    assert decidir_recomendacao(96.0, 5.1) == AVALIE
+    assert decidir_recomendacao(89.9, 1.0) == REAVALIE
+    assert decidir_recomendacao([96.0, 91.0, 50.0], [4.0, 4.0, 4.0]).tolist() == [MANTENHA, AVALIE, REAVALIE]
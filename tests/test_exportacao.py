@@ -0,0 +1,91 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dosimetria import COL_DOSE, COL_RA226, COL_RA228
+from dosimetria.exportacao import CacheExportacoes, gravar, tabela_estatisticas, tabela_faixas
+
+
+@pytest.fixture
+def dados():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        COL_DOSE: rng.lognormal(0.3, 0.5, 25),
+        COL_RA226: np.r_[rng.lognormal(0.4, 0.9, 24), np.nan],
+        COL_RA228: rng.lognormal(-0.3, 0.8, 25),
+        "site": ["Macaé", "TIMS"] * 12 + ["Macaé"],
+        # Texto com números no meio, como nas planilhas
+        "Lotes": pd.array(["280 (12 volumes)", 281] * 12 + [None], dtype=object),
+    })
+
+
+def _gravado(df, formato):
+    destino = io.BytesIO()
+    # Blocos pequenos: vários blocos por arquivo
+    gravar(df, formato, destino, linhas_bloco=7)
+    destino.seek(0)
+    return destino
+
+
+def test_csv_ida_e_volta(dados):
+    lido = pd.read_csv(_gravado(dados, "csv"))
+    pd.testing.assert_frame_equal(lido.drop(columns="Lotes"), dados.drop(columns="Lotes"))
+    assert lido["Lotes"].astype(str).tolist()[:2] == ["280 (12 volumes)", "281"]
+
+
+def test_parquet_ida_e_volta(dados):
+    pytest.importorskip("pyarrow")
+    lido = pd.read_parquet(_gravado(dados, "parquet"))
+    pd.testing.assert_frame_equal(lido.drop(columns="Lotes"), dados.drop(columns="Lotes"))
+    # Coluna mista vira texto
+    assert lido["Lotes"].tolist()[:2] == ["280 (12 volumes)", "281"]
+
+
+def test_xlsx_ida_e_volta(dados):
+    planilhas = pd.read_excel(_gravado(dados, "xlsx"), sheet_name=None)
+    assert list(planilhas) == ["Dados", "Estatísticas", "Faixas"]
+    pd.testing.assert_frame_equal(planilhas["Dados"].drop(columns="Lotes"), dados.drop(columns="Lotes"))
+    np.testing.assert_allclose(planilhas["Estatísticas"].set_index("estatística").to_numpy(dtype=float),
+                               tabela_estatisticas(dados).set_index("estatística").to_numpy(dtype=float))
+    pd.testing.assert_frame_equal(planilhas["Faixas"], tabela_faixas(dados), check_dtype=False)
+
+
+def test_faixas_somam_as_amostras_validas(dados):
+    faixas = tabela_faixas(dados).set_index("faixa")
+    assert faixas.loc["Total", "Ra-226"] == dados[COL_RA226].notna().sum()
+    assert faixas.loc["Total", "Ra-228"] == len(dados)
+
+
+def test_formato_desconhecido(dados):
+    with pytest.raises(ValueError):
+        gravar(dados, "ods", io.BytesIO())
+
+
+def test_cache_em_disco_limitado_por_bytes(dados):
+    tamanho = len(_gravado(dados, "csv").getvalue())
+    cache = CacheExportacoes(orcamento_bytes=2 * tamanho)
+
+    with cache.obter("a", "csv", dados) as arquivo:
+        conteudo = arquivo.read()
+    assert len(conteudo) == tamanho and cache.contem("a", "csv")
+    # Na segunda vez o arquivo vem do disco, sem regravar
+    with cache.obter("a", "csv", None) as arquivo:
+        assert arquivo.read() == conteudo
+    caminho_a = cache._arquivos[("a", "csv")][0]
+
+    cache.obter("b", "csv", dados).close()
+    cache.obter("c", "csv", dados).close()
+    assert cache.bytes_usados <= cache.orcamento_bytes
+    assert not cache.contem("a", "csv") and not os.path.exists(caminho_a)
+
+    # Maior que o orçamento: entregue, mas não guardado
+    pequeno = CacheExportacoes(orcamento_bytes=10)
+    with pequeno.obter("a", "csv", dados) as arquivo:
+        assert arquivo.read() == conteudo
+    assert not pequeno.contem("a", "csv") and pequeno.bytes_usados == 0
+
+    cache.limpar()
+    assert cache.bytes_usados == 0 and not os.listdir(cache._diretorio)
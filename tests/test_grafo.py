@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dosimetria import COL_DOSE, COL_RA226, COL_RA228
+from dosimetria.estatisticas import decidir_recomendacao
+from dosimetria.grafo import GrafoCalculos, grafo_analise, limpar_memoria
+from dosimetria.reamostragem import intervalos_confianca
+
+
+@pytest.fixture(autouse=True)
+def memoria_vazia():
+    limpar_memoria()
+    yield
+    limpar_memoria()
+
+
+@pytest.fixture
+def dados():
+    rng = np.random.default_rng(0)
+    n = 300
+    dose = rng.lognormal(0.8, 0.6, n).round(2)
+    dose[::29] = np.nan
+    return pd.DataFrame({COL_DOSE: dose, COL_RA226: rng.lognormal(0.0, 1.0, n), COL_RA228: rng.lognormal(0.2, 1.0, n)})
+
+
+def test_valores_iguais_ao_calculo_direto(dados):
+    grafo = grafo_analise(dados, "k", limite=4.0, n_reamostras=200, max_workers=1)
+    dose = dados[COL_DOSE].dropna().to_numpy()
+
+    contagens = grafo["contagens"]
+    assert contagens["total"] == len(dados)
+    assert contagens["ate_limite"] == (dose <= 4.0).sum()
+    assert contagens["acima_limite"] == (dose > 4.0).sum()
+    assert contagens["percentual_ate_limite"] == pytest.approx((dose <= 4.0).sum() / len(dados) * 100)
+
+    for p, valor in grafo["percentis_dose"].items():
+        assert valor == pytest.approx(np.percentile(dose, p))
+    estatisticas = grafo["estatisticas_dose"]
+    assert estatisticas["mean"] == pytest.approx(dose.mean())
+    assert estatisticas["std"] == pytest.approx(dose.std(ddof=1))
+
+    intervalos = intervalos_confianca(dados[COL_DOSE].to_numpy(), (90, 95, 99), limite=4.0, n_reamostras=200,
+                                      max_workers=1)
+    assert grafo["intervalos"] == intervalos
+    assert grafo["recomendacao"] == decidir_recomendacao(intervalos["dentro"][0], intervalos["P95"][1], 4.0)
+    assert grafo["radionuclideos"]["Ra226"]["total"] == len(dados)
+
+
+def test_so_calcula_o_que_foi_pedido(dados):
+    grafo = grafo_analise(dados, "k", n_reamostras=200, max_workers=1)
+    grafo["contagens"]
+    assert sorted(grafo.calculados) == ["contagens", "dose", "resumo_dose"]
+    assert "intervalos" not in grafo.avaliados()
+
+
+def test_memoria_entre_execucoes(dados):
+    primeira = grafo_analise(dados, "k", n_reamostras=200, max_workers=1)
+    primeira["recomendacao"]
+    primeira["percentis_dose"]
+
+    mesma_chave = grafo_analise(dados, "k", n_reamostras=200, max_workers=1)
+    mesma_chave["recomendacao"]
+    mesma_chave["percentis_dose"]
+    assert mesma_chave.calculados == []
+
+    # Outro limite: o bootstrap é refeito, o resumo da dose não
+    outro_limite = grafo_analise(dados, "k", limite=3.0, n_reamostras=200, max_workers=1)
+    outro_limite["recomendacao"]
+    outro_limite["percentis_dose"]
+    assert sorted(outro_limite.calculados) == ["intervalos", "recomendacao"]
+
+    outros_dados = grafo_analise(dados.iloc[:100], "k2", n_reamostras=200, max_workers=1)
+    outros_dados["percentis_dose"]
+    assert sorted(outros_dados.calculados) == ["dose", "percentis_dose", "resumo_dose"]
+
+
+def test_cada_no_uma_vez_por_execucao():
+    chamadas = []
+    grafo = GrafoCalculos("teste")
+    grafo.entrada("x", 3, "x=3")
+
+    @grafo.no("dobro", "x")
+    def dobro(x):
+        chamadas.append("dobro")
+        return 2 * x
+
+    @grafo.no("soma", "dobro", "x")
+    def soma(d, x):
+        return d + x
+
+    @grafo.no("produto", "dobro", "soma")
+    def produto(d, s):
+        return d * s
+
+    assert grafo["produto"] == 6 * 9
+    assert chamadas == ["dobro"]
+    with pytest.raises(KeyError):
+        grafo["inexistente"]
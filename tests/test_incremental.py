@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dosimetria import COL_DOSE, COL_RA226, COL_RA228
+from dosimetria.incremental import (
+    EsbocoQuantis,
+    MomentosCorrentes,
+    ResumoIncremental,
+    ResumoSobreposto,
+    amostras_identificadas,
+    preencher_lotes,
+)
+
+
+def _amostras(n, inicio=0, semente=0):
+    rng = np.random.default_rng(semente)
+    return pd.DataFrame({
+        "Lotes": [f"L{(inicio + i) // 4}" if (inicio + i) % 4 == 0 else None for i in range(n)],
+        "Certificado de Análise": [f"C{inicio + i}" for i in range(n)],
+        "No\xa0Volume": np.arange(inicio, inicio + n) % 4 + 1,
+        COL_DOSE: rng.lognormal(0.5, 0.8, n),
+        COL_RA226: rng.lognormal(0.0, 1.0, n),
+        COL_RA228: rng.lognormal(0.3, 1.0, n),
+    })
+
+
+def test_momentos_combinados_iguais_ao_pandas():
+    valores = np.random.default_rng(1).lognormal(0.0, 1.0, 1000)
+    momentos = MomentosCorrentes()
+    for bloco in np.array_split(valores, 7):
+        momentos.combinar(MomentosCorrentes.de_valores(bloco))
+
+    serie = pd.Series(valores)
+    assert momentos.n == len(valores)
+    assert momentos.media == pytest.approx(serie.mean(), rel=1e-12)
+    assert momentos.std == pytest.approx(serie.std(), rel=1e-10)
+    assert momentos.skewness == pytest.approx(serie.skew(), rel=1e-9)
+    assert momentos.kurtosis == pytest.approx(serie.kurt(), rel=1e-9)
+
+
+def test_esboco_combinado_dentro_da_precisao():
+    valores = np.random.default_rng(2).lognormal(0.0, 1.5, 5000)
+    esboco = EsbocoQuantis(precisao=0.01)
+    for bloco in np.array_split(valores, 3):
+        esboco.combinar(EsbocoQuantis(precisao=0.01).atualizar(bloco))
+
+    ordenados = np.sort(valores)
+    for q in (0.5, 0.9, 0.95, 0.99):
+        exato = ordenados[int(q * (len(valores) - 1))]
+        assert abs(esboco.quantil(q) - exato) <= 0.01 * exato * (1 + 1e-9)
+
+
+def test_esbocos_com_precisoes_diferentes_nao_combinam():
+    with pytest.raises(ValueError):
+        EsbocoQuantis(0.01).combinar(EsbocoQuantis(0.02))
+
+
+def _comparar(resumo, referencia):
+    assert resumo.count == referencia.count
+    assert resumo.dose.media == pytest.approx(referencia.dose.media, rel=1e-12)
+    assert resumo.dose.std == pytest.approx(referencia.dose.std, rel=1e-10)
+    assert resumo.percentil(95) == referencia.percentil(95)
+    assert resumo.contar_ate(3.0) == referencia.contar_ate(3.0)
+    assert (resumo.dose_min, resumo.dose_max) == (referencia.dose_min, referencia.dose_max)
+    for nome, acumulado in referencia.faixas.items():
+        np.testing.assert_array_equal(resumo.faixas[nome]["contagens"], acumulado["contagens"])
+        assert resumo.faixas[nome]["soma"] == pytest.approx(acumulado["soma"], rel=1e-12)
+
+
+def test_anexar_em_lotes_igual_a_carga_unica():
+    df = preencher_lotes(_amostras(400))
+    referencia = ResumoIncremental()
+    assert referencia.anexar(df) == 400
+
+    resumo = ResumoIncremental()
+    assert resumo.anexar(df.iloc[:150]) == 150
+    assert resumo.anexar(df.iloc[100:]) == 250  # 50 linhas repetidas são ignoradas
+    assert resumo.anexar(df) == 0
+    _comparar(resumo, referencia)
+
+
+def test_combinar_resumos_igual_a_carga_unica():
+    df = preencher_lotes(_amostras(400))
+    referencia = ResumoIncremental()
+    referencia.anexar(df)
+
+    resumo = ResumoIncremental()
+    resumo.anexar(df.iloc[:250])
+    outro = ResumoIncremental()
+    outro.anexar(df.iloc[250:])
+    _comparar(resumo.combinar(outro), referencia)
+
+
+def test_combinar_resumos_com_limites_diferentes():
+    with pytest.raises(ValueError):
+        ResumoIncremental(limites=(3.0,)).combinar(ResumoIncremental(limites=(5.0,)))
+
+
+def test_duplicatas_no_mesmo_lote_contam_uma_vez():
+    df = preencher_lotes(_amostras(10))
+    assert ResumoIncremental().anexar(pd.concat([df, df.iloc[:3]])) == 10
+
+
+def test_linhas_sem_identificacao_nao_se_fundem():
+    df = pd.DataFrame({COL_DOSE: [1.0, 2.0, 3.0], COL_RA226: [0.1, 0.2, 0.3], COL_RA228: [0.4, 0.5, 0.6]})
+    assert not amostras_identificadas(df).any()
+
+    resumo = ResumoIncremental()
+    assert resumo.anexar(df) == 3
+    # Sem chave não há como reconhecê-las: entram de novo
+    assert resumo.anexar(df) == 3
+    assert resumo.count == 6
+
+
+def test_lote_nao_passa_de_um_site_para_outro():
+    df = pd.DataFrame({
+        "site": ["Macaé", "Macaé", "TIMS", "TIMS"],
+        "Lotes": ["L1", None, None, "L2"],
+        "Certificado de Análise": ["C1", "C2", "C3", "C4"],
+    })
+    lotes = preencher_lotes(df)["Lotes"]
+    assert lotes.iloc[:2].tolist() == ["L1", "L1"]
+    assert pd.isna(lotes.iloc[2])
+    assert lotes.iloc[3] == "L2"
+
+
+def test_reenvio_da_mesma_planilha_nao_muda_as_contagens(tmp_path):
+    # Planilha com o lote só na primeira linha de cada lote (células mescladas)
+    planilha = pd.DataFrame({
+        "Lotes": pd.array([81, None, None, 82, None], dtype=object),
+        "Certificado de Análise": ["C-1", "C-1", "C-2 ", "C-3", "C-3"],
+        "No\xa0Volume": pd.array([1, 2, 1, 1, 2], dtype=object),
+        COL_DOSE: [1.0, 2.0, 3.0, 4.0, 5.0],
+        COL_RA226: [0.5, 0.6, 0.7, 0.8, 0.9],
+        COL_RA228: [1.5, 1.6, 1.7, 1.8, 1.9],
+    })
+    # Histórico como na carga comum: lotes preenchidos, inteiros
+    resumo = ResumoIncremental()
+    assert resumo.anexar(planilha.assign(Lotes=pd.array([81, 81, 81, 82, 82], dtype=object))) == 5
+
+    # A mesma planilha enviada de novo: o pandas lê os lotes como float64 ("81.0", NaN)
+    caminho = tmp_path / "certificados.xlsx"
+    planilha.to_excel(caminho, index=False)
+    enviados = preencher_lotes(pd.read_excel(caminho))
+    assert enviados["Lotes"].dtype == np.float64
+
+    assert resumo.anexar(enviados) == 0
+    assert resumo.count == 5
+
+
+def test_resumo_sobreposto_nao_altera_a_base():
+    df = preencher_lotes(_amostras(400))
+    base = ResumoIncremental()
+    base.anexar(df.iloc[:300])
+    chaves_base = set(base.chaves)
+
+    sobreposto = ResumoSobreposto(base)
+    assert sobreposto.anexar(df.iloc[250:]) == 100  # 50 já estão na base
+    assert sobreposto.anexar(df.iloc[250:]) == 0
+
+    referencia = ResumoIncremental()
+    referencia.anexar(df)
+    _comparar(sobreposto.total, referencia)
+    assert sobreposto.count == 400
+    assert sobreposto.estatisticas_radionuclideos() == referencia.estatisticas_radionuclideos()
+    assert base.chaves == chaves_base and base.count == 300
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from dosimetria import indice
+from dosimetria.indice import IndiceLimiares, contagem_acumulada_2d
+
+
+@pytest.fixture
+def amostras():
+    rng = np.random.default_rng(0)
+    concentracao = rng.lognormal(0.0, 1.0, 2000).round(2)
+    dose = rng.lognormal(0.5, 0.6, 2000).round(1)
+    # Discrepantes muito acima dos tetos dos sliders
+    concentracao[:3] = [250.0, 1e4, 8.0]
+    dose[:3] = [3.0, 900.0, 1e5]
+    return concentracao, dose
+
+
+def _direto(concentracao, dose, max_conc, max_dose):
+    return np.flatnonzero((concentracao <= max_conc) & (dose <= max_dose))
+
+
+def test_contagem_acumulada_igual_a_contagem_direta(amostras):
+    concentracao, dose = amostras
+    bordas_x, bordas_y = np.array([0.5, 1.0, 2.0, 8.0]), np.array([1.0, 1.5, 5.0])
+    grade = contagem_acumulada_2d(concentracao, dose, bordas_x, bordas_y)
+    for i, x in enumerate(bordas_x):
+        for j, y in enumerate(bordas_y):
+            assert grade[i, j] == len(_direto(concentracao, dose, x, y))
+
+
+@pytest.mark.parametrize("max_conc, max_dose", [
+    (8.0, 5.0),      # bordas da grade
+    (0.1, 0.1),
+    (1.23, 2.0),     # fora da grade: busca binária
+    (8.0, 4.95),
+    (0.0, 5.0),
+    (20.0, 20.0),    # acima da grade cortada pelos tetos
+    (1e6, 1e6),
+    (2.3, 1.7),
+])
+def test_consultas_iguais_a_varredura(amostras, max_conc, max_dose):
+    concentracao, dose = amostras
+    esperado = _direto(concentracao, dose, max_conc, max_dose)
+    idx = IndiceLimiares(concentracao, dose, teto_conc=10.0, teto_dose=10.0)
+    assert idx.contar(max_conc, max_dose) == len(esperado)
+    np.testing.assert_array_equal(idx.selecionar(max_conc, max_dose), esperado)
+
+
+def test_grade_limitada_pelos_tetos(amostras, monkeypatch):
+    concentracao, dose = amostras
+    idx = IndiceLimiares(concentracao, dose, teto_conc=10.0, teto_dose=10.0)
+    # Os discrepantes não aumentam a grade
+    assert idx.grade.shape == (100, 100)
+
+    monkeypatch.setattr(indice, "MAX_BORDAS", 50)
+    sem_teto = IndiceLimiares(concentracao, dose)
+    assert sem_teto.grade.shape == (50, 50)
+    assert sem_teto.contar(9.0, 9.0) == len(_direto(concentracao, dose, 9.0, 9.0))
+
+
+def test_todos_os_limiares_da_grade(amostras):
+    concentracao, dose = amostras
+    idx = IndiceLimiares(concentracao, dose, teto_conc=3.0, teto_dose=3.0)
+    for max_conc in idx.bordas_conc[::7]:
+        for max_dose in idx.bordas_dose[::7]:
+            assert idx.contar(max_conc, max_dose) == len(_direto(concentracao, dose, max_conc, max_dose))
+
+
+def test_conjunto_vazio():
+    idx = IndiceLimiares([], [])
+    assert idx.contar(8.0, 5.0) == 0 and len(idx.selecionar(8.0, 5.0)) == 0
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from dosimetria.montecarlo import simular_incerteza
+
+
+@pytest.fixture
+def amostras():
+    rng = np.random.default_rng(0)
+    n = 60
+    ra226 = rng.uniform(0.0, 10.0, n).round(2)
+    ra228 = rng.uniform(0.0, 10.0, n).round(2)
+    incerteza226 = (0.15 * ra226).round(3)
+    incerteza228 = (0.2 * ra228).round(3)
+    # Incerteza não declarada: resultado tratado como exato
+    incerteza226[::9] = np.nan
+    dose = rng.uniform(0.5, 8.0, n).round(1)
+    return ra226, incerteza226, ra228, incerteza228, dose
+
+
+def _direto(ra226, incerteza226, ra228, incerteza228, dose, teto, limite, n_realizacoes, por_bloco, k):
+    # Mesmos sorteios (uma semente por bloco), realização por realização
+    sigma226 = np.nan_to_num(incerteza226) / k
+    sigma228 = np.nan_to_num(incerteza228) / k
+    bordas = np.array([1.0, 3.0, 5.0, 8.0])
+    tamanhos = [min(por_bloco, n_realizacoes - i) for i in range(0, n_realizacoes, por_bloco)]
+    acima, faixas226, percentual = np.zeros(len(ra226)), [], []
+    for tamanho, s in zip(tamanhos, np.random.SeedSequence(0).spawn(len(tamanhos))):
+        rng = np.random.default_rng(s)
+        z226 = rng.standard_normal((tamanho, len(ra226)))
+        z228 = rng.standard_normal((tamanho, len(ra228)))
+        for r in range(tamanho):
+            c226 = np.maximum(ra226 + sigma226 * z226[r], 0.0)
+            c228 = np.maximum(ra228 + sigma228 * z228[r], 0.0)
+            no_teto = (c226 <= teto) & (c228 <= teto)
+            acima += ~no_teto
+            faixas226.append([np.sum((c226 > a) & (c226 <= b))
+                              for a, b in zip((-np.inf, *bordas), (*bordas, np.inf))])
+            percentual.append(np.mean(dose[no_teto] <= limite) * 100 if no_teto.any() else np.nan)
+    return acima / n_realizacoes, np.array(faixas226), np.array(percentual)
+
+
+def test_igual_a_simulacao_direta(amostras):
+    n = len(amostras[0])
+    # Blocos de 6 realizações: vários blocos e um último incompleto
+    resultado = simular_incerteza(*amostras, teto=8.0, limite=5.0, n_realizacoes=40, fator_abrangencia=2.0,
+                                  memoria_bloco=2 * 8 * n * 6, max_workers=1)
+    prob_acima, faixas226, percentual = _direto(*amostras, 8.0, 5.0, 40, 6, 2.0)
+    np.testing.assert_allclose(resultado["prob_acima"], prob_acima)
+    np.testing.assert_array_equal(resultado["faixas"]["Ra226"], faixas226)
+    np.testing.assert_allclose(resultado["percentual"], percentual)
+    assert (resultado["faixas"]["Ra228"].sum(axis=1) == n).all()
+
+    em_threads = simular_incerteza(*amostras, teto=8.0, limite=5.0, n_realizacoes=40, fator_abrangencia=2.0,
+                                   memoria_bloco=2 * 8 * n * 6, max_workers=3)
+    np.testing.assert_array_equal(em_threads["percentual"], resultado["percentual"])
+
+
+def test_probabilidade_igual_a_da_normal(amostras):
+    ra226, incerteza226, ra228, incerteza228, dose = amostras
+    resultado = simular_incerteza(ra226, incerteza226, ra228, incerteza228, dose, teto=8.0,
+                                  n_realizacoes=20000, max_workers=1)
+    com_incerteza = incerteza228 > 0
+    esperado = stats.norm.sf(8.0, loc=ra228[com_incerteza], scale=incerteza228[com_incerteza])
+    # Erro-padrão de uma proporção com 20000 realizações: < 0,004
+    np.testing.assert_allclose(resultado["prob_acima_228"][com_incerteza], esperado, atol=0.02)
+
+    # Sem incerteza declarada: 0 ou 1, conforme o resultado
+    exatos = np.isnan(incerteza226)
+    np.testing.assert_array_equal(resultado["prob_acima_226"][exatos], (ra226[exatos] > 8.0).astype(float))
+    assert (resultado["prob_acima"] >= np.maximum(resultado["prob_acima_226"], resultado["prob_acima_228"])).all()
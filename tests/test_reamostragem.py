@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from scipy import integrate, stats
+
+from dosimetria.reamostragem import bootstrap, harrell_davis, intervalos_confianca
+
+
+@pytest.fixture
+def doses():
+    rng = np.random.default_rng(0)
+    valores = rng.lognormal(0.8, 0.6, 120).round(1)
+    valores[::17] = np.nan
+    return valores
+
+
+def _bootstrap_direto(valores, percentis, limite, n_reamostras, por_bloco, semente=0):
+    # Mesmos sorteios do bootstrap (uma semente por bloco), reamostra por reamostra
+    ordenados = np.sort(valores[~np.isnan(valores)])
+    n = len(ordenados)
+    tamanhos = [min(por_bloco, n_reamostras - i) for i in range(0, n_reamostras, por_bloco)]
+    quantis, dentro = [], []
+    for tamanho, s in zip(tamanhos, np.random.SeedSequence(semente).spawn(len(tamanhos))):
+        indices = np.random.default_rng(s).integers(0, n, size=(tamanho, n), dtype=np.int32)
+        for reamostra in ordenados[indices]:
+            quantis.append(np.percentile(reamostra, percentis))
+            dentro.append(np.mean(reamostra <= limite) * 100)
+    return np.array(quantis), np.array(dentro)
+
+
+def test_bootstrap_igual_a_reamostragem_direta(doses):
+    n = np.count_nonzero(~np.isnan(doses))
+    # Blocos de 7 reamostras: vários blocos e um último incompleto
+    memoria = 8 * n * 7
+    quantis, dentro = bootstrap(doses, (50, 90, 95), limite=3.0, n_reamostras=100, memoria_bloco=memoria,
+                                max_workers=1)
+    esperado_q, esperado_d = _bootstrap_direto(doses, (50, 90, 95), 3.0, 100, 7)
+    np.testing.assert_allclose(quantis, esperado_q, rtol=1e-12)
+    np.testing.assert_allclose(dentro, esperado_d, rtol=1e-12)
+
+    # O número de threads não muda o resultado
+    em_threads = bootstrap(doses, (50, 90, 95), limite=3.0, n_reamostras=100, memoria_bloco=memoria,
+                           max_workers=4)
+    np.testing.assert_array_equal(em_threads[0], quantis)
+    np.testing.assert_array_equal(em_threads[1], dentro)
+
+
+def test_intervalo_bootstrap_percentil(doses):
+    intervalos = intervalos_confianca(doses, (95,), limite=3.0, n_reamostras=400, max_workers=1)
+    quantis, dentro = bootstrap(doses, (95,), limite=3.0, n_reamostras=400, max_workers=1)
+    assert intervalos["P95"] == pytest.approx(tuple(np.percentile(quantis[:, 0], [2.5, 97.5])))
+    assert intervalos["dentro"] == pytest.approx(tuple(np.percentile(dentro, [2.5, 97.5])))
+    validos = doses[~np.isnan(doses)]
+    assert intervalos["P95"][0] <= np.percentile(validos, 95) <= intervalos["P95"][1]
+
+
+def test_harrell_davis_igual_ao_scipy(doses):
+    validos = doses[~np.isnan(doses)]
+    estimativas, erros = harrell_davis(doses, (50, 90, 95))
+    np.testing.assert_allclose(estimativas, stats.mstats.hdquantiles(validos, [0.5, 0.9, 0.95]), rtol=1e-9)
+
+    # Maritz-Jarrett: momentos da média ponderada, com os pesos integrados numericamente
+    ordenados, n = np.sort(validos), len(validos)
+    for p, erro in zip((50, 90, 95), erros):
+        q = p / 100
+        densidade = stats.beta((n + 1) * q, (n + 1) * (1 - q)).pdf
+        pesos = np.array([integrate.quad(densidade, i / n, (i + 1) / n)[0] for i in range(n)])
+        c1, c2 = pesos @ ordenados, pesos @ ordenados ** 2
+        assert erro == pytest.approx(np.sqrt(c2 - c1 ** 2), rel=1e-6)
+
+
+def test_intervalo_harrell_davis_e_wilson(doses):
+    validos = doses[~np.isnan(doses)]
+    intervalos = intervalos_confianca(doses, (95,), limite=3.0, metodo="harrell-davis")
+    estimativa, erro = harrell_davis(doses, (95,))
+    z = stats.norm.ppf(0.975)
+    assert intervalos["P95"] == pytest.approx((estimativa[0] - z * erro[0], estimativa[0] + z * erro[0]))
+
+    wilson = stats.binomtest(int((validos <= 3.0).sum()), len(validos)).proportion_ci(0.95, method="wilson")
+    assert intervalos["dentro"] == pytest.approx((wilson.low * 100, wilson.high * 100))
+
+
+def test_sem_amostras_e_metodo_desconhecido():
+    intervalos = intervalos_confianca([np.nan], (95,), n_reamostras=10)
+    assert np.isnan(intervalos["P95"]).all() and np.isnan(intervalos["dentro"]).all()
+    assert np.isnan(harrell_davis([], (95,))[0]).all()
+    with pytest.raises(ValueError):
+        intervalos_confianca([1.0, 2.0], metodo="jackknife")
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from dosimetria.regressao import ajustar_regressoes
+
+
+def _dados(n=300, semente=0):
+    rng = np.random.default_rng(semente)
+    ra226 = rng.lognormal(0.0, 0.8, n)
+    ra228 = rng.lognormal(0.2, 0.8, n)
+    dose = 0.3 + 0.8 * ra226 + 1.1 * ra228 + rng.normal(0.0, 0.5, n)
+    grupos = np.where(np.arange(n) % 3 == 0, "Macaé", "TIMS")
+    return ra226, ra228, dose, grupos
+
+
+def test_mqo_simples_igual_ao_linregress():
+    ra226, ra228, dose, grupos = _dados()
+    tabela = ajustar_regressoes(ra226, ra228, dose, grupos=grupos).set_index(["grupo", "modelo"])
+
+    for grupo in ("Macaé", "TIMS"):
+        linhas = grupos == grupo
+        for modelo, x, coluna in (("Ra-226", ra226, "ra226"), ("Ra-228", ra228, "ra228")):
+            esperado = stats.linregress(x[linhas], dose[linhas])
+            ajuste = tabela.loc[(grupo, modelo)]
+            assert ajuste["n"] == linhas.sum()
+            assert ajuste[f"coef_{coluna}"] == pytest.approx(esperado.slope, rel=1e-9)
+            assert ajuste["intercepto"] == pytest.approx(esperado.intercept, rel=1e-9)
+            assert ajuste[f"erro_{coluna}"] == pytest.approx(esperado.stderr, rel=1e-8)
+            assert ajuste["erro_intercepto"] == pytest.approx(esperado.intercept_stderr, rel=1e-8)
+            assert ajuste[f"p_{coluna}"] == pytest.approx(esperado.pvalue, rel=1e-6, abs=1e-300)
+            assert ajuste["r2"] == pytest.approx(esperado.rvalue ** 2, rel=1e-9)
+
+
+def test_mqo_multipla_igual_ao_lstsq():
+    ra226, ra228, dose, _ = _dados()
+    ajuste = ajustar_regressoes(ra226, ra228, dose).set_index("modelo").loc["Ra-226 + Ra-228"]
+    X = np.column_stack([np.ones_like(dose), ra226, ra228])
+    coeficientes = np.linalg.lstsq(X, dose, rcond=None)[0]
+    np.testing.assert_allclose(ajuste[["intercepto", "coef_ra226", "coef_ra228"]].to_numpy(dtype=float),
+                               coeficientes, rtol=1e-9)
+
+
+def test_linhas_incompletas_sao_ignoradas():
+    ra226, ra228, dose, _ = _dados(50)
+    dose[:5] = np.nan
+    completo = ajustar_regressoes(ra226[5:], ra228[5:], dose[5:])
+    com_faltantes = ajustar_regressoes(ra226, ra228, dose)
+    pd.testing.assert_frame_equal(com_faltantes, completo)
@@ -0,0 +1,25 @@
+import json
+
+import pandas as pd
+
+from dosimetria import relatorio
+
+
+def test_sem_duracao_a_taxa_fica_indefinida(tmp_path, monkeypatch, capsys):
+    df = pd.DataFrame({"dose": []})
+    df.attrs["impressao"] = "abc"
+    monkeypatch.setattr(relatorio, "carregar_dados", lambda origem: df)
+    # Nenhum cenário, duração zero
+    monkeypatch.setattr(relatorio, "executar_cenarios", lambda *args: ([], 0.0))
+
+    assert relatorio.main(["--cenarios", str(_cenarios(tmp_path)), "--formatos", "json", "html",
+                           "--saida", str(tmp_path)]) == 0
+    assert "(N/A cenários/s)" in capsys.readouterr().err
+    assert "N/A cenários/s" in (tmp_path / "relatorio.html").read_text(encoding="utf-8")
+    assert json.loads((tmp_path / "relatorio.json").read_text(encoding="utf-8"))["cenarios_por_segundo"] is None
+
+
+def _cenarios(tmp_path):
+    caminho = tmp_path / "cenarios.json"
+    caminho.write_text("[]", encoding="utf-8")
+    return caminho
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from dosimetria.estatisticas import decidir_recomendacao
+from dosimetria.varredura import tabela_varredura, varrer_limites
+
+
+@pytest.fixture
+def amostras():
+    rng = np.random.default_rng(0)
+    n = 800
+    ra226 = rng.lognormal(0.0, 1.0, n).round(2)
+    ra228 = rng.lognormal(0.3, 0.9, n).round(2)
+    dose = (0.4 * ra226 + 0.3 * ra228 + rng.lognormal(0.0, 0.5, n)).round(2)
+    ra226[::41] = np.nan
+    dose[5::53] = np.nan
+    return ra226, ra228, dose
+
+
+def test_igual_ao_filtro_celula_a_celula(amostras):
+    ra226, ra228, dose = amostras
+    # Fora de ordem, repetidos e um teto abaixo de todas as amostras
+    tetos = [8.0, 1.0, 3.0, 0.001, 5.0, 3.0]
+    limites = [5.0, 2.0, 3.5, 2.0]
+    resultado = varrer_limites(ra226, ra228, dose, limites, tetos)
+
+    np.testing.assert_array_equal(resultado["tetos"], [0.001, 1.0, 3.0, 5.0, 8.0])
+    np.testing.assert_array_equal(resultado["limites"], [2.0, 3.5, 5.0])
+    for i, teto in enumerate(resultado["tetos"]):
+        no_teto = (ra226 <= teto) & (ra228 <= teto) & ~np.isnan(dose)
+        doses = dose[no_teto]
+        assert resultado["amostras"][i] == len(doses)
+        if not len(doses):
+            assert np.isnan(resultado["p95"][i]) and (resultado["decisao"][i] == "").all()
+            continue
+        p95 = np.percentile(doses, 95)
+        assert resultado["p95"][i] == pytest.approx(p95)
+        for j, limite in enumerate(resultado["limites"]):
+            dentro = (doses <= limite).sum()
+            percentual = dentro / len(doses) * 100
+            assert resultado["dentro"][i, j] == dentro
+            assert resultado["percentual"][i, j] == pytest.approx(percentual)
+            assert resultado["decisao"][i, j] == decidir_recomendacao(percentual, p95, limite)
+
+
+def test_tabela_uma_linha_por_combinacao(amostras):
+    resultado = varrer_limites(*amostras, [3.0, 5.0], [1.0, 8.0])
+    tabela = tabela_varredura(resultado)
+    assert len(tabela) == 4
+    linha = tabela.iloc[3]
+    assert (linha["Teto de Concentração (Bq/g)"], linha["Limite de Dose (µSv/h)"]) == (8.0, 5.0)
+    assert linha["Dentro do Limite"] == resultado["dentro"][1, 1]
+    assert linha["Recomendação"] == resultado["decisao"][1, 1]
@@ -0,0 +1,123 @@
+import pandas as pd
+import pytest
+
+from dosimetria import COL_DOSE
+from dosimetria.armazem import armazem
+from dosimetria.vigia import IndiceLinhas, RecargaIncremental, diferenca_linhas
+
+
+def _planilha(certificados, doses, site="Macaé"):
+    return pd.DataFrame({
+        "site": site,
+        "Lotes": "L1",
+        "Certificado de Análise": certificados,
+        "No\xa0Volume": 1,
+        COL_DOSE: doses,
+    })
+
+
+def test_diferenca_linhas():
+    antigo = IndiceLinhas(_planilha(["C1", "C2", "C3"], [1.0, 2.0, 3.0]))
+    novo = IndiceLinhas(_planilha(["C1", "C3", "C4"], [1.0, 3.5, 4.0]))
+
+    diferenca = diferenca_linhas(antigo, novo)
+    assert diferenca.inseridas.tolist() == [2]
+    assert diferenca.atualizadas.tolist() == [1]
+    assert diferenca.removidas.tolist() == [antigo.chaves[1]]
+    assert diferenca.alteradas.tolist() == [1, 2]
+    assert diferenca_linhas(novo, novo).vazia
+
+
+def test_diferenca_linhas_chaves_repetidas():
+    # A mesma amostra em duas linhas: a segunda ocorrência é outra linha
+    antigo = IndiceLinhas(_planilha(["C1"], [1.0]))
+    novo = IndiceLinhas(_planilha(["C1", "C1"], [1.0, 1.0]))
+    diferenca = diferenca_linhas(antigo, novo)
+    assert diferenca.inseridas.tolist() == [1]
+    assert len(diferenca.atualizadas) == len(diferenca.removidas) == 0
+
+
+def test_diferenca_sem_carga_anterior():
+    novo = IndiceLinhas(_planilha(["C1", "C2"], [1.0, 2.0]))
+    assert diferenca_linhas(None, novo).inseridas.tolist() == [0, 1]
+
+
+class _Arquivo:
+    """Pasta de trabalho com uma planilha por site, regravada a cada mudança."""
+
+    def __init__(self, caminho, sites):
+        self.caminho = caminho
+        self.sites = sites
+        self.gravar()
+
+    def gravar(self):
+        with pd.ExcelWriter(self.caminho, engine="openpyxl") as escritor:
+            for site, df in self.sites.items():
+                df.drop(columns="site").to_excel(escritor, sheet_name=site, index=False)
+
+    def ler(self, planilhas=None):
+        nomes = list(self.sites) if planilhas is None else [p for p in self.sites if p in planilhas]
+        partes = [pd.read_excel(self.caminho, sheet_name=nome).assign(site=nome) for nome in nomes]
+        return pd.concat(partes, ignore_index=True) if partes else self.sites[next(iter(self.sites))].iloc[:0]
+
+
+def _preparar(bruto):
+    return {"completo": bruto, "alta": bruto[bruto[COL_DOSE] > 2.0]}
+
+
+@pytest.fixture
+def recarga(tmp_path):
+    arquivo = _Arquivo(tmp_path / "resultados.xlsx", {
+        "Macaé": _planilha(["C1", "C2", "C3"], [1.0, 2.5, 3.0]),
+        "TIMS": _planilha(["T1", "T2"], [4.0, 0.5], site="TIMS"),
+    })
+    nome = f"teste-{tmp_path.name}"
+    yield arquivo, RecargaIncremental(nome, arquivo.ler, _preparar, arquivo=arquivo.caminho)
+    armazem.descartar(nome)
+
+
+def _falhar(bruto):
+    raise RuntimeError("planilha sendo salva")
+
+
+def _conferir(versao, arquivo):
+    referencia = _preparar(arquivo.ler())
+    for quadro, esperado in referencia.items():
+        pd.testing.assert_frame_equal(versao.dataframe(quadro)[esperado.columns],
+                                      esperado.reset_index(drop=True), check_dtype=False)
+
+
+def test_recarga_parcial_igual_a_completa(recarga):
+    arquivo, rec = recarga
+    versao = rec.obter()
+    _conferir(versao, arquivo)
+    assert rec.obter() is versao
+
+    arquivo.sites["Macaé"] = _planilha(["C1", "C3", "C4"], [1.0, 3.5, 5.0])
+    arquivo.gravar()
+    nova = rec.obter()
+    assert nova is not versao
+    assert set(rec.diferencas) == {"Macaé"}
+    _conferir(nova, arquivo)
+    versoes = nova.quadros["completo"].attrs["versoes_sites"]
+    assert versoes["TIMS"] == versao.quadros["completo"].attrs["versoes_sites"]["TIMS"]
+    assert versoes["Macaé"] != versao.quadros["completo"].attrs["versoes_sites"]["Macaé"]
+
+
+def test_falha_na_recarga_e_refeita_na_proxima(recarga):
+    arquivo, rec = recarga
+    versao = rec.obter()
+
+    arquivo.sites["TIMS"] = _planilha(["T1"], [4.0], site="TIMS")
+    arquivo.gravar()
+    rec.preparar = _falhar
+    with pytest.raises(RuntimeError):
+        rec.obter()
+    assert armazem.atual(rec.nome) is versao
+
+    # A mudança não foi perdida: a próxima chamada relê a planilha
+    rec.preparar = _preparar
+    nova = rec.obter()
+    assert nova is not versao
+    _conferir(nova, arquivo)
+    assert "T2" not in nova.dataframe("completo")["Certificado de Análise"].tolist()